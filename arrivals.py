@@ -0,0 +1,85 @@
+import numpy as np
+
+# arrival processes for open-loop load: every generator returns the arrival times (seconds since the start of
+# the trace, float64, non-decreasing) of n calls. Workload.gen_trace(arrival={"process": ..., params})
+# stores them as the "t" of every call, the Go runner then sends each call at its time instead of closed-loop
+
+
+# exponential inter-arrival times, rate calls/s
+def poisson(n, rng, rate):
+    return np.cumsum(rng.exponential(1.0 / rate, n))
+
+
+# markov-modulated poisson process: poisson with rates[state], a state lasts exponential(dwell[state]) seconds
+# and then moves to another state at random, e.g. rates=[10, 200], dwell=[30, 3] for short bursts
+def mmpp(n, rng, rates, dwell, start_state=0):
+    rates, dwell = np.asarray(rates, dtype=np.float64), np.asarray(dwell, dtype=np.float64)
+    if len(rates) == 0 or len(rates) != len(dwell):
+        raise Exception(f"mmpp needs one dwell per rate, got {len(rates)} rates and {len(dwell)} dwells")
+    if (rates < 0).any() or not (rates > 0).any():
+        raise Exception(f"mmpp rates must be >= 0 with at least one > 0, got {rates.tolist()}")
+    if not (dwell > 0).all():
+        raise Exception(f"mmpp dwells must be > 0, got {dwell.tolist()}")
+    times = []
+    count = 0
+    t, state = 0.0, start_state
+    while count < n:
+        length = rng.exponential(dwell[state])
+        k = rng.poisson(rates[state] * length)
+        if k > 0:
+            times.append(t + np.sort(rng.uniform(0.0, length, k)))
+            count += k
+        t += length
+        if len(rates) > 1:
+            state = (state + rng.integers(1, len(rates))) % len(rates)
+    return np.concatenate(times)[:n]
+
+
+# poisson with rate(t) = rate * (1 + amplitude * sin(2 pi t / period)), amplitude in [0, 1], period in seconds.
+# unit rate arrivals are mapped through the inverse of the integrated rate (time rescaling)
+def diurnal(n, rng, rate, amplitude=0.5, period=86400.0):
+    if not 0 <= amplitude <= 1:
+        raise Exception(f"diurnal amplitude must be in [0, 1], got {amplitude}")
+    unit = np.cumsum(rng.exponential(1.0, n))
+    w = 2 * np.pi / period
+
+    def integrated(t):
+        return rate * (t + amplitude / w * (1 - np.cos(w * t)))
+
+    # rate(t) >= 0 and the integral grows by rate * period per period, so the end is within one period
+    end = unit[-1] / rate + period
+    grid = np.linspace(0.0, end, max(int(end / period * 4096), 4096))
+    return np.interp(unit, integrated(grid), grid)
+
+
+# recorded timestamps (seconds, any origin) replayed speedup times faster, looped (shifted by the recorded span
+# plus one mean gap) when n is larger than the recording. path: a .npy array or a text file, one per line
+def replay(n, rng, path, speedup=1.0):
+    ts = np.load(path) if path.endswith(".npy") else np.loadtxt(path, ndmin=1)
+    ts = np.sort(np.asarray(ts, dtype=np.float64))
+    if len(ts) == 0:
+        raise Exception(f"cannot replay {path}, it has no timestamps")
+    ts = (ts - ts[0]) / speedup
+    span = ts[-1] + (ts[-1] / (len(ts) - 1) if len(ts) > 1 else 1.0)
+    loops = -(-n // len(ts))
+    return (ts[None, :] + span * np.arange(loops)[:, None]).ravel()[:n]
+
+
+PROCESSES = {
+    "poisson": poisson,
+    "mmpp": mmpp,
+    "diurnal": diurnal,
+    "replay": replay,
+}
+
+
+# arrival times of n calls from arrival = {"process": one of PROCESSES, other keys: its parameters},
+# seed: anything np.random.default_rng takes, e.g. an int or a SeedSequence
+def arrival_times(arrival, n, seed=None):
+    params = dict(arrival)
+    process = params.pop("process", None)
+    if process not in PROCESSES:
+        raise Exception(f"unknown arrival process {process}, expected one of {list(PROCESSES)}")
+    if n == 0:
+        return np.zeros(0)
+    return PROCESSES[process](n, np.random.default_rng(seed), **params)
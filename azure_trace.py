@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# import the Azure Functions traces (https://github.com/Azure/AzurePublicDataset, 2019 format) as timestamped calls
+# of ReqBench funcs. the files are streamed row by row, a multi GB trace is never held in memory:
+#   invocations_per_function_md.anon.dNN.csv: HashOwner,HashApp,HashFunction,Trigger,1,...,1440 (calls per minute)
+#   function_durations_percentiles.anon.dNN.csv: HashOwner,HashApp,HashFunction,Average,Count,...
+#   app_memory_percentiles.anon.dNN.csv: HashOwner,HashApp,SampleCount,AverageAllocatedMb,...
+# pass 1 totals the calls of every trace function, which are then mapped onto the funcs (by popularity rank,
+# or by memory/duration class), pass 2 adds up the per-minute calls of every func one day file at a time, and
+# the calls are emitted minute by minute, at uniformly random times within their minute. besides the totals,
+# only one day of per-minute counts is held (int32, 1440 x funcs: 57 MB for 10k funcs)
+import csv
+import sys
+
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+
+
+def function_key(owner, app, function):
+    return f"{owner}/{app}/{function}"
+
+
+# (function key, trigger, per-minute calls as int64) of every row, day files in the order given
+def iter_invocations(path):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        first = header.index("1")
+        owner, app, function, trigger = (header.index(col) for col in
+                                         ["HashOwner", "HashApp", "HashFunction", "Trigger"])
+        for row in reader:
+            counts = np.array(row[first:first + MINUTES_PER_DAY], dtype=np.int64)
+            yield function_key(row[owner], row[app], row[function]), row[trigger], counts
+
+
+# {function key: total calls} over all day files
+def invocation_totals(paths):
+    totals = {}
+    for path in paths:
+        for key, _, counts in iter_invocations(path):
+            totals[key] = totals.get(key, 0) + int(counts.sum())
+    return totals
+
+
+# {function key: average duration in ms}
+def load_durations(path):
+    durations = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            durations[function_key(row["HashOwner"], row["HashApp"], row["HashFunction"])] = float(row["Average"])
+    return durations
+
+
+# {"owner/app": average allocated MB}, memory is only recorded per app
+def load_app_memory(path):
+    memory = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            memory[f"{row['HashOwner']}/{row['HashApp']}"] = float(row["AverageAllocatedMb"])
+    return memory
+
+
+# {function key: MB of its app}, for map_by_class
+def function_memory(totals, app_memory):
+    return {key: app_memory[key.rsplit("/", 1)[0]] for key in totals if key.rsplit("/", 1)[0] in app_memory}
+
+
+# {function key: func index}: the i-th most called trace function gets func i, the trace functions beyond
+# the last func are left out. fold: they start over at func 0 instead, which skews the popularity of the funcs
+def map_by_rank(totals, n_funcs, fold=False):
+    ranked = sorted(totals, key=lambda key: totals[key], reverse=True)
+    if not fold:
+        ranked = ranked[:n_funcs]
+    return {key: rank % n_funcs for rank, key in enumerate(ranked)}
+
+
+# {function key: func index}: trace functions and funcs are both split into `classes` equally sized classes by
+# value (e.g. memory MB, from function_memory and the funcs' costs), within a class they are mapped by rank.
+# trace functions without a value are put in the middle class
+def map_by_class(totals, trace_values, func_values, classes=4):
+    if func_values is None or len(func_values) == 0:
+        raise Exception("mapping by class needs func_values, one value (e.g. MB or ms) per func")
+    classes = max(1, min(classes, len(func_values)))
+    funcs = sorted(range(len(func_values)), key=lambda i: func_values[i])
+    func_classes = np.array_split(np.array(funcs, dtype=np.int64), classes)
+
+    known = sorted((key for key in totals if key in trace_values), key=lambda key: trace_values[key])
+    trace_classes = [list(part) for part in np.array_split(np.array(known, dtype=object), classes)]
+    trace_classes[classes // 2] += [key for key in totals if key not in trace_values]
+
+    mapping = {}
+    for trace_class, func_class in zip(trace_classes, func_classes):
+        ranked = sorted(trace_class, key=lambda key: totals[key], reverse=True)
+        for rank, key in enumerate(ranked):
+            mapping[key] = int(func_class[rank % len(func_class)])
+    return mapping
+
+
+# (n_funcs, MINUTES_PER_DAY) calls per minute of every func in one day file, summed over the trace functions
+# mapped onto it
+def day_counts(path, mapping, n_funcs):
+    counts = np.zeros((n_funcs, MINUTES_PER_DAY), dtype=np.int32)
+    for key, _, minute_calls in iter_invocations(path):
+        if key in mapping:
+            counts[mapping[key]] += minute_calls
+    return counts
+
+
+# (times in seconds since start_minute, func indices as int32) of every minute, in time order. minutes count
+# from the start of the first day file, only the day files in [start_minute, start_minute + minutes) are read.
+# scale != 1 draws poisson(count * scale) calls instead of count, e.g. 0.01 for a 1% sample
+def iter_calls(paths, mapping, n_funcs, start_minute=0, minutes=None, scale=1.0, seed=None):
+    rng = np.random.default_rng(seed)
+    end = MINUTES_PER_DAY * len(paths)
+    if minutes is not None:
+        end = min(end, start_minute + minutes)
+    func_ids = np.arange(n_funcs, dtype=np.int32)
+    for day, path in enumerate(paths):
+        first = max(start_minute, day * MINUTES_PER_DAY)
+        last = min(end, (day + 1) * MINUTES_PER_DAY)
+        if first >= last:
+            continue
+        counts = day_counts(path, mapping, n_funcs)
+        for minute in range(first, last):
+            row = counts[:, minute - day * MINUTES_PER_DAY]
+            if scale != 1.0:
+                row = rng.poisson(row * scale)
+            funcs = np.repeat(func_ids, row)
+            if len(funcs) == 0:
+                continue
+            times = (minute - start_minute) * 60.0 + rng.uniform(0.0, 60.0, len(funcs))
+            order = np.argsort(times)
+            yield times[order], funcs[order]
+
+
+# Usage: python3 azure_trace.py <invocations csv> [<invocations csv> ...]
+# prints the skew of the trace: how many functions make up 50/90/99% of the calls
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 azure_trace.py <invocations csv> [<invocations csv> ...]")
+        sys.exit()
+    totals = np.sort(np.array(list(invocation_totals(sys.argv[1:]).values()), dtype=np.int64))[::-1]
+    share = np.cumsum(totals) / max(totals.sum(), 1)
+    print(f"{len(totals)} functions, {totals.sum()} calls")
+    for p in [0.5, 0.9, 0.99]:
+        print(f"{p:.0%} of the calls: top {int(np.searchsorted(share, p)) + 1} functions")
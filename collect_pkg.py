@@ -3,39 +3,11 @@ import json
 import subprocess
 import sys
 
-import pandas as pd
-
 from config import *
-from util import parse_requirements
-from workload import generate_workloads_from_txts
-
-# 1. install netifaces could cause error in openlambda
-# 2. self-defined packages are not considered
-blacklist = ["https://", "http://"]
-
-
-def get_top_n_packages(filtered_df, n=500):
-    packages_appear_times = {}
-
-    for col in filtered_df["compiled"]:
-        requirements, _ = parse_requirements(col)
-        if any([x in requirements.keys() for x in blacklist]):
-            continue
-        for pkg_name, op_version in requirements.items():
-            # ignore the extra options, it does nothing except installing some extra packages
-            # those extra packages will be eventually specified in the requirements.txt
-            pkg_name = pkg_name.split("[")[0]
-            version = op_version[1]
-            key = f"{pkg_name}=={version}"
-            packages_appear_times[key] = packages_appear_times.get(key, 0) + 1
-
-    print(f"there are {len(packages_appear_times)} unique packages in total")
-    if n == -1:
-        return _, packages_appear_times
-
-    sorted_packages = sorted(packages_appear_times.items(), key=lambda x: x[1], reverse=True)
-    top_n_packages = sorted_packages[:n]
-    return dict(top_n_packages), packages_appear_times
+from pkg_registry import registry
+from req_parser import parse_cache
+from workload import deps_from_txts, get_top_n_packages
+from workload_stream import iter_compiled
 
 
 # Usage: python3 collect_pkg.py <requirements.csv> -l <#packages>
@@ -48,24 +20,20 @@ if __name__ == '__main__':
         sys.exit()
     requirements_csv = sys.argv[1]
     pkg_num = int(sys.argv[3])
-    try:
-        requirements_df = pd.read_csv(requirements_csv)
-    except:
+    if not os.path.exists(requirements_csv):
         print("Error: requirements.csv not found")
         sys.exit()
-    filtered_df = requirements_df[(requirements_df['compiled'] != "") &
-                                  (requirements_df['compiled'].notnull())]
+    parse_cache.load()
 
-    wl = generate_workloads_from_txts(filtered_df["compiled"].tolist())
+    # the deps of every row of the csv, each row counts once, streamed without building a workload
     with open(os.path.join(bench_file_dir, "deps.json"), 'w') as file:
-        deps_dict, _, _ = wl.parse_deps()
+        deps_dict, _, _ = deps_from_txts({}, ((txt, 1) for txt in iter_compiled(requirements_csv)))
         json.dump(deps_dict, file, indent=2)
 
-    pkgs, _ = get_top_n_packages(filtered_df, pkg_num)
+    pkgs, _ = get_top_n_packages(iter_compiled(requirements_csv), pkg_num)
 
     for pkg in pkgs:
-        name = pkg.split("==")[0]
-        version = pkg.split("==")[1]
+        name, version = registry.split(pkg)
         deps = deps_dict[name][version]
         pkgs[pkg] = deps
 
@@ -76,6 +44,8 @@ if __name__ == '__main__':
     with open(os.path.join(bench_file_dir, f"top_{pkg_num}_pkgs.json"), 'w') as file:
         json.dump(pkgs, file, indent=2)
     print(f"collected top {min(pkg_num, len(pkgs))} packages")
+    parse_cache.save()
+    print(f"parse cache: {parse_cache.stats()}")
 
     subprocess.run("docker build -t install_import .", shell=True, cwd=bench_dir)
     subprocess.run(f"docker run "
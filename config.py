@@ -3,6 +3,31 @@ import os
 REQ_COUNT = 500
 TRIALS = 5
 TASKS = 5
+# max number of pip-compile processes running at the same time, like NUM_THREAD in compile.go
+COMPILE_THREADS = 8
+# install_import: number of parallel `pip3 download` and of install workers (each gets its own cpu set),
+# INSTALL_WORKERS = 1 installs one package at a time on every cpu, like before
+DOWNLOAD_THREADS = 16
+INSTALL_WORKERS = 1
+# import cost measurement (install_import, mod_costs): discard IMPORT_WARMUP samples, then take samples until
+# the 95% CI half width is below IMPORT_REL_CI of the mean or below IMPORT_ABS_CI (ms / MB, smaps: MB of uss),
+# at least IMPORT_MIN_TRIALS and at most IMPORT_MAX_TRIALS. a hanging import is killed after IMPORT_TIMEOUT seconds
+IMPORT_WARMUP = 1
+IMPORT_MIN_TRIALS = 5
+IMPORT_MAX_TRIALS = 30
+IMPORT_REL_CI = 0.05
+IMPORT_ABS_CI = {"ms": 0.1, "mb": 0.01, "smaps": 0.05}
+IMPORT_TIMEOUT = 300
+# also record the per-module import tree of every measured package (import_tree.py)
+IMPORT_TREE = True
+# the statistic (cost_stats.COST_STATISTICS, not ci95) written as the "ms"/"mb"/"i-ms"/"i-mb" of a measured package
+COST_STATISTIC = "p50"
+# mod_costs: number of measuring lambdas invoked at the same time (each invocation has a sandbox of its own),
+# with MEASURE_PIN_CPUS every running invocation is pinned to its own cpus, so they don't share a cpu
+MEASURE_CONCURRENCY = 4
+MEASURE_PIN_CPUS = True
+# rows of requirements.csv read at a time when a workload is built from it (workload_stream.py)
+CSV_CHUNK_ROWS = 10000
 
 # remove pip and setuptools from the list of packages, these 2 packages are not used in the serverless functions
 # (no one will use serverless functions for packaging)
@@ -10,6 +35,7 @@ TASKS = 5
 
 ol_dir = "/root/open-lambda/"
 worker_out = os.path.join(ol_dir, "default-ol", "worker.out")
+ol_url = "http://localhost:5000/"
 bench_dir = "/root/ReqBench" # "/root/ReqBench"
 tmp_dir = os.path.join(bench_dir, "tmp")
 cache_pkgs_dir = os.path.join(bench_dir, "tmp", ".cache")
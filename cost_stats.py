@@ -0,0 +1,120 @@
+import json
+import statistics
+
+# version of the "stats" object stored next to every measured import cost (install_import.json, costs.json).
+# schema 1: no "stats", "ms"/"mb"/"i-ms"/"i-mb" are single samples
+# schema 2: {"schema": 2, "statistic": "p50", "metrics": {"ms": summarize(samples), ...}},
+#           "ms"/"mb"/"i-ms"/"i-mb" hold metrics[metric][statistic]
+COST_SCHEMA_VERSION = 2
+COST_METRICS = ["i-ms", "i-mb", "ms", "mb"]
+# rss/pss/uss growth during the import in MB (/proc/self/smaps_rollup), next to the tracemalloc "mb",
+# they also count native allocations and mapped shared libraries
+SMAPS_METRICS = ["i-rss", "i-pss", "i-uss", "rss", "pss", "uss"]
+STATISTICS = ["mean", "stdev", "min", "p50", "p95", "max", "ci95"]
+# the statistics a cost can be set to, ci95 is the width of an interval (and None below 2 samples), not a cost
+COST_STATISTICS = ["mean", "stdev", "min", "p50", "p95", "max"]
+
+# two-sided 95% student t quantiles for 1..30 degrees of freedom, 1.96 (normal) beyond
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+# half width of the 95% confidence interval of the mean, None with less than 2 samples.
+# no imports on purpose: import_harness copies this function into its zygote, which must stay clean
+def ci95(samples):
+    n = len(samples)
+    if n < 2:
+        return None
+    mean = sum(samples) / n
+    stdev = (sum((x - mean) ** 2 for x in samples) / (n - 1)) ** 0.5
+    t = T95[n - 2] if n - 1 <= len(T95) else 1.96
+    return t * stdev / n ** 0.5
+
+
+# stop sampling once the CI is narrow enough, relative to the mean (rel_ci) or absolutely (abs_ci),
+# the absolute bound keeps sub-millisecond imports from running until max_trials
+def converged(samples, rel_ci, abs_ci):
+    half = ci95(samples)
+    if half is None:
+        return False
+    mean = sum(samples) / len(samples)
+    return half <= max(rel_ci * abs(mean), abs_ci)
+
+
+# take warmup discarded samples, then at least min_trials and at most max_trials until converged.
+# take_sample() returns a number, or None if the sample failed (sampling stops at the first failure)
+def adaptive_samples(take_sample, warmup, min_trials, max_trials, rel_ci, abs_ci):
+    for _ in range(warmup):
+        if take_sample() is None:
+            return []
+    samples = []
+    while len(samples) < max_trials:
+        value = take_sample()
+        if value is None:
+            break
+        samples.append(value)
+        if len(samples) >= min_trials and converged(samples, rel_ci, abs_ci):
+            break
+    return samples
+
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+# n, warmup, mean, stdev, min, p50, p95, max, ci95 of the samples, and the samples themselves
+def summarize(samples, warmup=0):
+    stats = {"n": len(samples), "warmup": warmup, "samples": samples}
+    if not samples:
+        return stats
+    stats["mean"] = statistics.fmean(samples)
+    stats["stdev"] = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    stats["min"] = min(samples)
+    stats["p50"] = statistics.median(samples)
+    stats["p95"] = percentile(samples, 95)
+    stats["max"] = max(samples)
+    stats["ci95"] = ci95(samples)
+    return stats
+
+
+def check_statistic(statistic):
+    if statistic not in COST_STATISTICS:
+        raise Exception(f"cannot set costs to {statistic}, expected one of {COST_STATISTICS}")
+    return statistic
+
+
+# the "stats" object of one measured pkg==version, metrics: {metric: summarize(...)}
+def cost_record(metrics, statistic="p50"):
+    return {"schema": COST_SCHEMA_VERSION, "statistic": statistic, "metrics": metrics}
+
+
+# one cost entry ({"ms": .., "mb": .., "stats": ..., ...}) with the metrics set to the chosen statistic.
+# schema 1 entries have nothing to choose from and come back as they are, "stats" is dropped either way
+def select(entry, statistic="p50"):
+    check_statistic(statistic)
+    entry = dict(entry)
+    stats = entry.pop("stats", None)
+    if stats is None:
+        return entry
+    if stats.get("schema") != COST_SCHEMA_VERSION:
+        raise Exception(f"unknown cost schema {stats.get('schema')}")
+    for metric, metric_stats in stats["metrics"].items():
+        entry[metric] = metric_stats.get(statistic, 0)
+    return entry
+
+
+# load install_import.json ({name: {version: entry}}) or costs.json ({"name==version": entry})
+# with every cost set to the chosen statistic, e.g. load_costs(path, "min")
+def load_costs(path, statistic="p50"):
+    with open(path) as f:
+        costs = json.load(f)
+
+    def walk(node):
+        if isinstance(node, dict) and any(metric in node for metric in COST_METRICS + SMAPS_METRICS):
+            return select(node, statistic)
+        return {key: walk(value) for key, value in node.items()} if isinstance(node, dict) else node
+
+    return walk(costs)
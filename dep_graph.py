@@ -0,0 +1,124 @@
+import sys
+import time
+
+
+# dependencies is the versioned_dependencies of one requirements.txt:
+# dependencies(A)=[B, C] means B,C depends on A, so the edges point from A to B and C
+def build_graph(dependencies):
+    ids = {}
+    nodes = []
+    for pkg, deps in dependencies.items():
+        for name in (pkg, *deps):
+            if name not in ids:
+                ids[name] = len(nodes)
+                nodes.append(name)
+
+    succ = [[] for _ in nodes]
+    for pkg, deps in dependencies.items():
+        pkg_id = ids[pkg]
+        for dep in deps:
+            succ[ids[dep]].append(pkg_id)
+    return nodes, succ
+
+
+# iterative Tarjan, components come out in reverse topological order (a component after everything it reaches)
+def strongly_connected_components(succ):
+    index = [-1] * len(succ)
+    low = [0] * len(succ)
+    on_stack = [False] * len(succ)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(len(succ)):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            if i < len(succ[v]):
+                work[-1] = (v, i + 1)
+                w = succ[v][i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def transitive_closure(dependencies):
+    """
+    Get the full dependencies of every package in one pass over the graph.
+
+    Args:
+        dependencies (dict): {pkg: [pkg, dependent, ...]}, as returned by ParsedRequirements.versioned_dependencies
+
+    Returns:
+        {pkg: [deps]}, every node reachable from pkg by at least one edge. A package lists itself
+        because versioned_dependencies puts it in its own list. 'direct_req' maps to the whole install set.
+    """
+    nodes, succ = build_graph(dependencies)
+    components = strongly_connected_components(succ)
+
+    component_of = [0] * len(nodes)
+    for c, component in enumerate(components):
+        for v in component:
+            component_of[v] = c
+
+    # reach[c]: nodes reachable from component c in >= 1 step, successors are always finished first
+    reach = [None] * len(components)
+    for c, component in enumerate(components):
+        reached = set()
+        if len(component) > 1 or any(v in succ[v] for v in component):
+            reached.update(component)
+        for v in component:
+            for w in succ[v]:
+                d = component_of[w]
+                if d != c:
+                    reached.update(components[d])
+                    reached |= reach[d]
+        reach[c] = reached
+
+    return {nodes[v]: [nodes[w] for w in reach[component_of[v]]] for v in range(len(nodes))}
+
+
+# Usage: python3 dep_graph.py <requirements.csv>
+# micro-benchmark: compute the transitive closure of every compiled requirements.txt in the csv
+if __name__ == '__main__':
+    from req_parser import parse_lines
+    from workload_stream import iter_compiled
+
+    if len(sys.argv) != 2:
+        print("Usage: python3 dep_graph.py <requirements.csv>")
+        sys.exit()
+    t0 = time.time()
+    files, pkgs = 0, 0
+    for txt in iter_compiled(sys.argv[1]):
+        parsed = parse_lines(txt.splitlines())
+        files += 1
+        pkgs += len(transitive_closure(parsed.versioned_dependencies()))
+    t1 = time.time()
+    print(f"closed {files} files, {pkgs} packages in {t1 - t0:.3f}s")
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# file kinds broken down by folder_size, every other file is "other"
+FILE_KINDS = ["so", "py", "pyc", "other"]
+
+
+class FolderSize(NamedTuple):
+    size: int  # apparent bytes, the sum of st_size
+    allocated: int  # bytes of the allocated blocks (st_blocks * 512), hard links counted once
+    files: int
+    kinds: dict  # {kind: [files, apparent bytes]} for every kind in FILE_KINDS
+
+    # share of the apparent bytes in native libraries
+    def so_share(self):
+        return self.kinds["so"][1] / self.size if self.size else 0.0
+
+
+def file_kind(name):
+    if name.endswith(".so") or ".so." in name:  # libfoo.so, libfoo.so.1.2
+        return "so"
+    if name.endswith(".py"):
+        return "py"
+    if name.endswith(".pyc"):
+        return "pyc"
+    return "other"
+
+
+# size of every regular file under folder, symlinks are not followed or counted.
+# one scandir per directory and one lstat per file (DirEntry caches it), instead of os.walk's
+# join + islink + getsize for every file
+def folder_size(folder):
+    size = allocated = files = 0
+    kinds = {kind: [0, 0] for kind in FILE_KINDS}
+    inodes = set()
+    stack = [folder]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue  # removed meanwhile, or not readable
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                files += 1
+                size += st.st_size
+                kind = kinds[file_kind(entry.name)]
+                kind[0] += 1
+                kind[1] += st.st_size
+                if st.st_nlink > 1:
+                    if (st.st_dev, st.st_ino) in inodes:
+                        continue
+                    inodes.add((st.st_dev, st.st_ino))
+                allocated += st.st_blocks * 512
+    return FolderSize(size, allocated, files, kinds)
+
+
+# {folder: FolderSize}, scandir and stat release the GIL, so threads walk different folders in parallel
+def folder_sizes(folders, threads=8):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return dict(zip(folders, executor.map(folder_size, folders)))
+
+
+if __name__ == "__main__":
+    import sys
+    for folder, fs in folder_sizes(sys.argv[1:]).items():
+        print(f"{folder}: {fs.size / 1024 / 1024:.1f} MB, {fs.allocated / 1024 / 1024:.1f} MB allocated, "
+              f"{fs.files} files, {fs.so_share():.0%} in .so")
@@ -0,0 +1,237 @@
+import inspect
+import json
+import os
+import subprocess
+from typing import NamedTuple, Optional
+
+import cost_stats
+import import_tree
+from config import IMPORT_WARMUP, IMPORT_MIN_TRIALS, IMPORT_MAX_TRIALS, IMPORT_REL_CI, IMPORT_ABS_CI, IMPORT_TIMEOUT, \
+    IMPORT_TREE
+from cost_stats import COST_METRICS, SMAPS_METRICS, check_statistic, cost_record, summarize
+from import_tree import build_tree
+from util import read_smaps_rollup
+
+# the zygote: a clean interpreter that only loads what measuring needs, then forks for every request.
+# for one request it forks a "dep parent", which puts the dep pkgs on sys.path and forks
+#   1. time children, then tracemalloc children importing mods alone (i-ms, i-mb)
+#   2. with tree set, one time and one tracemalloc child recording the import tree of mods (import_tree)
+#   3. then imports dep_mods itself, and forks the same children as in 1. again (ms, mb), so deps are loaded
+# a child measures one sample of one metric and exits: a timed import, a traced one (tracemalloc would slow
+# down the timed one) or one in between two reads of /proc/self/smaps_rollup (rss/pss/uss, tracemalloc off)
+# every process hands its result to its parent through a pipe, stdout is left to the packages.
+# children are forked until cost_stats.adaptive_samples is satisfied. its code, ImportTreeFinder and read_smaps_rollup are
+# copied in, as importing cost_stats (and statistics) would preload modules the measured packages might import.
+zygote_main = """
+import gc, importlib, json, os, signal, sys, time, tracemalloc
+
+os.environ['OPENBLAS_NUM_THREADS'] = '2'
+sys.path = [path for path in sys.path if "packages" not in path]
+base_path = list(sys.path)
+results = os.fdopen(int(sys.argv[1]), "w")
+
+
+def forked(func, *args):
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        try:
+            result = func(*args)
+        except BaseException as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        with os.fdopen(w, "w") as f:
+            f.write(json.dumps(result))
+        os._exit(0)
+    os.close(w)
+    with os.fdopen(r) as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    if not data:
+        return {"error": f"measuring process exited with status {status}"}
+    return json.loads(data)
+
+
+def timed_out(signum, frame):
+    raise TimeoutError("import timed out")
+
+
+def sample(metric, mods, timeout):
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.alarm(timeout)
+    if metric == "mb":
+        gc.collect()
+        tracemalloc.start()
+        for mod in mods:
+            importlib.import_module(mod)
+        return {"value": (tracemalloc.get_traced_memory()[0] - tracemalloc.get_tracemalloc_memory()) / 1024 / 1024}
+    if metric == "smaps":
+        gc.collect()
+        before = read_smaps_rollup()
+        for mod in mods:
+            importlib.import_module(mod)
+        after = read_smaps_rollup()
+        if not before or not after:
+            raise Exception("cannot read /proc/self/smaps_rollup")
+        return {"value": {key: (after[key] - before[key]) / 1024 for key in after}}
+    t0 = time.perf_counter()
+    for mod in mods:
+        importlib.import_module(mod)
+    return {"value": (time.perf_counter() - t0) * 1000}
+
+
+def sample_tree(metric, mods, timeout):
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.alarm(timeout)
+    finder = ImportTreeFinder()
+    finder.install()
+    if metric == "mb":
+        gc.collect()
+        tracemalloc.start()
+    for mod in mods:
+        importlib.import_module(mod)
+    return {"value": finder.records}
+
+
+def measure(req):
+    sys.path = [os.path.join("/packages", pkg) for pkg in reversed(req["dep_pkgs"])] + base_path
+    importlib.invalidate_caches()
+    samples = {}
+    errors = {}
+
+    def run(prefix):
+        for metric in ["ms", "mb", "smaps"]:
+            values = []
+
+            # smaps samples are {"rss", "pss", "uss"}, uss decides when to stop
+            def take_sample():
+                result = forked(sample, metric, req["mods"], req["timeout"])
+                if "error" in result:
+                    errors.setdefault(prefix + metric, result["error"])
+                    return None
+                values.append(result["value"])
+                return result["value"]["uss"] if metric == "smaps" else result["value"]
+            adaptive_samples(take_sample, req["warmup"], req["min_trials"],
+                             req["max_trials"], req["rel_ci"], req["abs_ci"][metric])
+            values = values[req["warmup"]:]
+            if metric == "smaps":
+                for key in ["rss", "pss", "uss"]:
+                    samples[prefix + key] = [value[key] for value in values]
+                    if prefix + metric in errors:
+                        errors[prefix + key] = errors[prefix + metric]
+                errors.pop(prefix + metric, None)
+            else:
+                samples[prefix + metric] = values
+
+    run("i-")
+    trees = {}
+    if req["tree"]:
+        for metric in ["ms", "mb"]:
+            trees[metric] = forked(sample_tree, metric, req["mods"], req["timeout"]).get("value")
+    # the dep parent must survive a hanging dependency, the i- samples are already taken
+    signal.signal(signal.SIGALRM, timed_out)
+    signal.alarm(req["timeout"])
+    try:
+        for mod in req["dep_mods"]:
+            importlib.import_module(mod)
+    except BaseException as e:
+        signal.alarm(0)
+        for metric in ["ms", "mb", "rss", "pss", "uss"]:
+            errors[metric] = f"importing dependencies: {type(e).__name__}: {e}"
+        return {"samples": samples, "errors": errors, "trees": trees}
+    signal.alarm(0)
+    run("")
+    return {"samples": samples, "errors": errors, "trees": trees}
+
+
+for line in sys.stdin:
+    result = forked(measure, json.loads(line))
+    results.write(json.dumps(result) + "\\n")
+    results.flush()
+"""
+
+zygote = "".join([f"T95 = {cost_stats.T95!r}\n",
+                  inspect.getsource(cost_stats.ci95),
+                  inspect.getsource(cost_stats.converged),
+                  inspect.getsource(cost_stats.adaptive_samples),
+                  inspect.getsource(import_tree.ImportTreeFinder),
+                  inspect.getsource(read_smaps_rollup),
+                  zygote_main])
+
+
+class ImportMeasurement(NamedTuple):
+    # {metric: summarize(samples)} for cost_stats.COST_METRICS and SMAPS_METRICS.
+    # "i-" metrics import the pkg's top modules alone, the others after the dependencies' top modules are loaded,
+    # ms in milliseconds, mb (tracemalloc) and rss/pss/uss (smaps_rollup growth) in MB
+    metrics: dict
+    errors: dict  # {metric: first error message}, only for metrics that failed
+    tree: Optional[list] = None  # import_tree.build_tree of importing mods alone, if it was asked for
+
+    # the value reported for a metric, a cost_stats.COST_STATISTICS of its samples (0 if it never succeeded)
+    def value(self, metric, statistic="p50"):
+        check_statistic(statistic)
+        return self.metrics[metric].get(statistic, 0)
+
+    def stats(self, statistic="p50"):
+        return cost_record(self.metrics, statistic)
+
+
+class ImportHarness:
+    """
+    Measure import time/memory of installed packages from one long-lived zygote process.
+
+    The zygote is started lazily and restarted if it dies, so one bad package cannot stop the others.
+    """
+
+    def __init__(self, warmup=IMPORT_WARMUP, min_trials=IMPORT_MIN_TRIALS, max_trials=IMPORT_MAX_TRIALS,
+                 rel_ci=IMPORT_REL_CI, abs_ci=IMPORT_ABS_CI, timeout=IMPORT_TIMEOUT, tree=IMPORT_TREE):
+        self.trials = {"warmup": warmup, "min_trials": min_trials, "max_trials": max_trials,
+                       "rel_ci": rel_ci, "abs_ci": abs_ci}
+        self.tree = tree
+        self.timeout = timeout
+        self.process = None
+        self.results = None
+
+    def start(self):
+        r, w = os.pipe()
+        self.process = subprocess.Popen(['python3', '-c', zygote, str(w)], stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL, pass_fds=(w,), text=True)
+        os.close(w)
+        self.results = os.fdopen(r)
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        self.process.wait()
+        self.results.close()
+        self.process = None
+
+    # dep_pkgs: ["name==version", ...] installed under /packages, dep_mods and mods: top-level module names
+    def measure(self, dep_pkgs, dep_mods, mods) -> ImportMeasurement:
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+        req = {"dep_pkgs": dep_pkgs, "dep_mods": dep_mods, "mods": mods, "timeout": self.timeout, "tree": self.tree,
+               **self.trials}
+        line = None
+        try:
+            self.process.stdin.write(json.dumps(req) + "\n")
+            self.process.stdin.flush()
+            line = self.results.readline()
+        except BrokenPipeError:
+            pass
+        if not line:
+            self.process.kill()
+            self.close()
+            result = {"error": "the measuring zygote died"}
+        else:
+            result = json.loads(line)
+
+        samples = result.get("samples", {})
+        errors = result.get("errors", {})
+        if "error" in result:
+            errors = {metric: result["error"] for metric in COST_METRICS + SMAPS_METRICS}
+        trees = result.get("trees", {})
+        tree = build_tree(trees["ms"], trees.get("mb")) if trees.get("ms") else None
+        return ImportMeasurement({metric: summarize(samples.get(metric, []), self.trials["warmup"])
+                                  for metric in COST_METRICS + SMAPS_METRICS}, errors, tree)
@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+import tracemalloc
+
+
+class ImportTreeFinder:
+    """
+    A sys.meta_path hook recording who imported which module, and what every module cost.
+
+    For every module loaded by a python loader it records
+        records[name] = [order, parent, cum_ms, self_ms, cum_kb, self_kb]
+    cum covers finding, creating and executing the module (and the modules it imports), self excludes
+    its children. kb is the memory traced by tracemalloc, so it is 0 unless tracemalloc is tracing
+    (which slows down imports: measure the time and the memory trees in different processes).
+    Builtin and frozen modules are not recorded.
+
+    Only json, sys, time and tracemalloc are imported here: import_harness and mod_costs copy
+    this class into their measuring processes, which must not preload anything else.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.stack = []  # [name, children_ms, children_kb] of the modules being loaded
+        self.starts = {}  # name -> (perf_counter, traced kb) when it was looked up
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        sys.meta_path.remove(self)
+
+    @staticmethod
+    def traced_kb():
+        return tracemalloc.get_traced_memory()[0] / 1024 if tracemalloc.is_tracing() else 0
+
+    def find_spec(self, name, path=None, target=None):
+        start = (time.perf_counter(), self.traced_kb())
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        self.starts[name] = start
+        self.wrap(loader)
+        return spec
+
+    # patch the loader instance once, a loader can be shared by many modules (e.g. zipimporter)
+    def wrap(self, loader):
+        if getattr(loader, "_import_tree", None) is self:
+            return
+        create_module = getattr(loader, "create_module", None)
+        exec_module = loader.exec_module
+
+        def timed_create_module(spec):
+            self.enter(spec.name)
+            try:
+                return create_module(spec)
+            except BaseException:
+                self.exit(spec.name)
+                raise
+
+        def timed_exec_module(module):
+            name = module.__spec__.name
+            if not self.stack or self.stack[-1][0] != name:
+                self.enter(name)
+            try:
+                exec_module(module)
+            finally:
+                self.exit(name)
+
+        try:
+            if create_module is not None:
+                loader.create_module = timed_create_module
+            loader.exec_module = timed_exec_module
+            loader._import_tree = self
+        except AttributeError:
+            pass  # loader does not take attributes, the module goes unrecorded
+
+    def enter(self, name):
+        if name not in self.starts:
+            self.starts[name] = (time.perf_counter(), self.traced_kb())
+        self.stack.append([name, 0.0, 0.0])
+
+    def exit(self, name):
+        _, children_ms, children_kb = self.stack.pop()
+        t0, kb0 = self.starts.pop(name)
+        cum_ms = (time.perf_counter() - t0) * 1000
+        cum_kb = self.traced_kb() - kb0
+        parent = self.stack[-1][0] if self.stack else None
+        self.records[name] = [len(self.records), parent, cum_ms, cum_ms - children_ms, cum_kb, cum_kb - children_kb]
+        if self.stack:
+            self.stack[-1][1] += cum_ms
+            self.stack[-1][2] += cum_kb
+
+
+# nested [module, cum_ms, self_ms, cum_kb, self_kb, [children...]] lists, in import order.
+# ms come from time_records, kb from mem_records (both ImportTreeFinder.records, mem_records may be None)
+def build_tree(time_records, mem_records=None, digits=3):
+    mem_records = mem_records or {}
+    nodes = {}
+    for name, (order, parent, cum_ms, self_ms, _, _) in time_records.items():
+        mem = mem_records.get(name)
+        cum_kb, self_kb = (mem[4], mem[5]) if mem is not None else (0, 0)
+        nodes[name] = [name, round(cum_ms, digits), round(self_ms, digits), round(cum_kb, digits),
+                       round(self_kb, digits), []]
+
+    roots = []
+    # siblings finish (and get their order) in the order they were imported in
+    for name, record in sorted(time_records.items(), key=lambda item: item[1][0]):
+        parent = record[1]
+        if parent in nodes:
+            nodes[parent][5].append(nodes[name])
+        else:
+            roots.append(nodes[name])
+    return roots
+
+
+def iter_tree(tree):
+    for node in tree:
+        yield node
+        yield from iter_tree(node[5])
+
+
+# the modules that add up to `share` of the total self time ("ms") or memory ("kb") over all trees,
+# most expensive first: [(module, cost), ...]. trees: an iterable of build_tree results
+def hot_modules(trees, share=0.8, key="ms"):
+    idx = 2 if key == "ms" else 4
+    costs = {}
+    for tree in trees:
+        for node in iter_tree(tree):
+            costs[node[0]] = costs.get(node[0], 0) + max(node[idx], 0)
+    total = sum(costs.values())
+    hot = []
+    acc = 0
+    for name, cost in sorted(costs.items(), key=lambda item: item[1], reverse=True):
+        if acc >= share * total:
+            break
+        hot.append((name, cost))
+        acc += cost
+    return hot
+
+
+# {name: {version: tree}} -> one line of json, trees can be large
+def save_trees(trees, path):
+    with open(path, "w") as f:
+        json.dump(trees, f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    finder = ImportTreeFinder()
+    finder.install()
+    for mod in sys.argv[1:]:
+        __import__(mod)
+    finder.uninstall()
+    for node in iter_tree(build_tree(finder.records)):
+        print(f"{node[0]:60} cum {node[1]:9.3f} ms  self {node[2]:9.3f} ms")
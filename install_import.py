@@ -2,78 +2,27 @@ import json
 import pkgutil
 import subprocess
 import os
-import shutil
+import queue
 from concurrent.futures import ThreadPoolExecutor
 import threading
 import time
-import requests
 import glob
-
-from util import compressed_size, normalize_pkg, find_compressed_files
+from collections import Counter
+
+from config import COST_STATISTIC, DOWNLOAD_THREADS, INSTALL_WORKERS
+from cost_stats import COST_METRICS, SMAPS_METRICS
+from folder_size import folder_size
+from import_harness import ImportHarness, ImportMeasurement
+from import_tree import save_trees
+from install_scheduler import DiskBudget, plan_batches
+from journal import Journal
+from pkg_size import UNCOMPRESSED_RATIO
+from pkg_registry import registry
+from util import split_cpus
+from wheel_cache import wheel_cache
 
 install_dir = "/packages"
 
-measure_ms = """
-import time, sys, importlib, os
-import json
-
-to_remove = []
-for path in sys.path:
-    if "packages" in path:
-        to_remove.append(path)
-sys.path = [path for path in sys.path if path not in to_remove]
-
-dep_pkg = {dep_pkgs}
-for pkg in dep_pkg:
-    sys.path.insert(0, os.path.join("/packages", pkg))
-
-os.environ['OPENBLAS_NUM_THREADS'] = '2'
-
-try:
-    dep_mods = {dep_mods}
-    for mod in dep_mods:
-        importlib.import_module(mod) 
-    t0 = time.time()
-    mods = {mods}
-    for mod in mods:
-        importlib.import_module(mod) 
-    t1 = time.time()
-    print(json.dumps({{'ms': (t1 - t0) * 1000}}))
-except Exception as e:
-    print(json.dumps({{'error': str(e)}}))
-"""
-
-measure_mb = """
-import tracemalloc, gc, sys, importlib, os
-import json
-
-to_remove = []
-for path in sys.path:
-    if "packages" in path:
-        to_remove.append(path)
-sys.path = [path for path in sys.path if path not in to_remove]
-
-dep_pkg = {dep_pkgs}
-for pkg in dep_pkg:
-    sys.path.insert(0, os.path.join("/packages", pkg))
-
-os.environ['OPENBLAS_NUM_THREADS'] = '2'
-
-try:
-    dep_mods = {dep_mods}
-    for mod in dep_mods:
-        importlib.import_module(mod) 
-    gc.collect()
-    tracemalloc.start()
-    mods = {mods}
-    for mod in mods:
-        importlib.import_module(mod)  
-    mb = (tracemalloc.get_traced_memory()[0] -  tracemalloc.get_tracemalloc_memory()) / 1024 / 1024
-    print(json.dumps({{'mb': mb}}))
-except Exception as e:
-    print(json.dumps({{'error': str(e)}}))
-"""
-
 install_failed = {}
 import_failed = {}
 
@@ -81,38 +30,14 @@ installed_packages = []
 installed_packages_lock = threading.Lock()
 MAX_DISK_SPACE = 5120 * 1024 * 1024  # 5GB
 
-packages_size = {}
-packages_lock = threading.Lock()
-
 top_mods = {}
 top_mods_lock = threading.Lock()
-
-
-def fetch_package_size(pkg_name, version):
-    if "github.com" in pkg_name:
-        return 0  # cannot estimate self-defined package's size from pypi
-    with packages_lock:
-        if packages_size.get(pkg_name) is not None and packages_size.get(pkg_name).get(version) is not None:
-            return pkg_name, version, packages_size[pkg_name][version]
-
-    size, type = compressed_size(pkg_name, version)
-    if size is None:
-        print(f"cannot find size for {pkg_name} {version} in pypi")
-        return None
-    if type == "whl":
-        uncomp_size = size * 7
-    elif type == "tar.gz":
-        uncomp_size = size * 3
-
-    with packages_lock:
-        if pkg_name not in packages_size:
-            packages_size[pkg_name] = {}
-        packages_size[pkg_name][version] = uncomp_size
-    return uncomp_size, size
+# {name: {version: import tree}}, saved to import_tree.json next to install_import.json
+import_trees = {}
 
 
 def get_suffix(name, version):
-    files = find_compressed_files("/tmp/.cache/", f"{normalize_pkg(name)}-{version}*")
+    files = wheel_cache.find(name, version)
     if files:
         return os.path.splitext(files[0])[1]
     else:
@@ -121,40 +46,88 @@ def get_suffix(name, version):
 def get_top_modules(path):
     return [name for _, name, _ in pkgutil.iter_modules([path])]
 
-# it can match most of the compressed file, but not all.
-# e.g. zope-event==5.0's compressed file is zope.event-5.0...('-' is replaced by '.')
-# simply ignore this case, as this func is used to save time, not for accuracy
+# names are compared normalized (PEP 503), e.g. zope-event==5.0's compressed file is zope.event-5.0.tar.gz
 def downloaded_packages(name, version):
-    files = find_compressed_files("/tmp/.cache/", f"{normalize_pkg(name)}-{version}*")
-    return len(files) > 0
+    return wheel_cache.contains(name, version)
 
-def install_package(pkg, install_dir):
-    with installed_packages_lock:
-        if pkg in installed_packages:
-            return
-    name = pkg.split("==")[0]
-    version = pkg.split("==")[1]
+def download_package(pkg):
+    name, version = registry.split(pkg)
     try:
-        install_dir = os.path.join(install_dir, pkg)
-        # download, then install. by doing this, we could eliminate the time of downloading affected by network
-        t0 = time.time()
         if not downloaded_packages(name, version):
             print(f"downloading {pkg}")
             subprocess.check_output(
                 ['pip3', 'download', '--no-deps', pkg, '--dest', '/tmp/.cache'],
                 stderr=subprocess.STDOUT
             )
-        comp_file = find_compressed_files("/tmp/.cache/", f"{normalize_pkg(name)}-{version}*")[0]
+            wheel_cache.refresh(force=True)
+    except Exception as e:
+        install_failed[pkg] = str(e)
+        print(f"Error downloading {pkg}: {e}")
+
+
+# cgroup v2 directory holding one child cgroup per install worker, only usable when /sys/fs/cgroup is writable
+# (e.g. `docker run --privileged`), otherwise workers are only pinned with sched_setaffinity
+cgroup_root = "/sys/fs/cgroup/reqbench"
+
+
+# return the cgroup path of the worker, or None if cgroups cannot be used here
+def make_cgroup(worker, cpus):
+    path = os.path.join(cgroup_root, f"install-{worker}")
+    try:
+        for parent in [os.path.dirname(cgroup_root), cgroup_root]:
+            os.makedirs(parent, exist_ok=True)
+            with open(os.path.join(parent, "cgroup.subtree_control"), "w") as f:
+                f.write("+cpuset")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "cpuset.cpus"), "w") as f:
+            f.write(",".join(str(cpu) for cpu in cpus))
+        return path
+    except OSError as e:
+        print(f"cannot create cgroup for install worker {worker}, only pin it to cpus {cpus}: {e}")
+        return None
+
+
+# run cmd on the worker's cpus (and in its cgroup), pip's own child processes inherit both.
+# the placement is done in the child before it execs, so pip never runs unpinned, only os calls are made there
+def run_pinned(cmd, cpus, cgroup):
+    procs_path = None if cgroup is None else os.path.join(cgroup, "cgroup.procs")
+
+    def place():
+        if procs_path is not None:
+            fd = os.open(procs_path, os.O_WRONLY)
+            try:
+                os.write(fd, b"0")  # 0 is the writing process
+            finally:
+                os.close(fd)
+        os.sched_setaffinity(0, cpus)
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, preexec_fn=place)
+    stdout, _ = process.communicate()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout)
+    return stdout
+
+
+def install_package(pkg, install_dir, worker=0, cpus=None, cgroup=None):
+    with installed_packages_lock:
+        if pkg in installed_packages or pkg in install_failed:
+            return
+    name, version = registry.split(pkg)
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0))
+    try:
+        install_dir = os.path.join(install_dir, pkg)
+        # download, then install. by doing this, we could eliminate the time of downloading affected by network
+        download_package(pkg)
+        comp_file = wheel_cache.find(name, version)[0]
         comp_size = os.path.getsize(comp_file)
         # comp_size = 0
         t1 = time.time()
-        subprocess.check_output(
-            ['pip3', 'install', '--no-deps', pkg, '--cache-dir', '/tmp/.cache', '-t', install_dir],
-            stderr=subprocess.STDOUT
-        )
+        run_pinned(['pip3', 'install', '--no-deps', pkg, '--cache-dir', '/tmp/.cache', '-t', install_dir],
+                   cpus, cgroup)
         t2 = time.time()
 
-        pkg_disk_size = get_folder_size(install_dir)
+        pkg_size = folder_size(install_dir)
         with top_mods_lock:
             if name not in top_mods:
                 top_mods[name] = {}
@@ -162,8 +135,16 @@ def install_package(pkg, install_dir):
                 top_mods[name][version] = {}
 
             top_mods[name][version]["install_time"] = (t2 - t1)*1000
+            # which worker installed it, and on which cpus, so install_time can be audited
+            top_mods[name][version]["install_worker"] = worker
+            top_mods[name][version]["install_cpus"] = list(cpus)
             top_mods[name][version]["compressed_size"] = comp_size
-            top_mods[name][version]["disk_size"] = pkg_disk_size
+            top_mods[name][version]["disk_size"] = pkg_size.size
+            # allocated blocks, file count and {kind: [files, bytes]} of .so/.py/.pyc/other files,
+            # for modeling page cache and cold start I/O
+            top_mods[name][version]["disk_allocated"] = pkg_size.allocated
+            top_mods[name][version]["files"] = pkg_size.files
+            top_mods[name][version]["file_kinds"] = pkg_size.kinds
             top_mods[name][version]["top"] = get_top_modules(install_dir)
             top_mods[name][version]["suffix"] = get_suffix(name, version)
         with installed_packages_lock:
@@ -175,34 +156,68 @@ def install_package(pkg, install_dir):
         print(f"Error installing {pkg}: {e}")
 
 
-def get_folder_size(folder):
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(folder):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if not os.path.islink(fp):
-                total_size += os.path.getsize(fp)
-    return total_size
-
-
-def parse_output(metric, stdout, stderr):
-    if stderr:
-        print("Error:", stderr.decode())
-        return None, stderr.decode()
-    else:
-        result = json.loads(stdout.decode())
-        if 'error' in result:
-            return None, result['error']
-        else:
-            return result[metric], None
+# every pkg followed by its most frequent dependency set, each pkg==version only once
+def install_order(pkgs_and_deps):
+    order = {}
+    for pkg in pkgs_and_deps:
+        order[pkg] = None
+        for dep in get_most_freq_deps(pkgs_and_deps[pkg]).split(","):
+            order[dep] = None
+    return list(order)
+
+
+# bytes pkg takes in install_dir, measured once it was installed, estimated from the downloaded file before
+def estimate_disk_size(pkg):
+    name, version = registry.split(pkg)
+    disk_size = top_mods.get(name, {}).get(version, {}).get("disk_size")
+    if disk_size is not None:
+        return disk_size
+    files = wheel_cache.find(name, version)
+    if not files:
+        return 0
+    ratio = UNCOMPRESSED_RATIO["whl"] if files[0].endswith(".whl") else UNCOMPRESSED_RATIO["tar.gz"]
+    return os.path.getsize(files[0]) * ratio
+
+
+def download_all(pkgs, download_threads=DOWNLOAD_THREADS):
+    with ThreadPoolExecutor(max_workers=download_threads) as executor:
+        list(executor.map(download_package, pkgs))
+    print(f"downloaded {len(pkgs)} packages")
+
+
+# install on `workers` workers, each pinned to its own cpu set (download_all first).
+# a worker installs one package at a time, so install_time of different packages never shares a cpu
+def install_all(pkgs, install_dir, workers=INSTALL_WORKERS):
+    cpu_sets = split_cpus(workers)
+    if len(cpu_sets) == 1:
+        for pkg in pkgs:
+            install_package(pkg, install_dir, 0, cpu_sets[0])
+        return
+
+    pending = queue.Queue()
+    for pkg in pkgs:
+        pending.put(pkg)
+
+    def work(worker, cpus):
+        cgroup = make_cgroup(worker, cpus)
+        while True:
+            try:
+                pkg = pending.get_nowait()
+            except queue.Empty:
+                return
+            install_package(pkg, install_dir, worker, cpus, cgroup)
+
+    print(f"installing on {len(cpu_sets)} workers, cpus: {cpu_sets}")
+    with ThreadPoolExecutor(max_workers=len(cpu_sets)) as executor:
+        list(executor.map(work, range(len(cpu_sets)), cpu_sets))
 
 
 def get_most_freq_deps(deps):
     return max(deps, key=deps.get)
 
 
-def measure_import(pkg, pkgs_and_deps):
-    pkg_name, version = pkg.split("==")[0], pkg.split("==")[1]
+def measure_import(pkg, pkgs_and_deps, harness) -> ImportMeasurement:
+    pkg_name, version = registry.split(pkg)
     mods = top_mods[pkg_name][version]["top"]
 
     most_freq_deps = get_most_freq_deps(pkgs_and_deps[pkg])
@@ -211,100 +226,120 @@ def measure_import(pkg, pkgs_and_deps):
     for dep in most_freq_deps:
         if dep == pkg:
             continue
-        deps_mods += top_mods[dep.split("==")[0]][dep.split("==")[1]]["top"]
-    # i-mb
-    measure_imb_script = measure_mb.format(dep_pkgs=json.dumps(most_freq_deps),
-                                          dep_mods="[]",
-                                          pkg=json.dumps(pkg_name + "==" + version),
-                                          mods=mods)
-    process = subprocess.Popen(['python3', '-c', measure_imb_script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    i_mem, err = parse_output('mb', stdout, stderr)
-    if i_mem is None:
-        i_mem = 0
-    # i-ms
-    measure_ms_script = measure_ms.format(dep_pkgs=json.dumps(most_freq_deps),
-                                          dep_mods="[]",
-                                          pkg=json.dumps(pkg_name + "==" + version),
-                                          mods=mods)
-    process = subprocess.Popen(['python3', '-c', measure_ms_script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    i_t, err = parse_output('ms', stdout, stderr)
-    if i_t is None:
-        i_t = 0
-
-    # mb
-    measure_mb_script = measure_mb.format(dep_pkgs=json.dumps(most_freq_deps),
-                                          dep_mods=json.dumps(deps_mods),
-                                          pkg=json.dumps(pkg_name + "==" + version),
-                                          mods=mods)
-    process = subprocess.Popen(['python3', '-c', measure_mb_script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    mem, err = parse_output('mb', stdout, stderr)
-    if mem is None:
-        mem = 0
-    # ms
-    measure_ms_script = measure_ms.format(dep_pkgs=json.dumps(most_freq_deps),
-                                          dep_mods=json.dumps(deps_mods),
-                                          pkg=json.dumps(pkg_name + "==" + version),
-                                          mods=mods)
-    process = subprocess.Popen(['python3', '-c', measure_ms_script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    t, err = parse_output('ms', stdout, stderr)
-    if t is None:
+        dep_name, dep_version = registry.split(dep)
+        deps_mods += top_mods[dep_name][dep_version]["top"]
+
+    # i-ms, i-mb: the pkg's modules alone; ms, mb: after its dependencies' modules are imported
+    measurement = harness.measure(most_freq_deps, deps_mods, mods)
+    if measurement.metrics["ms"]["n"] == 0:
         print("Error measuring time and memory for", pkg)
-        import_failed[pkg] = err
-        t = 0
+        import_failed[pkg] = measurement.errors.get("ms")
+    return measurement
 
-    return [i_t, t], [i_mem, mem]
+
+# measure pkg (installed, with its deps) and journal the result, False if it cannot be measured
+def measure_and_journal(pkg, pkgs_and_deps, harness, journal):
+    name, version = registry.split(pkg)
+    try:
+        measurement = measure_import(pkg, pkgs_and_deps, harness)
+    except KeyError as e:
+        # the pkg or one of its deps was not installed, try again next run
+        print(f"cannot measure {pkg}, {e} is not installed")
+        return False
+    with top_mods_lock:
+        # every metric is COST_STATISTIC of its samples, the samples and their statistics are kept in "stats",
+        # cost_stats.load_costs can pick another statistic later
+        # rss/pss/uss are reported next to the tracemalloc mb, they include native allocations
+        for metric in COST_METRICS + SMAPS_METRICS:
+            top_mods[name][version][metric] = max(measurement.value(metric, COST_STATISTIC), 0)
+        top_mods[name][version]["stats"] = measurement.stats(COST_STATISTIC)
+        entry = dict(top_mods[name][version])
+    journal.append(name, version, {"deps": get_most_freq_deps(pkgs_and_deps[pkg]), "entry": entry,
+                                   "tree": measurement.tree, "import_failed": import_failed.get(pkg)})
+    return True
+
+
+# the settings a journaled measurement depends on
+def measurement_config(harness):
+    return {"trials": harness.trials, "timeout": harness.timeout, "tree": harness.tree, "statistic": COST_STATISTIC}
 
 
 # install first, then measure the import top-level modules time/memory
 def main(pkgs_and_deps):
     install_dir = '/packages'
+    harness = ImportHarness()
+    # every measured pkg==version is journaled as soon as it is done, a rerun (after a crash, or with more
+    # packages) only installs and measures what is not in the journal yet (with the same deps and settings)
+    journal = Journal("/files/install_import.journal.jsonl", measurement_config(harness))
+    print(f"{journal.load()} packages already measured")
+
+    def journaled(pkg):
+        record = journal.get(*registry.split(pkg))
+        return record is not None and record["deps"] == get_most_freq_deps(pkgs_and_deps[pkg])
+    todo = {pkg: deps for pkg, deps in pkgs_and_deps.items() if not journaled(pkg)}
+
+    # install the packages and their most frequent dependencies, for the deps, only install, don't measure.
+    # installs only run concurrently on disjoint cpu sets, so the installing time stays accurate.
+    # to stay within MAX_DISK_SPACE, pkgs sharing deps are measured in the same batch, and before a batch is
+    # installed the dirs no later batch needs (then the least recently used ones) are removed
+    download_all(install_order(todo))
+    needs = {pkg: set(get_most_freq_deps(deps).split(",")) | {pkg} for pkg, deps in todo.items()}
+    batches = plan_batches(needs, estimate_disk_size, MAX_DISK_SPACE)
+    disk = DiskBudget(install_dir, MAX_DISK_SPACE)
+    remaining = Counter(d for _, dirs in batches for d in dirs)
+    print(f"measuring {len(todo)} packages in {len(batches)} batches")
 
-    # install packages one by one
-    # although concurrently install could be faster, the installing time won't be accurate
-    for pkg in pkgs_and_deps:
-        install_package(pkg, install_dir)
-        # also install the most frequent dependency
-        deps = get_most_freq_deps(pkgs_and_deps[pkg])
-        # for their deps, only install, don't measure
-        for dep in deps.split(","):
-            install_package(dep, install_dir)
-
-    # import top-level modules one by one
     cnt = 0
+    for batch, dirs in batches:
+        remaining.subtract(dirs)
+        later = {d for d, count in remaining.items() if count > 0}
+        with installed_packages_lock:
+            missing = [d for d in install_order({pkg: todo[pkg] for pkg in batch}) if d not in installed_packages]
+        # a dir left by a previous run may be partial and has no install_time, it is installed again
+        for d in missing:
+            if d in disk.installed:
+                disk.remove(d)
+        for pkg in disk.make_room(sum(estimate_disk_size(d) for d in missing), dirs, later):
+            with installed_packages_lock:
+                if pkg in installed_packages:
+                    installed_packages.remove(pkg)
+        install_all(missing, install_dir)
+        for d in missing:
+            if d in installed_packages:
+                disk.add(d, estimate_disk_size(d))
+        for d in dirs:
+            disk.touch(d)
+
+        # import top-level modules one by one, after the batch is installed, so nothing else is running
+        for pkg in batch:
+            if measure_and_journal(pkg, todo, harness, journal):
+                cnt += 1
+                if cnt % 10 == 0:
+                    print(f"imported {cnt} packages")
+    print(f"estimated peak disk usage of {install_dir}: {disk.peak_estimate / 1024 / 1024:.1f} MB "
+          f"(budget {MAX_DISK_SPACE / 1024 / 1024:.0f} MB), {disk.evictions} evictions")
+    harness.close()
+
+    # the output only holds the measured pkgs of this run, the pkgs only installed as dependencies are left out
+    records = journal.compact()
+    results = {}
     for pkg in pkgs_and_deps:
-        name, version = pkg.split("==")[0], pkg.split("==")[1]
-        ts, mems = measure_import(pkg, pkgs_and_deps)
-        cnt += 1
-        if cnt % 10 == 0:
-            print(f"imported {cnt} packages")
-        with top_mods_lock:
-            top_mods[name][version]["i-ms"] = ts[0]
-            top_mods[name][version]["i-mb"] = max(mems[0], 0)
-            top_mods[name][version]["ms"] = max(ts[1], 0)
-            top_mods[name][version]["mb"] = max(mems[1], 0)
-
-    # if a pkg==ver is not measured, delete them as they only serve as dependencies
-    keys_to_delete = set()
-    for name in top_mods:
-        versions_to_delete = set()
-        for version in top_mods[name]:
-            if "ms" not in top_mods[name][version]:
-                versions_to_delete.add(version)
-        for version in versions_to_delete:
-            del top_mods[name][version]
-        if len(top_mods[name]) == 0:
-            keys_to_delete.add(name)
-    for name in keys_to_delete:
-        del top_mods[name]
+        name, version = registry.split(pkg)
+        record = records.get(name, {}).get(version)
+        if record is None:
+            continue
+        results.setdefault(name, {})[version] = record["entry"]
+        if record["tree"] is not None:
+            import_trees.setdefault(name, {})[version] = record["tree"]
+        if record["import_failed"] is not None:
+            import_failed[pkg] = record["import_failed"]
 
     print(f"the number of install failed: {len(install_failed)}, names: {install_failed.keys()}")
     print(f"the number of import failed: {len(import_failed)}, names: {import_failed.keys()}")
     with open("/files/install_import.json", "w") as f:
-        json.dump(top_mods, f, indent=2)
+        json.dump(results, f, indent=2)
+    if len(import_trees) > 0:
+        save_trees(import_trees, "/files/import_tree.json")
     if len(install_failed) > 0:
         with open("/files/install_failed.json", "w") as f:
             json.dump(install_failed, f, indent=2)
@@ -0,0 +1,120 @@
+import heapq
+import os
+import shutil
+from collections import OrderedDict
+
+from folder_size import folder_sizes
+
+
+def plan_batches(needs, size, budget):
+    """
+    Order the packages to measure so that consecutive ones share installed dirs, and cut that order
+    into batches whose dirs fit in the disk budget.
+
+    Args:
+        needs: {pkg: set of pkg==version dirs that must be installed to measure pkg}, in the preferred order.
+        size: size(dir) -> estimated bytes on disk.
+        budget: max bytes of one batch, None for a single batch. a pkg that does not fit alone gets its own batch.
+
+    Returns:
+        [(pkgs to measure, set of dirs they need), ...]
+    """
+    if budget is None:
+        dirs = set()
+        for pkg_dirs in needs.values():
+            dirs |= pkg_dirs
+        return [(list(needs), dirs)] if needs else []
+
+    users = {}
+    for pkg, pkg_dirs in needs.items():
+        for d in pkg_dirs:
+            users.setdefault(d, []).append(pkg)
+
+    pending = dict.fromkeys(needs)
+    batches = []
+    counter = 0
+    while pending:
+        batch, dirs, used = [], set(), 0
+        shared = {}  # pending pkg -> how many of its dirs the batch already has
+        heap = []  # (-shared, counter, pkg), entries are stale once shared[pkg] grew
+        while pending:
+            pkg = None
+            while heap:
+                neg_shared, _, candidate = heapq.heappop(heap)
+                if candidate in pending and -neg_shared == shared[candidate]:
+                    pkg = candidate
+                    break
+            if pkg is None:
+                pkg = next(iter(pending))
+
+            extra = needs[pkg] - dirs
+            extra_size = sum(size(d) for d in extra)
+            if batch and used + extra_size > budget:
+                break
+            del pending[pkg]
+            batch.append(pkg)
+            dirs |= extra
+            used += extra_size
+            for d in extra:
+                for user in users[d]:
+                    if user in pending:
+                        shared[user] = shared.get(user, 0) + 1
+                        counter += 1
+                        heapq.heappush(heap, (-shared[user], counter, user))
+        batches.append((batch, dirs))
+    return batches
+
+
+class DiskBudget:
+    """
+    Keep the installed package dirs under install_dir within budget bytes (None: no limit).
+
+    The dirs already under install_dir (left by a previous or resumed run) are measured and counted from
+    the start. Dirs are kept in least recently used order. make_room() evicts the dirs no later batch needs
+    first, then the least recently used ones, never the dirs of the batch about to run. Sizes of dirs added
+    later are the caller's estimates, so peak_estimate is the highest estimated usage, not a measurement.
+    """
+
+    def __init__(self, install_dir, budget):
+        self.install_dir = install_dir
+        self.budget = budget
+        self.installed = OrderedDict()  # pkg dir -> bytes, least recently used first
+        self.used = 0
+        self.peak_estimate = 0
+        self.evictions = 0
+        if os.path.isdir(install_dir):
+            leftover = sorted(entry.name for entry in os.scandir(install_dir) if entry.is_dir(follow_symlinks=False))
+            sizes = folder_sizes([os.path.join(install_dir, pkg) for pkg in leftover])
+            for pkg in leftover:
+                self.add(pkg, sizes[os.path.join(install_dir, pkg)].size)
+
+    def add(self, pkg, size):
+        self.used += size - self.installed.get(pkg, 0)
+        self.installed[pkg] = size
+        self.installed.move_to_end(pkg)
+        self.peak_estimate = max(self.peak_estimate, self.used)
+
+    def touch(self, pkg):
+        if pkg in self.installed:
+            self.installed.move_to_end(pkg)
+
+    # delete the dir of pkg and stop counting it
+    def remove(self, pkg):
+        shutil.rmtree(os.path.join(self.install_dir, pkg), ignore_errors=True)
+        self.used -= self.installed.pop(pkg, 0)
+
+    # free room for `incoming` more bytes, keep: dirs that must stay, later: dirs later batches need.
+    # returns the evicted dirs
+    def make_room(self, incoming, keep, later):
+        if self.budget is None:
+            return []
+        candidates = [pkg for pkg in self.installed if pkg not in keep and pkg not in later]
+        candidates += [pkg for pkg in self.installed if pkg not in keep and pkg in later]
+        evicted = []
+        for pkg in candidates:
+            if self.used + incoming <= self.budget:
+                break
+            self.remove(pkg)
+            evicted.append(pkg)
+        self.evictions += len(evicted)
+        return evicted
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+
+
+# stable hash of the settings a measurement depends on, entries measured with other settings are not reused
+def config_hash(config):
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+class Journal:
+    """
+    An append-only JSONL checkpoint of finished measurements, one line per pkg==version:
+        {"name": ..., "version": ..., "config": config_hash(config), "record": {...}}
+
+    Every line is flushed and fsync'ed as soon as a measurement finishes, so a crash loses at most the
+    package being measured. load() cuts a torn last line off the file (so the next append starts on a
+    line of its own), keeps the last line of every pkg==version measured with the same
+    config, get() returns it, and compact() rewrites the
+    file with only those lines and returns them as {name: {version: record}}.
+    """
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config_hash(config)
+        self.records = {}  # (name, version) -> record
+        self.lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        self._truncate_torn_line()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"skip a corrupt line in {self.path}")
+                    continue
+                if entry.get("config") == self.config:
+                    self.records[(entry["name"], entry["version"])] = entry["record"]
+        return len(self.records)
+
+    # every complete line ends with a newline, anything after the last one is the line being written
+    # when the previous run died
+    def _truncate_torn_line(self):
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(end - 4096, 0)
+                f.seek(start)
+                i = f.read(end - start).rfind(b"\n")
+                if i >= 0:
+                    end = start + i + 1
+                    break
+                end = start
+            if end < size:
+                f.truncate(end)
+
+    def get(self, name, version):
+        with self.lock:
+            return self.records.get((name, version))
+
+    def append(self, name, version, record):
+        line = json.dumps({"name": name, "version": version, "config": self.config, "record": record})
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.records[(name, version)] = record
+
+    # {name: {version: record}}, and the journal file keeps only these records
+    def compact(self):
+        with self.lock:
+            records = {}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                for (name, version), record in self.records.items():
+                    records.setdefault(name, {})[version] = record
+                    f.write(json.dumps({"name": name, "version": version, "config": self.config,
+                                        "record": record}) + "\n")
+            os.replace(tmp_path, self.path)
+        return records
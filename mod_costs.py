@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
+import inspect
 import json
+import queue
 import sys, os
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 
 import requests
 
+from cost_stats import adaptive_samples, check_statistic, cost_record, summarize
+from import_tree import ImportTreeFinder, build_tree, save_trees
+from journal import Journal
+from ol_stub import start_stub
 from version import Package
 from workload import Meta, load_all_deps
+from pkg_registry import registry
+from req_parser import cached_parse
 from util import *
 from config import *
 
+# put in front of every measuring lambda: pins the sandbox to the cpus the invocation was given, before importing
+pin_code = """
+import os
+
+def pin(event):
+    if isinstance(event, dict) and event.get("cpus"):
+        try:
+            os.sched_setaffinity(0, event["cpus"])
+        except OSError:
+            pass
+"""
+
 # use not import but importlib to import modules to avoid syntax error
 measure_ms = """
 import time, sys, importlib, os
@@ -18,6 +39,7 @@ import time, sys, importlib, os
 os.environ['OPENBLAS_NUM_THREADS'] = '2'
 
 def f(event):
+    pin(event)
     try:
         dep_mods = {dep_mods}
         for mod in dep_mods:
@@ -41,6 +63,7 @@ import os
 os.environ['OPENBLAS_NUM_THREADS'] = '2'
 
 def f(event):
+    pin(event)
     try:
         dep_mods = {dep_mods}
         for mod in dep_mods:
@@ -56,14 +79,111 @@ def f(event):
         return -1
 """
 
+# read_smaps_rollup's source is put in front of it, f returns the growth of rss/pss/uss in MB
+measure_smaps = """
+import gc, sys, importlib, os
+os.environ['OPENBLAS_NUM_THREADS'] = '2'
+
+def f(event):
+    pin(event)
+    try:
+        dep_mods = {dep_mods}
+        for mod in dep_mods:
+            importlib.import_module(mod)
+        gc.collect()
+        before = read_smaps_rollup()
+        mods = {mods}
+        for mod in mods:
+            importlib.import_module(mod)
+        after = read_smaps_rollup()
+        if not before or not after:
+            return -1
+        return {{key: (after[key] - before[key]) / 1024 for key in after}}
+    except Exception as e:
+        return -1
+"""
+
+# ImportTreeFinder's source is put in front of it, f returns its records or None if importing failed
+measure_tree = """
+import gc, importlib, os
+os.environ['OPENBLAS_NUM_THREADS'] = '2'
+
+def f(event):
+    pin(event)
+    finder = ImportTreeFinder()
+    finder.install()
+    try:
+        if {trace_mem}:
+            gc.collect()
+            tracemalloc.start()
+        mods = {mods}
+        for mod in mods:
+            importlib.import_module(mod)
+    except Exception as e:
+        return None
+    return finder.records
+"""
+
+
+registry_dir = os.path.join(ol_dir, "default-ol", "registry")
+# the lambdas measuring registers: <stat>-, i_<stat>- (gen_measure_code) and tree_<stat>- (tree_code),
+# and measure- of older runs
+measure_lambdas = r'^(measure-|(i_|tree_)?(ms|mb|smaps)-)'
+
+# one keep-alive connection per concurrent invocation
+session = requests.Session()
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MEASURE_CONCURRENCY))
+
 
 def post(path, data):
-    return requests.post('http://localhost:5000/' + path, json.dumps(data))
+    return session.post(ol_url + path, json.dumps(data))
 
 
-def measure(meta=None, stat='mb OR ms', include_indirect=False):
-    if meta is None:
-        meta = Meta()
+# the cpu sets (None: not pinned) of the invocations running at the same time, an invocation takes one
+# and puts it back when it returns, so at most `concurrency` invocations run and never share a cpu
+def make_cpu_slots(concurrency, pin):
+    slots = queue.Queue()
+    for cpus in split_cpus(concurrency) if pin else [None] * concurrency:
+        slots.put(cpus)
+    return slots
+
+
+cpu_slots = make_cpu_slots(MEASURE_CONCURRENCY, MEASURE_PIN_CPUS)
+deployed = set()  # lambdas registered by this run
+
+
+# register a lambda running code with meta's requirements
+def deploy_lambda(name, code, meta):
+    path = os.path.join(registry_dir, name)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "f.py"), "w") as f:
+        f.write(code)
+    with open(os.path.join(path, "requirements.in"), "w") as f:
+        f.write(meta.requirements_in)
+    with open(os.path.join(path, "requirements.txt"), "w") as f:
+        f.write(meta.requirements_txt)
+    deployed.add(name)
+
+
+def invoke_lambda(name):
+    cpus = cpu_slots.get()
+    try:
+        r = post("run/" + name, {"cpus": cpus} if cpus else None)
+    finally:
+        cpu_slots.put(cpus)
+    r.raise_for_status()
+    return r
+
+
+# register the lambda (unless deploy_measurements already did) and invoke it once
+def run_lambda(name, code, meta):
+    if name not in deployed:
+        deploy_lambda(name, code, meta)
+    return invoke_lambda(name)
+
+
+# the lambda name and code measuring stat of meta's pkg, None if it has no modules to import
+def measure_code(meta, stat, include_indirect=False):
     mods = meta.direct_import_mods
     dep_mods = meta.import_mods - meta.direct_import_mods
     pkg_name = list(meta.direct_pkg_with_version.keys())[0]
@@ -73,68 +193,225 @@ def measure(meta=None, stat='mb OR ms', include_indirect=False):
     dep_pkgs = set(meta.pkg_with_version.keys()) - set(meta.direct_pkg_with_version.keys())
 
     if len(mods) == 0:
-        return 0  # no imports means no cost
+        return None
 
     if not include_indirect:
         dep_mods = json.dumps(list(dep_mods))
     else:
-        dep_mods = ""
+        dep_mods = "[]"
     mods = json.dumps(list(mods))
 
     code = {
         'ms': measure_ms,
         'mb': measure_mb,
+        'smaps': measure_smaps,
     }[stat]
 
     dep_pkgs.add(pkg_with_version)
     code = code.format(dep_pkgs=",".join(dep_pkgs),
                        dep_mods=dep_mods,
                        pkg=pkg_name, mods=mods)
+    if stat == "smaps":
+        code = inspect.getsource(read_smaps_rollup) + code
+    code = pin_code + code
 
     if include_indirect:
         name = "i_" + stat + "-" + pkg_with_version
     else:
         name = stat + "-" + pkg_with_version
-    path = os.path.join(ol_dir, "default-ol", "registry", name)
-    if not os.path.exists(path):
-        os.mkdir(path)
-    with open(os.path.join(path, "f.py"), "w") as f:
-        f.write(code)
-    with open(os.path.join(path, "requirements.in"), "w") as f:
-        f.write(meta.requirements_in)
-    with open(os.path.join(path, "requirements.txt"), "w") as f:
-        f.write(meta.requirements_txt)
+    return name, code
 
-    target = "run/" + name
-    r = post(target, None)
-    r.raise_for_status()
-    return max(float(r.text), 0)
 
+# returns cost_stats.summarize of the samples, every sample runs in a newly registered lambda,
+# as a warm sandbox would already have the modules imported.
+# stat "smaps" returns {"rss", "pss", "uss": summarize(...)}, sampling stops when uss is stable
+def measure(meta=None, stat='mb OR ms OR smaps', include_indirect=False):
+    if meta is None:
+        meta = Meta()
+    named_code = measure_code(meta, stat, include_indirect)
+    if named_code is None:
+        if stat == "smaps":
+            return {key: summarize([0.0]) for key in ["rss", "pss", "uss"]}
+        return summarize([0.0])  # no imports means no cost
+    name, code = named_code
+
+    trial = [0]
+    values = []
+
+    def take_sample():
+        trial[0] += 1
+        r = run_lambda(f"{name}-{trial[0]}", code, meta)
+        if stat == "smaps":
+            value = r.json()
+            if value == -1:
+                return None
+            values.append(value)
+            return value["uss"]
+        value = float(r.text)
+        return None if value < 0 else value  # f returns -1 if importing failed
+
+    samples = adaptive_samples(take_sample, IMPORT_WARMUP, IMPORT_MIN_TRIALS, IMPORT_MAX_TRIALS,
+                               IMPORT_REL_CI, IMPORT_ABS_CI[stat])
+    if stat == "smaps":
+        values = values[IMPORT_WARMUP:]
+        return {key: summarize([value[key] for value in values], IMPORT_WARMUP) for key in ["rss", "pss", "uss"]}
+    return summarize(samples, IMPORT_WARMUP)
+
+
+def tree_code(meta, stat):
+    return ("import sys, time, tracemalloc\n" + inspect.getsource(ImportTreeFinder) + pin_code +
+            measure_tree.format(trace_mem=stat == "mb", mods=json.dumps(list(meta.direct_import_mods))))
+
+
+# the import tree (import_tree.build_tree) of meta's direct modules, none of the indirect ones imported before,
+# from one lambda recording time and one recording memory. None if importing failed
+def measure_import_tree(meta):
+    mods = meta.direct_import_mods
+    if len(mods) == 0:
+        return []
+    pkg_name = list(meta.direct_pkg_with_version.keys())[0]
+    pkg_with_version = pkg_name + "_" + meta.direct_pkg_with_version[pkg_name][1]
 
-# costs are saved in packages.json
-def find_mod_costs(deps_dict):
+    records = {}
+    for stat in ["ms", "mb"]:
+        records[stat] = run_lambda(f"tree_{stat}-{pkg_with_version}", tree_code(meta, stat), meta).json()
+        if records[stat] is None:
+            return None
+    return build_tree(records["ms"], records["mb"])
+
+
+# the lambdas of every sample up to warmup + min trials, and of the import trees, are registered before
+# anything is invoked. the extra trials of slowly converging measurements are registered when needed
+def deploy_measurements(meta):
+    count = 0
+    for stat in ["ms", "mb", "smaps"]:
+        for include_indirect in [True, False]:
+            named_code = measure_code(meta, stat, include_indirect)
+            if named_code is None:
+                continue
+            name, code = named_code
+            for trial in range(1, IMPORT_WARMUP + IMPORT_MIN_TRIALS + 1):
+                deploy_lambda(f"{name}-{trial}", code, meta)
+                count += 1
+    if IMPORT_TREE and len(meta.direct_import_mods) > 0:
+        pkg_name = list(meta.direct_pkg_with_version.keys())[0]
+        pkg_with_version = pkg_name + "_" + meta.direct_pkg_with_version[pkg_name][1]
+        for stat in ["ms", "mb"]:
+            deploy_lambda(f"tree_{stat}-{pkg_with_version}", tree_code(meta, stat), meta)
+            count += 1
+    return count
+
+
+# every cost of one pkg==version: (cost, import tree or None)
+def measure_costs(meta):
+    stats = {
+        "i-ms": measure(meta, "ms", True),
+        "i-mb": measure(meta, "mb", True),
+        "ms": measure(meta, "ms"),
+        "mb": measure(meta, "mb"),
+    }
+    # tracemalloc misses native allocations and mapped .so files, smaps_rollup does not
+    for key, key_stats in measure(meta, "smaps", True).items():
+        stats["i-" + key] = key_stats
+    for key, key_stats in measure(meta, "smaps").items():
+        stats[key] = key_stats
+    # same layout as install_import.json, cost_stats.load_costs can pick another statistic later
+    statistic = check_statistic(COST_STATISTIC)
+    cost = {metric: metric_stats.get(statistic, 0) for metric, metric_stats in stats.items()}
+    cost["stats"] = cost_record(stats, COST_STATISTIC)
+    tree = measure_import_tree(meta) if IMPORT_TREE else None
+    return cost, tree
+
+
+# costs are saved in packages.json.
+# stub: the lambdas are served by ol_stub (with packages_dir's installs) instead of an OpenLambda worker
+def find_mod_costs(deps_dict, stub=False, packages_dir=None):
     metas = gen_meta_each_pkg(deps_dict)
     # step 2: try importing each discovered pkg, measuring import
     # latency and mem usage, beyond that of the deps
     print("measuring import costs")
-    remove_dirs_with_pattern(os.path.join(ol_dir, "default-ol/registry"), r'^measure-*')
-    pid = start_worker({"limits.mem_mb": 600, "import_cache_tree": ""})
+    os.makedirs(registry_dir, exist_ok=True)
+    remove_dirs_with_pattern(registry_dir, measure_lambdas)
+    worker_config = {"limits.mem_mb": 600, "import_cache_tree": ""}
+    if stub:
+        server = start_stub(registry_dir, int(ol_url.rstrip("/").rsplit(":", 1)[1]), packages_dir, IMPORT_TIMEOUT)
+    else:
+        pid = start_worker(worker_config)
+    try:
+        measure_all(metas, worker_config)
+    finally:
+        if stub:
+            server.shutdown()
+        else:
+            kill_worker(pid)
+        # every sample ran in a lambda of its own
+        remove_dirs_with_pattern(registry_dir, measure_lambdas)
+
+
+# measure every package of metas that is not journaled yet, with the worker (or stub) already running.
+# a package whose measurement fails is journaled with its "error" and measured again by the next run
+def measure_all(metas, worker_config):
+    trees = {}  # {name: {version: import tree}}
+    failed = {}  # {"name==version": error}
+    # every measured pkg==version is journaled as soon as it is done, a rerun only measures what is
+    # not in the journal yet (with the same requirements and settings)
+    journal = Journal(os.path.join(bench_file_dir, "costs.journal.jsonl"),
+                      {"worker": worker_config, "statistic": COST_STATISTIC, "tree": IMPORT_TREE,
+                       "trials": [IMPORT_WARMUP, IMPORT_MIN_TRIALS, IMPORT_MAX_TRIALS, IMPORT_REL_CI, IMPORT_ABS_CI]})
+    print(f"{journal.load()} packages already measured")
+    todo = []  # (name, version, meta)
     for p in Package.packages_factory:
         pkg = Package.get_from_factory(p)
         for v in pkg.available_versions:
-            if not p+"=="+v in metas:
+            pkg_id = registry.intern(p, v)
+            if pkg_id not in metas:
+                continue
+            meta = deepcopy(metas[pkg_id])
+
+            record = journal.get(p, v)
+            if record is not None and record["requirements"] == meta.requirements_txt \
+                    and record.get("error") is None:
+                pkg.available_versions[v].cost = record["cost"]
+                if record["tree"] is not None:
+                    trees.setdefault(p, {})[v] = record["tree"]
+                continue
+            todo.append((p, v, meta))
+
+    print(f"registered {sum(deploy_measurements(meta) for _, _, meta in todo)} lambdas for {len(todo)} packages")
+
+    # packages are measured concurrently, every invocation in a sandbox of its own and (MEASURE_PIN_CPUS)
+    # on its own cpus, at most MEASURE_CONCURRENCY invocations at a time
+    def measure_and_journal(p, v, meta):
+        try:
+            cost, tree = measure_costs(meta)
+        except Exception as e:
+            journal.append(p, v, {"requirements": meta.requirements_txt, "cost": None, "tree": None,
+                                  "error": f"{type(e).__name__}: {e}"})
+            raise
+        journal.append(p, v, {"requirements": meta.requirements_txt, "cost": cost, "tree": tree})
+        return cost, tree
+
+    with ThreadPoolExecutor(max_workers=MEASURE_CONCURRENCY) as executor:
+        futures = {executor.submit(measure_and_journal, p, v, meta): (p, v) for p, v, meta in todo}
+        for i, future in enumerate(as_completed(futures)):
+            p, v = futures[future]
+            try:
+                cost, tree = future.result()
+            except Exception as e:
+                print(f"failed to measure {p}=={v}: {e}")
+                failed[f"{p}=={v}"] = str(e)
                 continue
-            meta = deepcopy(metas[p+"=="+v])
-
-            pkg_versions = pkg.available_versions
-            pkg_versions[v].cost = {
-                "i-ms": measure(meta, "ms", True),
-                "i-mb": measure(meta, "mb", True),
-                "ms": measure(meta, "ms"),
-                "mb": measure(meta, "mb"),
-            }
+            Package.get_from_factory(p).available_versions[v].cost = cost
+            if tree is not None:
+                trees.setdefault(p, {})[v] = tree
+            if (i + 1) % 10 == 0:
+                print(f"measured {i + 1}/{len(todo)} packages")
+    journal.compact()
+    if len(failed) > 0:
+        print(f"the number of measure failed: {len(failed)}, names: {failed.keys()}")
     Package.save(os.path.join(bench_file_dir, "packages_tops_costs.json"))
-    kill_worker(pid)
+    if len(trees) > 0:
+        save_trees(trees, os.path.join(bench_file_dir, "costs_import_tree.json"))
 
 
 # create meta for each pkg from its dependency info which is collected from previous step pip-compile file,
@@ -147,16 +424,16 @@ def gen_meta_each_pkg(deps):
             # collect requirements.txt for each pkg
             req_set = next(iter(deps[pkg][version]))
             req_txt = ""
-            for req in req_set:
+            for req in sorted(req_set):
                 req_txt += req + "\n"
             dir_top_mods = Package.packages_factory[pkg].available_versions[version].top_level
-            indir_pkgs, _ = parse_requirements(req_txt)
+            indir_pkgs = cached_parse(req_txt).copy_requirements()
             indir_top_mods = []
             for indir_pkg in indir_pkgs:
                 indir_versions = indir_pkgs[indir_pkg][1]
                 indir_top_mods += Package.packages_factory[indir_pkg].available_versions[indir_versions].top_level
             meta = Meta({pkg: ["==", version]}, indir_pkgs, req_txt, req_txt, dir_top_mods, indir_top_mods)
-            metas[pkg + "==" + version] = meta
+            metas[registry.intern(pkg, version)] = meta
     return metas
 
 
@@ -175,11 +452,15 @@ def main():
     deps_dict = load_all_deps(os.path.join(bench_file_dir, "deps.json"))
     Package.from_json(os.path.join(bench_file_dir, "packages.json"))
 
-    if len(sys.argv) == 3:
-        deps_dict = load_all_deps(sys.argv[1])
-        Package.from_json(sys.argv[2])
+    # --stub [packages dir]: measure with ol_stub instead of an OpenLambda worker
+    stub = "--stub" in sys.argv
+    args = sys.argv[1:sys.argv.index("--stub")] if stub else sys.argv[1:]
+    packages_dir = sys.argv[sys.argv.index("--stub") + 1] if stub and sys.argv[-1] != "--stub" else None
+    if len(args) == 2:
+        deps_dict = load_all_deps(args[0])
+        Package.from_json(args[1])
 
-    find_mod_costs(deps_dict)
+    find_mod_costs(deps_dict, stub, packages_dir)
     json.dump(Package.cost_dict(), open(os.path.join(bench_file_dir, "costs.json"), "w"), indent=2)
 
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# a stand-in for the OpenLambda worker's /run/<name> endpoint, for trying mod_costs without OpenLambda:
+# every invocation runs f(event) of <registry>/<name>/f.py in a new python process (a new "sandbox"),
+# with the /packages/<pkg==version> dir of every line of the lambda's requirements.txt on sys.path
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# runs in the "sandbox": argv[1] is the lambda dir, argv[2] the event, the rest the package dirs
+run_code = """
+import json, sys
+sys.path[:0] = [sys.argv[1]] + sys.argv[3:]
+namespace = {"__name__": "f"}
+with open(sys.argv[1] + "/f.py") as f:
+    exec(compile(f.read(), sys.argv[1] + "/f.py", "exec"), namespace)
+print(json.dumps(namespace["f"](json.loads(sys.argv[2]))))
+"""
+
+
+def package_dirs(lambda_dir, packages_dir):
+    path = os.path.join(lambda_dir, "requirements.txt")
+    if packages_dir is None or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = [line.split("#")[0].strip() for line in f]
+    return [os.path.join(packages_dir, line) for line in lines if line]
+
+
+def make_handler(registry_dir, packages_dir, timeout):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "run":
+                return self.reply(404, "not found")
+            lambda_dir = os.path.join(registry_dir, parts[1])
+            if not os.path.exists(os.path.join(lambda_dir, "f.py")):
+                return self.reply(404, f"lambda {parts[1]} not found")
+            length = int(self.headers.get("Content-Length") or 0)
+            event = self.rfile.read(length).decode() if length else "null"
+            cmd = [sys.executable, "-c", run_code, lambda_dir, event] + package_dirs(lambda_dir, packages_dir)
+            try:
+                out = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return self.reply(500, "timeout")
+            lines = out.stdout.strip().splitlines()
+            if out.returncode != 0 or not lines:
+                # no output: the handler died before printing its result
+                return self.reply(500, out.stderr or "no output")
+            self.reply(200, lines[-1])
+
+        def reply(self, code, body):
+            body = body.encode()
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+# serve in a background thread, returns the server (server.shutdown() stops it)
+def start_stub(registry_dir, port=5000, packages_dir=None, timeout=300):
+    server = ThreadingHTTPServer(("localhost", port), make_handler(registry_dir, packages_dir, timeout))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="serve /run/<name> like an OpenLambda worker")
+    parser.add_argument("registry", help="dir holding one <name>/f.py dir per lambda")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--packages", default=None, help="dir holding one <pkg==version> install dir per package")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("localhost", args.port), make_handler(args.registry, args.packages, 300))
+    print(f"serving {args.registry} on port {args.port}")
+    server.serve_forever()
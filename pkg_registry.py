@@ -0,0 +1,70 @@
+import threading
+
+
+class PkgRegistry:
+    """
+    Interns every (name, version) pair seen by the toolchain as a small integer.
+
+    "name==version" strings are split once, after that workloads and dependency sets hold ids
+    (or frozensets of ids) and only turn back into strings when they are written to json.
+    A key without "==" (e.g. "direct_req" or a url requirement) is interned with version "".
+    """
+
+    def __init__(self):
+        self.ids = {}       # (name, version) -> id
+        self.key_ids = {}   # "name==version" -> id
+        self.names = []     # id -> name
+        self.versions = []  # id -> version
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name, version):
+        pkg_id = self.ids.get((name, version))
+        if pkg_id is not None:
+            return pkg_id
+        with self.lock:
+            pkg_id = self.ids.get((name, version))
+            if pkg_id is None:
+                pkg_id = len(self.names)
+                self.names.append(name)
+                self.versions.append(version)
+                self.ids[(name, version)] = pkg_id
+        return pkg_id
+
+    def intern_key(self, key):
+        pkg_id = self.key_ids.get(key)
+        if pkg_id is None:
+            name, _, version = key.partition("==")
+            pkg_id = self.intern(name, version)
+            self.key_ids[key] = pkg_id
+        return pkg_id
+
+    def name(self, pkg_id):
+        return self.names[pkg_id]
+
+    def version(self, pkg_id):
+        return self.versions[pkg_id]
+
+    def key(self, pkg_id):
+        version = self.versions[pkg_id]
+        if version == "":
+            return self.names[pkg_id]
+        return f"{self.names[pkg_id]}=={version}"
+
+    # "requests==2.31.0" -> ("requests", "2.31.0")
+    def split(self, key):
+        pkg_id = self.intern_key(key)
+        return self.names[pkg_id], self.versions[pkg_id]
+
+    # "a==1,b==2" (the deps.json / top_n_pkgs.json key format) -> frozenset of ids
+    def set_from_key(self, deps_str):
+        return frozenset(self.intern_key(key) for key in deps_str.split(","))
+
+    # frozenset of ids -> "a==1,b==2", sorted the same way the json files always have been
+    def set_key(self, pkg_ids):
+        return ",".join(sorted(self.key(pkg_id) for pkg_id in pkg_ids))
+
+
+registry = PkgRegistry()
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from typing import NamedTuple, Optional
+
+from config import *
+from pkg_registry import registry
+from pypi_client import pypi
+from util import compressed_size
+
+# estimated uncompressed/compressed ratio by distribution type
+# the extreme case of a wheel is about 10 times larger than the compressed size, 7 is a reasonable estimate
+UNCOMPRESSED_RATIO = {"whl": 7, "tar.gz": 10}
+
+
+# the type of a distribution from its file suffix as install_import records it (".whl", ".gz"),
+# in the vocabulary of util.compressed_size: "whl", "tar.gz", or the suffix without its dot
+def dist_type(suffix):
+    if suffix is None:
+        return None
+    suffix = suffix.lstrip(".").lower()
+    if suffix in ("gz", "tar.gz", "tgz"):
+        return "tar.gz"
+    return suffix
+
+
+class PackageSize(NamedTuple):
+    compressed_size: Optional[int]  # bytes of the wheel/sdist
+    disk_size: Optional[int]  # bytes on disk once installed, estimated from compressed_size unless measured
+    type: Optional[str]  # "whl" or "tar.gz" (dist_type), the keys of UNCOMPRESSED_RATIO
+    measured: bool  # True if disk_size comes from an actual install (install_import.json)
+
+
+class PackageSizes:
+    """
+    Size of every package version, from install_import.json when it was measured, otherwise from PyPI.
+
+    get() returns a PackageSize or None (self-defined packages, not on PyPI, or PyPI could not be reached).
+    Sizes and definitive misses are kept and persisted by save(), so a later run needs no network for them,
+    a package PyPI could not be asked about stays unknown and is fetched again next time.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.join(tmp_dir, "package_sizes.json") if path is None else path
+        self.sizes = {}  # {name: {version: PackageSize or None}}
+        self.lock = threading.Lock()
+
+    def _set(self, name, version, size):
+        with self.lock:
+            if name not in self.sizes:
+                self.sizes[name] = {}
+            self.sizes[name][version] = size
+
+    def cached(self, name, version):
+        with self.lock:
+            return self.sizes.get(name, {}).get(version)
+
+    def known(self, name, version):
+        with self.lock:
+            return version in self.sizes.get(name, {})
+
+    def get(self, name, version) -> Optional[PackageSize]:
+        if self.known(name, version):
+            return self.cached(name, version)
+        size = None
+        if "github.com" not in name:  # cannot estimate self-defined package's size from pypi
+            comp = compressed_size(name, version)
+            if comp is None and not pypi.release_answered(name, version):
+                print(f"cannot fetch size for {name} {version} from pypi now")
+                return None
+            if comp is None:
+                print(f"cannot find size for {name} {version} in pypi")
+            else:
+                comp_size, dist_type = comp
+                size = PackageSize(comp_size, comp_size * UNCOMPRESSED_RATIO[dist_type], dist_type, False)
+        self._set(name, version, size)
+        return size
+
+    # pkgs: ["name==version", ...], fetch what is not known yet with bounded concurrency
+    def fetch_all(self, pkgs):
+        tasks = [registry.split(pkg) for pkg in pkgs]
+        tasks = [(name, version) for name, version in tasks if not self.known(name, version)]
+        print("need to find", len(tasks), "in total")
+        return pypi.map(self.get, tasks)
+
+    # measured sizes always win over estimates
+    def preload_install_import(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            install_import = json.load(f)
+        cnt = 0
+        for name, versions in install_import.items():
+            for version, info in versions.items():
+                if "disk_size" not in info:
+                    continue
+                self._set(name, version, PackageSize(info.get("compressed_size"), info["disk_size"],
+                                                     dist_type(info.get("suffix")), True))
+                cnt += 1
+        return cnt
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            sizes = json.load(f)
+        for name, versions in sizes.items():
+            for version, size in versions.items():
+                if not self.known(name, version):
+                    self._set(name, version, None if size is None else PackageSize(**size))
+
+    def save(self):
+        with self.lock:
+            sizes = {name: {version: None if size is None else size._asdict() for version, size in versions.items()}
+                     for name, versions in self.sizes.items()}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(sizes, f, indent=2)
+
+    # {name: {version: disk_size}} of the packages whose size is known
+    def disk_sizes(self):
+        with self.lock:
+            return {name: {version: size.disk_size for version, size in versions.items() if size is not None}
+                    for name, versions in self.sizes.items()}
+
+
+package_sizes = PackageSizes()
@@ -0,0 +1,127 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import *
+
+PYPI_URL = "https://pypi.org/pypi"
+
+
+class PyPIClient:
+    """
+    Fetch PyPI json metadata through one pooled session, with retries and a persistent cache.
+
+    Every response (404s included) is stored in a sqlite file with its ETag. A cached url is served
+    without touching the network unless it is older than max_age seconds, then it is revalidated
+    with If-None-Match. base_url can point to a local stub server that serves /<name>/json and
+    /<name>/<version>/json.
+    """
+
+    def __init__(self, base_url=PYPI_URL, cache_path=None, max_workers=8, retries=3, backoff=0.5,
+                 timeout=30, max_age=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache_path = os.path.join(tmp_dir, "pypi_cache.sqlite3") if cache_path is None else cache_path
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_age = max_age
+
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.slots = threading.BoundedSemaphore(max_workers)
+
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    def _open_db(self):
+        if self.db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            self.db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS cache "
+                            "(url TEXT PRIMARY KEY, status INTEGER, etag TEXT, body TEXT, fetched_at REAL)")
+        return self.db
+
+    def _cached(self, url):
+        with self.db_lock:
+            return self._open_db().execute("SELECT status, etag, body, fetched_at FROM cache WHERE url = ?",
+                                           (url,)).fetchone()
+
+    def _store(self, url, status, etag, body):
+        with self.db_lock:
+            db = self._open_db()
+            db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", (url, status, etag, body, time.time()))
+            db.commit()
+
+    # return the decoded json, or None if the url does not answer 200 with valid json
+    def get_json(self, path):
+        url = f"{self.base_url}/{path}"
+        cached = self._cached(url)
+        headers = {}
+        if cached is not None:
+            status, etag, body, fetched_at = cached
+            if self.max_age is None or time.time() - fetched_at < self.max_age:
+                self.hits += 1
+                return json.loads(body) if status == 200 else None
+            if etag:
+                headers["If-None-Match"] = etag
+
+        with self.slots:
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"failed to fetch {url}: {e}")
+                # a stale answer is better than none, and keeps answered() true to what was returned
+                if cached is not None:
+                    return json.loads(cached[2]) if cached[0] == 200 else None
+                return None
+        self.fetches += 1
+
+        if response.status_code == 304 and cached is not None:
+            self._store(url, cached[0], cached[1], cached[2])
+            return json.loads(cached[2]) if cached[0] == 200 else None
+        if response.status_code != 200:
+            if response.status_code == 404:
+                self._store(url, 404, None, None)
+            return None
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            print("Invalid JSON received.")
+            print(url)
+            return None
+        self._store(url, 200, response.headers.get("ETag"), response.text)
+        return data
+
+    # True if the url got a definitive answer (200, or 404: not on PyPI), False if it could not be fetched yet
+    def answered(self, path):
+        cached = self._cached(f"{self.base_url}/{path}")
+        return cached is not None and cached[0] in (200, 404)
+
+    def project(self, name):
+        return self.get_json(f"{name}/json")
+
+    def release(self, name, version):
+        return self.get_json(f"{name}/{version}/json")
+
+    def release_answered(self, name, version):
+        return self.answered(f"{name}/{version}/json")
+
+    # run func(*args) for every args in args_list on max_workers threads, results keep the input order
+    def map(self, func, args_list):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda args: func(*args), args_list))
+
+
+pypi = PyPIClient()
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import tmp_dir
+
+pattern = re.compile(
+    r'([^<>=!;]+)'              # pkg name or url
+    r'([<>!=]=?)?'              # version operator
+    r'([^<>=!;]+)?'             # version
+)
+
+end_string = "The following packages are considered to be unsafe in a requirements file"
+
+# event kinds yielded by iter_requirements
+REQ = 0     # (REQ, pkg, [operator, version])
+VIA = 1     # (VIA, pkg, dependent), dependent requires pkg ("direct_req" for -r requirements.in)
+UNSAFE = 2  # (UNSAFE, pkg, None), pkg is listed after the "unsafe" marker
+
+
+def iter_requirements(lines):
+    """
+    Walk a pip-compile generated requirements file line by line, in one pass.
+
+    Args:
+        lines: any iterable of lines, e.g. an open file, str.splitlines() or a csv cell split into lines.
+
+    Yields:
+        (kind, pkg, value) tuples, kind is one of REQ, VIA, UNSAFE.
+    """
+    current_package = None
+    first_comment = False
+    unsafe = False
+    for raw in lines:
+        line = raw.strip()
+        if unsafe:
+            # everything below the marker is "# pkg", pip-compile leaves them out of the pinned list
+            pkg = line.removeprefix("#").strip()
+            if pkg:
+                yield UNSAFE, pkg.split("[")[0], None
+            continue
+
+        # there could be a few comments followed <pkg>==<ver>, specifying who requires this pkg
+        if current_package is not None and line.startswith("#"):
+            if first_comment:
+                first_comment = False
+                dependency = line.removeprefix("# via").strip()  # get rid of the '# via', the rest is the package name
+            else:
+                dependency = line.removeprefix("#").strip()
+            if '-r' in dependency:  # Replace with shorthand
+                dependency = "direct_req"
+            if dependency:
+                yield VIA, current_package, dependency
+            continue
+        current_package = None
+
+        if end_string in line:
+            unsafe = True
+            continue
+        if raw.startswith('#'):
+            continue
+
+        match = pattern.match(line.split(';', 1)[0])
+        if match:
+            # todo: handle condition operator and value
+            package, operator, version = match.groups()
+            if version is None:
+                version = "-1"
+            if operator is None:
+                operator = "=="
+            current_package = package.strip().split("[")[0]
+            first_comment = True
+            yield REQ, current_package, [operator.strip(), version.strip()]
+
+
+class ParsedRequirements:
+    """
+    Compact result of parsing one requirements file.
+
+    requirements: {'numpy': ['==', '1.25.2'], 'scipy': ['==', '1.11.2'], ...}
+    via: {'numpy': ['direct_req', 'scipy'], ...}, via(A)=[B, C] means B,C depends on A
+    unsafe: ['setuptools', ...], packages pip-compile considers unsafe to pin
+    """
+    __slots__ = ("requirements", "via", "unsafe")
+
+    def __init__(self, requirements=None, via=None, unsafe=None):
+        self.requirements = {} if requirements is None else requirements
+        self.via = {} if via is None else via
+        self.unsafe = [] if unsafe is None else unsafe
+
+    # the same shape util.parse_requirements has always returned as its second value
+    def versioned_dependencies(self):
+        requirements = self.requirements
+        versioned = {}
+        for pkg, deps in self.via.items():
+            pkg_key = f"{pkg}=={requirements[pkg][1]}"
+            versioned_deps = [pkg_key]
+            for dep in deps:
+                if dep in requirements:
+                    versioned_deps.append(f"{dep}=={requirements[dep][1]}")
+                else:
+                    versioned_deps.append(dep)
+            versioned[pkg_key] = versioned_deps
+        return versioned
+
+    # a copy of requirements the caller may modify, the cached one is shared by every caller
+    def copy_requirements(self):
+        return {pkg: list(op_version) for pkg, op_version in self.requirements.items()}
+
+    # only the packages listed in requirements.in, pinned to the version pip-compile chose
+    def direct_requirements(self):
+        return {pkg: ['==', self.requirements[pkg][1]]
+                for pkg, deps in self.via.items() if "direct_req" in deps}
+
+
+def parse_lines(lines):
+    parsed = ParsedRequirements()
+    requirements, via, unsafe = parsed.requirements, parsed.via, parsed.unsafe
+    for kind, pkg, value in iter_requirements(lines):
+        if kind == REQ:
+            requirements[pkg] = value
+        elif kind == VIA:
+            if pkg in via:
+                via[pkg].append(value)
+            else:
+                via[pkg] = [value]
+        else:
+            unsafe.append(pkg)
+    return parsed
+
+
+def parse_text(text):
+    if text is None:
+        raise Exception("requirement.in or txt is None")
+    return parse_lines(text.splitlines())
+
+
+class ParseCache:
+    """
+    Content-addressed memo of parse_text, keyed by a hash of the requirements text.
+
+    Entries are shared between every caller that parses the same text, so treat the returned
+    ParsedRequirements (and the dicts/lists inside it) as read-only.
+    """
+
+    def __init__(self, maxsize=65536, path=None):
+        self.maxsize = maxsize
+        # optional on-disk store, only touched by load() and save()
+        self.path = os.path.join(tmp_dir, "parse_cache.pkl") if path is None else path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def get(self, text):
+        if text is None:
+            raise Exception("requirement.in or txt is None")
+        key = self.key(text)
+        with self.lock:
+            parsed = self.entries.get(key)
+            if parsed is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return parsed
+            self.misses += 1
+
+        parsed = parse_text(text)
+        with self.lock:
+            self.entries[key] = parsed
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return parsed
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            entries = pickle.load(f)
+        with self.lock:
+            for key, parsed in entries.items():
+                self.entries.setdefault(key, parsed)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            return len(self.entries)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock:
+            entries = dict(self.entries)
+        with open(self.path, "wb") as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+parse_cache = ParseCache()
+
+
+# parse through the process-wide cache, identical texts are parsed only once
+def cached_parse(text):
+    return parse_cache.get(text)
+
+
+# Usage: python3 req_parser.py <requirements.csv>
+# micro-benchmark: parse every compiled requirements.txt in the csv once
+if __name__ == '__main__':
+    from workload_stream import iter_compiled
+
+    if len(sys.argv) != 2:
+        print("Usage: python3 req_parser.py <requirements.csv>")
+        sys.exit()
+    t0 = time.time()
+    files, reqs, edges = 0, 0, 0
+    for txt in iter_compiled(sys.argv[1]):
+        parsed = parse_lines(txt.splitlines())
+        files += 1
+        reqs += len(parsed.requirements)
+        edges += sum(len(deps) for deps in parsed.via.values())
+    t1 = time.time()
+    print(f"parsed {files} files, {reqs} requirements, {edges} via edges in {t1 - t0:.3f}s "
+          f"({files / max(t1 - t0, 1e-9):.0f} files/s)")
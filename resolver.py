@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+from config import *
+from pkg_registry import registry
+
+compile_cache_dir = os.path.join(tmp_dir, "pip_compile")
+
+compiled_header = (
+    "#\n"
+    "# This file is autogenerated by pip-compile with Python 3.10\n"
+    "# by the following command:\n"
+    "#\n"
+    "#    pip-compile --output-file=- -\n"
+    "#\n"
+)
+
+
+def _cache_path(requirements_in, suffix):
+    digest = hashlib.blake2b(requirements_in.encode(), digest_size=16).hexdigest()
+    return os.path.join(compile_cache_dir, digest + suffix)
+
+
+def _write_atomic(path, content):
+    os.makedirs(compile_cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# stderr of pip-compile failures that come back on every retry, only these are cached as .failed.
+# network errors, index timeouts and interrupted runs are not, the next call tries again
+permanent_failures = [
+    "ResolutionImpossible",
+    "Could not find a version that matches",
+    "No matching distribution found",
+    "Invalid requirement",
+    "InvalidRequirement",
+]
+
+
+# a permanent failure needs pip to have answered, a failure with a connection error in it is never permanent
+def _permanent_failure(stderr):
+    if any(err in stderr for err in ["NewConnectionError", "ConnectTimeout", "ReadTimeout", "Max retries exceeded"]):
+        return False
+    return any(err in stderr for err in permanent_failures)
+
+
+# return None means we cannot generate requirements.txt from requirements_in
+# results (resolution failures included) are cached on disk by the hash of requirements_in
+def pip_compile(requirements_in, print_err=False, use_cache=True):
+    txt_path = _cache_path(requirements_in, ".txt")
+    failed_path = _cache_path(requirements_in, ".failed")
+    if use_cache:
+        if os.path.exists(txt_path):
+            with open(txt_path) as f:
+                return f.read()
+        if os.path.exists(failed_path):
+            return None
+
+    process = subprocess.Popen(
+        ["pip-compile", "--output-file=-", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    stdout, stderr = process.communicate(input=requirements_in)
+    if process.returncode != 0:
+        if print_err:
+            print("err requirements in: \n", requirements_in)
+            print("err in pip compile: \n", stderr)
+        if use_cache and process.returncode > 0 and _permanent_failure(stderr):
+            _write_atomic(failed_path, stderr)
+        return None
+    if use_cache:
+        _write_atomic(txt_path, stdout)
+    return stdout
+
+
+class LocalIndex:
+    """
+    Resolve requirements.in in-process from the dependency sets observed in deps.json.
+
+    deps: {name: {version: {frozenset of registry ids: count}}}, see from_json,
+    every set is the full install closure of name==version in one compiled requirements.txt.
+    Anything the index cannot answer exactly (urls, extras, markers, unknown packages, conflicts) is a miss.
+    """
+
+    def __init__(self, deps):
+        self.deps = deps
+        self.names = {canonicalize_name(name): name for name in deps}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # resolve_all resolves on many threads
+
+    @staticmethod
+    def from_json(path):
+        with open(path) as f:
+            deps = json.load(f)
+        return LocalIndex({name: {version: {registry.set_from_key(deps_str): count
+                                            for deps_str, count in dep_sets.items()}
+                                  for version, dep_sets in versions.items()}
+                           for name, versions in deps.items()})
+
+    # (count, version, dep_set) of name, most frequently observed first
+    def candidates(self, name, specifier):
+        candidates = []
+        for version, dep_sets in self.deps[name].items():
+            if specifier.contains(version, prereleases=True):
+                candidates += [(count, version, dep_set) for dep_set, count in dep_sets.items()]
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return candidates
+
+    def parse_in(self, requirements_in):
+        specifiers = {}
+        for line in requirements_in.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                req = Requirement(line)
+            except InvalidRequirement:
+                return None
+            name = self.names.get(canonicalize_name(req.name))
+            if req.url or req.extras or req.marker or name is None or name in specifiers:
+                return None
+            specifiers[name] = req.specifier
+        return specifiers
+
+    # return None on a miss, otherwise a pip-compile formatted requirements.txt
+    def resolve(self, requirements_in):
+        specifiers = self.parse_in(requirements_in)
+        if not specifiers:
+            self._count(False)
+            return None
+
+        direct = list(specifiers.items())
+        candidates = [self.candidates(name, specifier) for name, specifier in direct]
+        budget = [MAX_LOCAL_TRIES]
+
+        def compatible(dep_set, pins):
+            for dep_id in dep_set:
+                dep_name, dep_version = registry.name(dep_id), registry.version(dep_id)
+                if pins.get(dep_name, dep_version) != dep_version:
+                    return False
+                if dep_name in specifiers and not specifiers[dep_name].contains(dep_version, prereleases=True):
+                    return False
+            return True
+
+        # pick one observed closure per direct pkg, backtracking when a choice conflicts with a later one
+        def search(i, pins):
+            if i == len(direct):
+                return pins, {}
+            for _, version, dep_set in candidates[i]:
+                budget[0] -= 1
+                if budget[0] < 0:
+                    return None
+                if not compatible(dep_set, pins):
+                    continue
+                new_pins = dict(pins)
+                for dep_id in dep_set:
+                    new_pins[registry.name(dep_id)] = registry.version(dep_id)
+                found = search(i + 1, new_pins)
+                if found is not None:
+                    found[1][registry.intern(direct[i][0], version)] = dep_set
+                    return found
+            return None
+
+        found = search(0, {})
+        if found is None:
+            self._count(False)
+            return None
+        pins, closures = found  # {name: version}, {pkg_id: dep_set}
+
+        pinned = frozenset(registry.intern(name, version) for name, version in pins.items())
+        for pkg_id in pinned:
+            if pkg_id in closures:
+                continue
+            # the most frequent closure of an indirect pkg that fits in what is already pinned
+            name, version = registry.name(pkg_id), registry.version(pkg_id)
+            dep_sets = self.deps.get(name, {}).get(version, {})
+            fitting = [(count, dep_set) for dep_set, count in dep_sets.items() if dep_set <= pinned]
+            closures[pkg_id] = max(fitting, key=lambda c: c[0])[1] if fitting else frozenset([pkg_id])
+
+        self._count(True)
+        return self.format_txt(pins, closures, specifiers)
+
+    def _count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def format_txt(pins, closures, direct):
+        # via: P requires Y directly if nothing else in P's closure also requires Y
+        via = {pkg_id: [] for pkg_id in closures}
+        for parent, closure in closures.items():
+            for pkg_id in closure:
+                if pkg_id == parent:
+                    continue
+                if not any(q != parent and q != pkg_id and pkg_id in closures.get(q, ())
+                           for q in closure):
+                    via[pkg_id].append(registry.name(parent))
+
+        txt = compiled_header
+        for name in sorted(pins):
+            pkg_id = registry.intern(name, pins[name])
+            parents = (["-r -"] if name in direct else []) + sorted(via[pkg_id])
+            txt += f"{name}=={pins[name]}\n"
+            if len(parents) == 1:
+                txt += f"    # via {parents[0]}\n"
+            elif parents:
+                txt += "    # via\n" + "".join(f"    #   {parent}\n" for parent in parents)
+        return txt
+
+
+local_index = None
+# give up on the local index (and fall back to pip-compile) after this many candidate closures were tried
+MAX_LOCAL_TRIES = 10000
+
+
+# let resolve() answer from a LocalIndex before shelling out to pip-compile
+def use_local_index(index):
+    global local_index
+    local_index = index
+
+
+def resolve(requirements_in, print_err=False, use_cache=True):
+    if local_index is not None:
+        requirements_txt = local_index.resolve(requirements_in)
+        if requirements_txt is not None:
+            return requirements_txt
+    return pip_compile(requirements_in, print_err, use_cache)
+
+
+# resolve many requirements.in at once, at most `workers` pip-compile processes run at the same time.
+# identical inputs are resolved once, the results come back in the order of requirements_ins
+def resolve_all(requirements_ins, workers=COMPILE_THREADS, print_err=False, use_cache=True):
+    unique_ins = list(dict.fromkeys(requirements_ins))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        txts = executor.map(lambda req_in: resolve(req_in, print_err, use_cache), unique_ins)
+        compiled = dict(zip(unique_ins, txts))
+    return [compiled[req_in] for req_in in requirements_ins]
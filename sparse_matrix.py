@@ -0,0 +1,80 @@
+import zipfile
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class SparseMatrix:
+    """
+    A scipy CSR matrix with row/column labels, e.g. calls x "pkg==version".
+
+    save() writes an uncompressed .npz, so load(path, mmap=True) can memory-map the arrays
+    instead of reading them (np.load ignores mmap_mode for .npz archives).
+    """
+
+    def __init__(self, matrix, rows, cols):
+        self.matrix = sp.csr_matrix(matrix)
+        self.rows = np.asarray(rows, dtype=str)
+        self.cols = np.asarray(cols, dtype=str)
+        assert self.matrix.shape == (len(self.rows), len(self.cols))
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    # entries is an iterable of (row_idx, col_idx), repeated entries are kept as 1
+    @staticmethod
+    def from_entries(entries, rows, cols, dtype=np.int8):
+        entries = np.array(list(entries), dtype=np.int64).reshape(-1, 2)
+        matrix = sp.csr_matrix((np.ones(len(entries), dtype=dtype), (entries[:, 0], entries[:, 1])),
+                               shape=(len(rows), len(cols)))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return SparseMatrix(matrix, rows, cols)
+
+    def to_dense(self):
+        return pd.DataFrame(self.matrix.toarray(), index=self.rows, columns=self.cols)
+
+    def save(self, path):
+        m = self.matrix
+        np.savez(path, data=m.data, indices=m.indices, indptr=m.indptr,
+                 shape=np.array(m.shape), rows=self.rows, cols=self.cols)
+
+    @staticmethod
+    def load(path, mmap=False):
+        arrays = load_npz(path, mmap)
+        shape = tuple(int(x) for x in arrays["shape"])
+        matrix = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=shape, copy=False)
+        return SparseMatrix(matrix, arrays["rows"], arrays["cols"])
+
+
+# read every array of an uncompressed .npz, memory-mapped when mmap is set
+def load_npz(path, mmap=False):
+    if not mmap:
+        with np.load(path) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise Exception(f"{path} is compressed, cannot memory-map {info.filename}")
+            # local file header: 30 fixed bytes, then the file name and extra field
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename.removesuffix(".npy")
+            if dtype.hasobject:
+                raise Exception(f"cannot memory-map object array {name}")
+            if np.prod(shape) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                     order="F" if fortran_order else "C")
+    return arrays
@@ -46,6 +46,15 @@ func main() {
 		panic(err)
 	}
 
+	// optional: run open-loop at this many requests per second
+	targetRPS := 0.0
+	if len(os.Args) > 7 {
+		targetRPS, err = strconv.ParseFloat(os.Args[7], 64)
+		if err != nil {
+			panic(err)
+		}
+	}
+
 	opts := request.RunOptions{
 		PlatformType: PlatformType,
 		Workload:     &wl,
@@ -53,6 +62,7 @@ func main() {
 		Tasks:        tasks,
 		Timeout:      timeout,
 		TotalTime:    totalTime,
+		TargetRPS:    targetRPS,
 		StartOptions: nil,
 		KillOptions:  nil,
 	}
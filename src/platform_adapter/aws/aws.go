@@ -50,6 +50,7 @@ def handler(event, context):
 
 	DOCKERFILE = `FROM python:3.10 as build-image
 	COPY install_all.py /install_all.py
+	COPY wheel_cache.py /wheel_cache.py
 	COPY pkg_list.txt /pkg_list.txt
 	RUN python3 /install_all.py /pkg_list.txt
 	RUN pip install awslambdaric
@@ -241,6 +242,11 @@ func (a *AWSPlatform) buildImage() error {
 		fmt.Println("here")
 		return err
 	}
+	// install_all.py imports it
+	err = exec.Command("cp", "/root/ReqBench/wheel_cache.py", a.tmpPath+"/wheel_cache.py").Run()
+	if err != nil {
+		return err
+	}
 
 	//write Dockerfile
 	writeFile(a.tmpPath+"/Dockerfile", DOCKERFILE)
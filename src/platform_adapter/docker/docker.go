@@ -52,6 +52,7 @@ RUN apt-get update && apt-get install -y python3 python3-pip
 
 COPY pkg_list.txt /pkg_list.txt
 COPY install_all.py /install_all.py
+COPY wheel_cache.py /wheel_cache.py
 RUN python3 /install_all.py /pkg_list.txt
 
 CMD ["sleep", "3"]
@@ -209,6 +210,12 @@ func (d *DockerPlatform) StartWorker(options map[string]interface{}) error {
 	if err != nil {
 		return err
 	}
+	// install_all.py imports wheel_cache.py from the ReqBench root, docker_platform_dir is src/platform_adapter/docker
+	srcWheelCache := filepath.Join(d.currentDir, "..", "..", "..", "wheel_cache.py")
+	err = CopyFile(srcWheelCache, filepath.Join(tmpDir, "wheel_cache.py"))
+	if err != nil {
+		return err
+	}
 
 	ctx := context.Background()
 	buildOptions := types.ImageBuildOptions{
@@ -3,14 +3,17 @@ package request
 import (
 	"fmt"
 	"log"
+	"math"
 	"rb/platform_adapter"
 	"rb/platform_adapter/aws"
 	"rb/platform_adapter/docker"
 	"rb/platform_adapter/openlambda"
 	"rb/util"
 	"rb/workload"
+	"sort"
 	"strconv"
 	"sync"
+	"sync/atomic"
 	"time"
 )
 
@@ -23,6 +26,10 @@ type RunOptions struct {
 	Tasks        int
 	Timeout      int
 	TotalTime    int
+	// TargetRPS > 0 runs the workload open-loop at this mean rate: the calls' arrival times are stretched
+	// to it, or spaced evenly if they have none. workloads whose calls all have arrival times run open-loop
+	// at their own rate without it. open-loop, Tasks caps the calls in flight (0: no cap)
+	TargetRPS float64
 }
 
 var seen = make(map[string]int)
@@ -159,6 +166,148 @@ func run(calls []workload.Call, tasks int, platform platform_adapter.PlatformAda
 	}, nil
 }
 
+type callResult struct {
+	latency float64 // ms from the call's arrival time until it returned, so it includes sending late
+	err     error
+}
+
+// arrival time of every call in seconds: its T, stretched so the mean rate is targetRPS if that is set,
+// or i / targetRPS for calls without T
+func arrivalTimes(calls []workload.Call, targetRPS float64) []float64 {
+	times := make([]float64, len(calls))
+	for i, call := range calls {
+		if call.T == nil {
+			for j := range times {
+				times[j] = float64(j) / targetRPS
+			}
+			return times
+		}
+		times[i] = *call.T
+	}
+	n := len(times)
+	if targetRPS > 0 && n > 1 && times[n-1] > 0 {
+		scale := float64(n) / times[n-1] / targetRPS
+		for i := range times {
+			times[i] *= scale
+		}
+	}
+	return times
+}
+
+// the p-th percentile of sorted values
+func percentile(sorted []float64, p float64) float64 {
+	if len(sorted) == 0 {
+		return 0
+	}
+	idx := int(math.Ceil(p/100*float64(len(sorted)))) - 1
+	if idx < 0 {
+		idx = 0
+	}
+	return sorted[idx]
+}
+
+func runOpenLoop(calls []workload.Call, maxInFlight int, platform platform_adapter.PlatformAdapter, timeout int, totalTime int, targetRPS float64) (map[string]interface{}, error) {
+	/*	every call is sent at its arrival time, whether the earlier ones returned or not.
+		a call arriving while maxInFlight calls are running is dropped (maxInFlight 0: never),
+		with totalTime > 0 the trace is repeated until totalTime seconds, shifted by its span plus one mean gap.
+		returns the throughput, the offered rate, drops, failures and latency percentiles
+	*/
+	times := arrivalTimes(calls, targetRPS)
+	n := len(times)
+	if n == 0 {
+		return nil, fmt.Errorf("no calls to run")
+	}
+	period := times[n-1] + 1/targetRPS
+	if n > 1 && times[n-1] > 0 {
+		period = times[n-1] + times[n-1]/float64(n-1)
+	}
+
+	results := make(chan callResult, 1024)
+	collected := make(chan struct{})
+	var latencies []float64
+	fails := 0
+	go func() {
+		for res := range results {
+			if res.err != nil {
+				fails += 1
+				fmt.Printf("%s\n", res.err.Error())
+			} else {
+				latencies = append(latencies, res.latency)
+			}
+		}
+		close(collected)
+	}()
+
+	var inFlight int64
+	var wg sync.WaitGroup
+	sent, dropped := 0, 0
+	lastArrival := 0.0
+	progressSent := 0
+	progressSnapshot := 0.0
+	start := time.Now()
+	for i := 0; ; i++ {
+		at := times[i%n] + float64(i/n)*period
+		if (totalTime > 0 && at > float64(totalTime)) || (totalTime <= 0 && i >= n) {
+			break
+		}
+		if wait := time.Duration(at*float64(time.Second)) - time.Since(start); wait > 0 {
+			time.Sleep(wait)
+		}
+		lastArrival = at
+		if maxInFlight > 0 && atomic.LoadInt64(&inFlight) >= int64(maxInFlight) {
+			dropped += 1
+			continue
+		}
+
+		atomic.AddInt64(&inFlight, 1)
+		wg.Add(1)
+		sent += 1
+		progressSent += 1
+		go func(name string, at float64) {
+			defer wg.Done()
+			options := make(map[string]interface{})
+			options["invoke_id"] = getId(name)
+			options["req"] = util.GetCurrTime()
+			err := platform.InvokeFunc(name, timeout, options)
+			atomic.AddInt64(&inFlight, -1)
+			if err != nil {
+				err = fmt.Errorf("failed to invoke function %s: %s", name, err)
+			}
+			results <- callResult{latency: (time.Since(start).Seconds() - at) * 1000, err: err}
+		}(calls[i%n].Name, at)
+
+		elapsed := time.Since(start).Seconds()
+		// show the offered load about every 1 seconds
+		if elapsed > progressSnapshot+1 {
+			log.Printf("offered: %.1f/second, in flight: %d\n", float64(progressSent)/(elapsed-progressSnapshot), atomic.LoadInt64(&inFlight))
+			progressSnapshot = elapsed
+			progressSent = 0
+		}
+	}
+	wg.Wait()
+	close(results)
+	<-collected
+
+	seconds := time.Since(start).Seconds()
+	sort.Float64s(latencies)
+	offered := 0.0
+	if lastArrival > times[0] {
+		offered = float64(sent+dropped-1) / (lastArrival - times[0])
+	}
+	return map[string]interface{}{
+		"ops/s":          float64(len(latencies)) / seconds,
+		"seconds":        seconds,
+		"offered_rps":    offered,
+		"sent":           sent,
+		"dropped":        dropped,
+		"fails":          fails,
+		"latency_ms_p50": percentile(latencies, 50),
+		"latency_ms_p95": percentile(latencies, 95),
+		"latency_ms_p99": percentile(latencies, 99),
+		"latency_ms_max": percentile(latencies, 100),
+	}, nil
+}
+
 func newPlatformAdapter(platformType string) platform_adapter.PlatformAdapter {
 	var platform platform_adapter.PlatformAdapter
 	switch platformType {
@@ -206,7 +355,12 @@ func AutoRun(opts RunOptions) (map[string]interface{}, error) {
 		}
 	}
 
-	runStats, err := run(opts.Workload.Calls, opts.Tasks, platform, opts.Timeout, opts.TotalTime)
+	var runStats map[string]interface{}
+	if opts.TargetRPS > 0 || opts.Workload.OpenLoop() {
+		runStats, err = runOpenLoop(opts.Workload.Calls, opts.Tasks, platform, opts.Timeout, opts.TotalTime, opts.TargetRPS)
+	} else {
+		runStats, err = run(opts.Workload.Calls, opts.Tasks, platform, opts.Timeout, opts.TotalTime)
+	}
 	if err != nil {
 		platform.KillWorker(nil)
 		log.Fatalf("failed to run workload: %v", err)
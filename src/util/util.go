@@ -121,6 +121,10 @@ func ReadWorkload(path string) (wl workload.Workload, err error) {
 	if err != nil {
 		return wl, err
 	}
+	// .rbw, written by workload_bin.py
+	if workload.IsBinary(bytes) {
+		return workload.DecodeBinary(bytes)
+	}
 	err = json.Unmarshal(bytes, &wl)
 	if err != nil {
 		return wl, err
@@ -0,0 +1,158 @@
+package workload
+
+import (
+	"bytes"
+	"encoding/binary"
+	"encoding/json"
+	"fmt"
+	"math"
+	"strings"
+)
+
+// the binary workload format written by workload_bin.py, see there for the layout
+var binaryMagic = []byte("RBWL")
+
+const binaryVersion = 1
+
+var funcColumns = []string{"name", "requirements_in", "requirements_txt", "direct_import_mods", "import_mods", "code", "modules"}
+
+type binaryHeader struct {
+	Sections    map[string][2]int64        `json:"sections"`
+	FuncColumns []string                   `json:"func_columns"`
+	Extras      map[string]json.RawMessage `json:"extras"`
+}
+
+// IsBinary tells if data starts like a binary workload
+func IsBinary(data []byte) bool {
+	return bytes.HasPrefix(data, binaryMagic)
+}
+
+func section(data []byte, header binaryHeader, name string, size int64) ([]byte, int64, error) {
+	s, ok := header.Sections[name]
+	if !ok {
+		return nil, 0, fmt.Errorf("binary workload has no %s section", name)
+	}
+	offset, count := s[0], s[1]
+	if offset < 0 || count < 0 || offset+count*size > int64(len(data)) {
+		return nil, 0, fmt.Errorf("binary workload section %s is out of range", name)
+	}
+	return data[offset : offset+count*size], count, nil
+}
+
+func int32s(b []byte) []int32 {
+	values := make([]int32, len(b)/4)
+	for i := range values {
+		values[i] = int32(binary.LittleEndian.Uint32(b[i*4:]))
+	}
+	return values
+}
+
+// DecodeBinary decodes a binary workload, the code of every function is rebuilt from its template
+func DecodeBinary(data []byte) (Workload, error) {
+	var wl Workload
+	if !IsBinary(data) || len(data) < 16 {
+		return wl, fmt.Errorf("not a binary workload")
+	}
+	if version := binary.LittleEndian.Uint32(data[4:]); version != binaryVersion {
+		return wl, fmt.Errorf("binary workload version %d, expected %d", version, binaryVersion)
+	}
+	length := binary.LittleEndian.Uint64(data[8:])
+	if 16+length > uint64(len(data)) {
+		return wl, fmt.Errorf("binary workload header is out of range")
+	}
+	var header binaryHeader
+	if err := json.Unmarshal(data[16:16+length], &header); err != nil {
+		return wl, err
+	}
+	if strings.Join(header.FuncColumns, ",") != strings.Join(funcColumns, ",") {
+		return wl, fmt.Errorf("binary workload func columns %v, expected %v", header.FuncColumns, funcColumns)
+	}
+
+	offsetBytes, nOffsets, err := section(data, header, "str_offsets", 8)
+	if err != nil {
+		return wl, err
+	}
+	strData, _, err := section(data, header, "str_data", 1)
+	if err != nil {
+		return wl, err
+	}
+	offsets := make([]int64, nOffsets)
+	for i := range offsets {
+		offsets[i] = int64(binary.LittleEndian.Uint64(offsetBytes[i*8:]))
+	}
+	str := func(i int32) (string, error) {
+		if i < 0 {
+			return "", nil
+		}
+		if int64(i)+1 >= nOffsets || offsets[i] > offsets[i+1] || offsets[i+1] > int64(len(strData)) {
+			return "", fmt.Errorf("binary workload string %d is out of range", i)
+		}
+		return string(strData[offsets[i]:offsets[i+1]]), nil
+	}
+
+	funcBytes, _, err := section(data, header, "funcs", 4)
+	if err != nil {
+		return wl, err
+	}
+	rows := int32s(funcBytes)
+	wl.Funcs = make([]Function, len(rows)/len(funcColumns))
+	for i := range wl.Funcs {
+		row := rows[i*len(funcColumns) : (i+1)*len(funcColumns)]
+		var s [7]string
+		for j, id := range row {
+			if s[j], err = str(id); err != nil {
+				return wl, err
+			}
+		}
+		fn := Function{Name: s[0], Meta: Meta{RequirementsIn: s[1], RequirementsTxt: s[2]}}
+		if err := json.Unmarshal([]byte(s[4]), &fn.Meta.ImportMods); err != nil {
+			return wl, err
+		}
+		var template []string
+		if err := json.Unmarshal([]byte(s[5]), &template); err != nil {
+			return wl, err
+		}
+		fn.Code = make([]string, len(template))
+		for j, line := range template {
+			if row[6] >= 0 {
+				line = strings.ReplaceAll(line, "\x00M", s[6])
+			}
+			fn.Code[j] = strings.ReplaceAll(line, "\x00N", fn.Name)
+		}
+		wl.Funcs[i] = fn
+	}
+
+	callBytes, nCalls, err := section(data, header, "call_funcs", 4)
+	if err != nil {
+		return wl, err
+	}
+	var times []byte
+	if _, ok := header.Sections["call_t"]; ok {
+		if times, _, err = section(data, header, "call_t", 8); err != nil {
+			return wl, err
+		}
+	}
+	wl.Calls = make([]Call, nCalls)
+	for i, idx := range int32s(callBytes) {
+		if idx < 0 || int(idx) >= len(wl.Funcs) {
+			return wl, fmt.Errorf("call %d refers to function %d of %d", i, idx, len(wl.Funcs))
+		}
+		wl.Calls[i].Name = wl.Funcs[idx].Name
+		if times != nil {
+			t := math.Float64frombits(binary.LittleEndian.Uint64(times[i*8:]))
+			wl.Calls[i].T = &t
+		}
+	}
+
+	if raw, ok := header.Extras["pkg_with_version"]; ok {
+		if err := json.Unmarshal(raw, &wl.PkgWithVersion); err != nil {
+			return wl, err
+		}
+	}
+	if raw, ok := header.Extras["arrival"]; ok {
+		if err := json.Unmarshal(raw, &wl.Arrival); err != nil {
+			return wl, err
+		}
+	}
+	return wl, nil
+}
@@ -13,6 +13,8 @@ type Workload struct {
 	Funcs          []Function          `json:"funcs"`
 	Calls          []Call              `json:"calls"`
 	PkgWithVersion map[string][]string `json:"pkg_with_version"`
+	// the arrival process the calls' T were generated from (arrivals.py), nil for closed-loop workloads
+	Arrival map[string]interface{} `json:"arrival,omitempty"`
 
 	fnIndex  int
 	emptyPkg map[string]bool // emptyPkg indicates whether a function's pkg list is empty
@@ -20,6 +22,8 @@ type Workload struct {
 
 type Call struct {
 	Name string `json:"name"`
+	// arrival time in seconds since the start of the trace, nil if the call has none
+	T *float64 `json:"t,omitempty"`
 }
 
 type Function struct {
@@ -49,6 +53,24 @@ func generateNonMeasureCodeLines(modules []string, returnVal string) []string {
 	return lines
 }
 
+// readSmapsRollup is util.read_smaps_rollup, memory of a process in kB: {"rss", "pss", "uss"}
+var readSmapsRollup = []string{
+	"def read_smaps_rollup(pid=\"self\"):",
+	"    fields = {}",
+	"    try:",
+	"        with open(f\"/proc/{pid}/smaps_rollup\", \"r\") as f:",
+	"            for line in f:",
+	"                parts = line.split()",
+	"                if len(parts) >= 2 and parts[0].endswith(\":\") and parts[1].isdigit():",
+	"                    fields[parts[0][:-1]] = int(parts[1])",
+	"    except OSError:",
+	"        return {}",
+	"    if \"Rss\" not in fields:",
+	"        return {}",
+	"    return {\"rss\": fields[\"Rss\"], \"pss\": fields.get(\"Pss\", 0),",
+	"            \"uss\": fields.get(\"Private_Clean\", 0) + fields.get(\"Private_Dirty\", 0)}",
+}
+
 func genMeasureCode(modules []string, measureLatency bool, measureMem bool) []string {
 	lines := []string{
 		"import time, importlib, os",
@@ -57,9 +79,14 @@ func genMeasureCode(modules []string, measureLatency bool, measureMem bool) []st
 		"split_gen = -1",
 	}
 	if measureMem {
+		// smaps_rollup (rss/pss/uss) also sees native allocations and mapped .so files, tracemalloc does not
 		lines = append(lines,
 			"import tracemalloc, gc, sys, json",
 			"gc.collect()",
+		)
+		lines = append(lines, readSmapsRollup...)
+		lines = append(lines,
+			"smaps_start = read_smaps_rollup()",
 			"tracemalloc.start()",
 		)
 	}
@@ -78,6 +105,12 @@ func genMeasureCode(modules []string, measureLatency bool, measureMem bool) []st
 	if measureLatency {
 		lines = append(lines, "t_EndImport = time.time()*1000")
 	}
+	if measureMem {
+		lines = append(lines,
+			"smaps_end = read_smaps_rollup()",
+			"tracer_kb = tracemalloc.get_tracemalloc_memory() / 1024",
+		)
+	}
 	lines = append(lines,
 		"def f(event):",
 		"    global t_StartImport, t_EndImport, t_EndExecute, failed",
@@ -97,6 +130,9 @@ func genMeasureCode(modules []string, measureLatency bool, measureMem bool) []st
 		lines = append(lines,
 			"    mb = (tracemalloc.get_traced_memory()[0] - tracemalloc.get_traced_memory()[1]) / 1024 / 1024",
 			"    event['memory_usage_mb'] = mb",
+			// e.g. event['uss_mb'], without the memory tracemalloc itself uses
+			"    for key in smaps_end:",
+			"        event[key + '_mb'] = (smaps_end[key] - smaps_start.get(key, 0) - tracer_kb) / 1024",
 		)
 	}
 	lines = append(lines, "    return event")
@@ -121,9 +157,25 @@ func (wl *Workload) AddMetrics(metrics []string) {
 	}
 }
 
+// the arrival times stay where they are, only the names are shuffled
 func (wl *Workload) ShuffleCalls() {
 	rand.Seed(time.Now().UnixNano())
-	rand.Shuffle(len(wl.Calls), func(i, j int) { wl.Calls[i], wl.Calls[j] = wl.Calls[j], wl.Calls[i] })
+	rand.Shuffle(len(wl.Calls), func(i, j int) {
+		wl.Calls[i].Name, wl.Calls[j].Name = wl.Calls[j].Name, wl.Calls[i].Name
+	})
+}
+
+// OpenLoop tells if every call has an arrival time
+func (wl *Workload) OpenLoop() bool {
+	if len(wl.Calls) == 0 {
+		return false
+	}
+	for _, call := range wl.Calls {
+		if call.T == nil {
+			return false
+		}
+	}
+	return true
 }
 
 func (wl *Workload) GenerateTrace(target int, skew bool, weights []float64, s float64) {
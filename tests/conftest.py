@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+# workload imports send_req and platform_adapter.interface, which come with a benchmark setup (open-lambda,
+# the platform adapters) and are not part of this directory. the tests don't send requests, so stand-ins do
+def _stub_module(name, **attrs):
+    try:
+        __import__(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+
+
+class PlatformAdapter:
+    pass
+
+
+def _run(wl_dict, tasks, platform, timeout):
+    raise Exception("send_req is not available in the tests")
+
+
+_stub_module("send_req", run=_run)
+_stub_module("platform_adapter", __path__=[])
+_stub_module("platform_adapter.interface", PlatformAdapter=PlatformAdapter)
+
+
+class PyPIStub:
+    """
+    A local stand-in for https://pypi.org/pypi: routes maps a path ("/flask/2.0.0/json") to a json object,
+    or to an int that is answered as that status; other paths are 404. json answers carry an ETag and are
+    answered 304 when it matches If-None-Match. requests lists every (path, status) answered.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                answer = stub.routes.get(self.path, 404)
+                if isinstance(answer, int):
+                    stub.requests.append((self.path, answer))
+                    self.send_response(answer)
+                    self.end_headers()
+                    return
+                body = json.dumps(answer).encode()
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    stub.requests.append((self.path, 304))
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stub.requests.append((self.path, 200))
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+
+@pytest.fixture
+def pypi_stub():
+    stub = PyPIStub()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
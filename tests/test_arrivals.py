@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from arrivals import arrival_times
+
+
+@pytest.mark.parametrize("arrival", [
+    {"process": "poisson", "rate": 50},
+    {"process": "mmpp", "rates": [10, 200], "dwell": [30, 3]},
+    {"process": "mmpp", "rates": [0, 100], "dwell": [5, 5]},
+    {"process": "diurnal", "rate": 50, "period": 60},
+])
+def test_n_sorted_times(arrival):
+    times = arrival_times(arrival, 5000, seed=1)
+    assert len(times) == 5000
+    assert (np.diff(times) >= 0).all()
+    assert (times == arrival_times(arrival, 5000, seed=1)).all()
+
+
+@pytest.mark.parametrize("rates, dwell", [([0, 0], [1, 1]), ([], []), ([10], [1, 1]), ([-1, 10], [1, 1])])
+def test_mmpp_rejects_rates_without_arrivals(rates, dwell):
+    with pytest.raises(Exception, match="mmpp"):
+        arrival_times({"process": "mmpp", "rates": rates, "dwell": dwell}, 10)
+
+
+def test_replay_loops_a_recording(tmp_path):
+    path = tmp_path / "timestamps.txt"
+    path.write_text("102\n100\n101\n")
+    times = arrival_times({"process": "replay", "path": str(path), "speedup": 2.0}, 7)
+    assert times.tolist() == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0]
+
+    np.save(str(tmp_path / "timestamps.npy"), np.array([5.0]))
+    assert arrival_times({"process": "replay", "path": str(tmp_path / "timestamps.npy")}, 2).tolist() == [0.0, 1.0]
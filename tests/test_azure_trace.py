@@ -0,0 +1,35 @@
+import csv
+
+import numpy as np
+
+import azure_trace
+
+
+def write_day(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["HashOwner", "HashApp", "HashFunction", "Trigger"] + [str(i) for i in range(1, 1441)])
+        for function, calls in rows.items():
+            writer.writerow(["owner", "app", function, "http"] + list(calls))
+
+
+def test_calls_of_a_window_across_days(tmp_path):
+    day0, day1 = np.zeros(1440, dtype=int), np.zeros(1440, dtype=int)
+    day0[1439], day1[0], day1[1] = 3, 2, 5
+    paths = [str(tmp_path / "d01.csv"), str(tmp_path / "d02.csv")]
+    write_day(paths[0], {"hot": day0, "cold": np.zeros(1440, dtype=int)})
+    write_day(paths[1], {"hot": day1, "cold": np.eye(1, 1440, 1, dtype=int)[0]})
+
+    totals = azure_trace.invocation_totals(paths)
+    assert totals == {"owner/app/hot": 10, "owner/app/cold": 1}
+    mapping = azure_trace.map_by_rank(totals, 2)
+    assert mapping == {"owner/app/hot": 0, "owner/app/cold": 1}
+
+    minutes = list(azure_trace.iter_calls(paths, mapping, 2, start_minute=1439, minutes=2, seed=1))
+    assert [funcs.tolist() for _, funcs in minutes] == [[0, 0, 0], [0, 0]]
+    for i, (times, _) in enumerate(minutes):
+        assert (np.diff(times) >= 0).all()
+        assert ((i * 60.0 <= times) & (times < (i + 1) * 60.0)).all()
+
+    calls = np.concatenate([funcs for _, funcs in azure_trace.iter_calls(paths, mapping, 2)])
+    assert np.bincount(calls).tolist() == [10, 1]
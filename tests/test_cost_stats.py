@@ -0,0 +1,75 @@
+import json
+import statistics
+
+import pytest
+
+from cost_stats import COST_SCHEMA_VERSION, adaptive_samples, ci95, converged, cost_record, load_costs, select, \
+    summarize
+
+
+def sampler(values):
+    values = iter(values)
+    return lambda: next(values, None)
+
+
+def test_ci95_is_the_t_interval():
+    assert ci95([]) is None
+    assert ci95([3.0]) is None
+    samples = [1.0, 2.0, 4.0, 3.0]
+    assert ci95(samples) == pytest.approx(3.182 * statistics.stdev(samples) / 2)
+    # 1.96 beyond the table
+    samples = [float(i % 7) for i in range(50)]
+    assert ci95(samples) == pytest.approx(1.96 * statistics.stdev(samples) / 50 ** 0.5)
+
+
+def test_converged_relative_or_absolute():
+    assert not converged([5.0], 0.05, 0.1)
+    assert converged([10.0, 10.1, 9.9, 10.0], 0.05, 0)
+    assert not converged([0.01, 0.05, 0.02], 0.05, 0)
+    assert converged([0.01, 0.05, 0.02], 0.05, 0.1)
+
+
+def test_adaptive_samples_discards_warmup_and_stops_when_converged():
+    assert adaptive_samples(sampler([100.0, 1.0, 1.0, 1.0, 1.0, 5.0]), 1, 3, 10, 0.05, 0) == [1.0, 1.0, 1.0]
+
+
+def test_adaptive_samples_bounds():
+    noisy = [1.0, 9.0] * 20
+    assert len(adaptive_samples(sampler(noisy), 0, 2, 6, 0.01, 0)) == 6
+    assert adaptive_samples(sampler([1.0, 1.0, 1.0]), 0, 5, 10, 0.05, 0) == [1.0, 1.0, 1.0]
+    # a failed warmup gives nothing, a failed sample stops sampling
+    assert adaptive_samples(sampler([]), 1, 3, 10, 0.05, 0) == []
+    assert adaptive_samples(sampler([1.0, 2.0]), 0, 5, 10, 0.05, 0) == [1.0, 2.0]
+
+
+def test_summarize():
+    samples = [float(i) for i in range(1, 21)]
+    stats = summarize(samples, warmup=1)
+    assert stats["n"] == 20 and stats["warmup"] == 1 and stats["samples"] == samples
+    assert stats["mean"] == 10.5 and stats["min"] == 1.0 and stats["max"] == 20.0 and stats["p50"] == 10.5
+    assert stats["p95"] == pytest.approx(19.05)
+    assert stats["stdev"] == pytest.approx(statistics.stdev(samples))
+    assert summarize([]) == {"n": 0, "warmup": 0, "samples": []}
+    one = summarize([2.0])
+    assert one["stdev"] == 0.0 and one["p95"] == 2.0 and one["ci95"] is None
+
+
+def test_select_and_load_costs(tmp_path):
+    metrics = {"ms": summarize([1.0, 2.0, 6.0]), "mb": summarize([0.5, 0.5, 0.8]), "i-ms": summarize([])}
+    entry = {"ms": 2.0, "mb": 0.5, "i-ms": 0, "disk_size": 10, "stats": cost_record(metrics)}
+    assert entry["stats"]["schema"] == COST_SCHEMA_VERSION
+    assert select(entry, "min") == {"ms": 1.0, "mb": 0.5, "i-ms": 0, "disk_size": 10}
+    assert select(entry, "max") == {"ms": 6.0, "mb": 0.8, "i-ms": 0, "disk_size": 10}
+    # schema 1 entries are single samples
+    assert select({"ms": 3.0, "mb": 1.0}, "max") == {"ms": 3.0, "mb": 1.0}
+    with pytest.raises(Exception):
+        select(entry, "ci95")
+    with pytest.raises(Exception):
+        select({"ms": 1.0, "stats": {"schema": 99}})
+
+    path = str(tmp_path / "install_import.json")
+    with open(path, "w") as f:
+        json.dump({"flask": {"2.0.0": entry, "1.0": {"ms": 3.0, "mb": 1.0}}}, f)
+    assert load_costs(path, "mean") == {"flask": {"2.0.0": {"ms": 3.0, "mb": pytest.approx(0.6), "i-ms": 0,
+                                                            "disk_size": 10},
+                                                  "1.0": {"ms": 3.0, "mb": 1.0}}}
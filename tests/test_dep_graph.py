@@ -0,0 +1,44 @@
+from collections import deque
+
+import pandas as pd
+import pytest
+
+from dep_graph import transitive_closure
+from req_parser import parse_text
+from test_req_parser import EDGE_CASES, random_txts
+
+
+# util.construct_dependency_matrix + get_package_dependencies as they were before dep_graph, the reference
+def baseline_closure(dependencies):
+    all_packages = list(set(dependencies.keys()).union(*dependencies.values()))
+    matrix = pd.DataFrame(0, index=all_packages, columns=all_packages)
+    for pkg, deps in dependencies.items():
+        for dep in deps:
+            matrix.loc[pkg, dep] = 1
+
+    closure = {}
+    for pkg in matrix.columns:
+        visited, all_deps, queue = set(), [], deque([pkg])
+        while queue:
+            current = queue.popleft()
+            if current in visited:
+                continue
+            visited.add(current)
+            immediate = matrix.index[matrix[current] == 1].tolist()
+            all_deps.extend(immediate)
+            queue.extend(dep for dep in immediate if dep not in visited)
+        closure[pkg] = set(all_deps)
+    return closure
+
+
+@pytest.mark.parametrize("txt", EDGE_CASES[:4] + random_txts(100, seed=1))
+def test_same_as_baseline(txt):
+    dependencies = parse_text(txt).versioned_dependencies()
+    closure = transitive_closure(dependencies)
+    assert {pkg: set(deps) for pkg, deps in closure.items()} == baseline_closure(dependencies)
+
+
+def test_cycle_and_direct_req():
+    closure = transitive_closure(parse_text(EDGE_CASES[2]).versioned_dependencies())
+    assert set(closure["a==1.0"]) == set(closure["b==2.0"]) == {"a==1.0", "b==2.0"}
+    assert set(closure["direct_req"]) == {"a==1.0", "b==2.0"}
@@ -0,0 +1,42 @@
+import os
+
+from folder_size import folder_size, folder_sizes
+
+
+# install_import.get_folder_size as it was before folder_size, the reference for FolderSize.size
+def baseline_folder_size(folder):
+    total_size = 0
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for f in filenames:
+            fp = os.path.join(dirpath, f)
+            if not os.path.islink(fp):
+                total_size += os.path.getsize(fp)
+    return total_size
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_sizes_and_kinds(tmp_path):
+    pkg = str(tmp_path / "numpy==1.25.2")
+    write(os.path.join(pkg, "numpy", "__init__.py"), 100)
+    write(os.path.join(pkg, "numpy", "__pycache__", "__init__.cpython-310.pyc"), 50)
+    write(os.path.join(pkg, "numpy", "core", "_multiarray.so"), 4000)
+    write(os.path.join(pkg, "numpy.libs", "libopenblas.so.0"), 6000)
+    write(os.path.join(pkg, "numpy-1.25.2.dist-info", "METADATA"), 10)
+    os.symlink(os.path.join(pkg, "numpy", "core", "_multiarray.so"), os.path.join(pkg, "link.so"))
+    os.link(os.path.join(pkg, "numpy.libs", "libopenblas.so.0"), os.path.join(pkg, "hardlink.so"))
+
+    fs = folder_size(pkg)
+    assert fs.size == baseline_folder_size(pkg) == 16160
+    assert fs.files == 6
+    assert fs.kinds == {"so": [3, 16000], "py": [1, 100], "pyc": [1, 50], "other": [1, 10]}
+    assert fs.so_share() == 16000 / 16160
+    # the hard link is one file on disk
+    files = ["numpy/__init__.py", "numpy/__pycache__/__init__.cpython-310.pyc", "numpy/core/_multiarray.so",
+             "numpy.libs/libopenblas.so.0", "numpy-1.25.2.dist-info/METADATA"]
+    assert fs.allocated == sum(os.stat(os.path.join(pkg, f)).st_blocks * 512 for f in files)
+    assert folder_sizes([pkg, str(tmp_path / "missing")]) == {pkg: fs, str(tmp_path / "missing"): folder_size("")}
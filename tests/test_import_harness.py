@@ -0,0 +1,48 @@
+import pytest
+
+from cost_stats import COST_METRICS
+from import_harness import ImportHarness
+from import_tree import iter_tree
+
+
+@pytest.fixture
+def harness():
+    harness = ImportHarness(warmup=1, min_trials=2, max_trials=4, timeout=30)
+    yield harness
+    harness.close()
+
+
+# decimal is not loaded by the zygote, so every sample really imports it
+def test_measures_every_metric(harness):
+    measurement = harness.measure([], ["csv"], ["decimal"])
+    assert measurement.errors == {}
+    for metric in COST_METRICS:
+        stats = measurement.metrics[metric]
+        assert 2 <= stats["n"] <= 4 and stats["warmup"] == 1
+        assert stats["min"] <= stats["p50"] <= stats["max"]
+    assert measurement.value("ms") > 0 and measurement.value("i-ms") > 0
+    assert measurement.value("ms", "max") == measurement.metrics["ms"]["max"]
+    assert measurement.stats()["metrics"] is measurement.metrics
+    assert "decimal" in [node[0] for node in iter_tree(measurement.tree)]
+
+
+def test_failures_are_per_metric_and_the_zygote_survives(harness):
+    missing = harness.measure([], [], ["no_such_module_for_the_harness"])
+    assert missing.metrics["i-ms"]["n"] == 0 and "ModuleNotFoundError" in missing.errors["i-ms"]
+    assert missing.value("i-ms") == 0 and missing.tree is None
+
+    bad_deps = harness.measure([], ["no_such_module_for_the_harness"], ["decimal"])
+    assert bad_deps.metrics["i-ms"]["n"] >= 2
+    assert bad_deps.metrics["ms"]["n"] == 0 and bad_deps.errors["ms"].startswith("importing dependencies")
+
+    process = harness.process
+    assert harness.measure([], [], ["decimal"]).errors == {}
+    assert harness.process is process
+
+
+def test_restarts_a_dead_zygote(harness):
+    harness.measure([], [], ["decimal"])
+    harness.process.kill()
+    harness.process.wait()
+    measurement = harness.measure([], [], ["decimal"])
+    assert measurement.errors == {} and measurement.metrics["ms"]["n"] >= 2
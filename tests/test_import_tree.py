@@ -0,0 +1,75 @@
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+from import_tree import ImportTreeFinder, build_tree, hot_modules, iter_tree, save_trees
+
+
+@pytest.fixture
+def tree_pkg(tmp_path, monkeypatch):
+    # treepkg imports treepkg.a, which imports treepkg.b, then treepkg.c
+    pkg = tmp_path / "treepkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("from . import a\nfrom . import c\n")
+    (pkg / "a.py").write_text("from . import b\nx = [0] * 100000\n")
+    (pkg / "b.py").write_text("")
+    (pkg / "c.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "treepkg"
+    for name in list(sys.modules):
+        if name == "treepkg" or name.startswith("treepkg."):
+            del sys.modules[name]
+
+
+def record(mod, trace=False):
+    finder = ImportTreeFinder()
+    finder.install()
+    if trace:
+        tracemalloc.start()
+    try:
+        __import__(mod)
+    finally:
+        if trace:
+            tracemalloc.stop()
+        finder.uninstall()
+    return finder.records
+
+
+def shape(tree):
+    return [[node[0], shape(node[5])] for node in tree]
+
+
+def test_tree_follows_the_imports(tree_pkg):
+    records = record(tree_pkg)
+    assert records["treepkg.b"][1] == "treepkg.a" and records["treepkg.a"][1] == "treepkg"
+    tree = build_tree(records)
+    assert shape(tree) == [["treepkg", [["treepkg.a", [["treepkg.b", []]]], ["treepkg.c", []]]]]
+    root = tree[0]
+    # cum covers the children, self does not
+    assert root[1] >= sum(child[1] for child in root[5])
+    assert root[2] == pytest.approx(root[1] - sum(child[1] for child in root[5]), abs=0.01)
+    assert root[3] == root[4] == 0
+
+
+def test_memory_tree(tree_pkg):
+    times = record(tree_pkg)
+    for name in [name for name in sys.modules if name.startswith("treepkg")]:
+        del sys.modules[name]
+    tree = build_tree(times, record(tree_pkg, trace=True))
+    kb = {node[0]: node for node in iter_tree(tree)}
+    # the list of 100000 ints in treepkg.a, and nothing like it in treepkg.b
+    assert kb["treepkg.a"][4] > 500
+    assert kb["treepkg"][3] >= kb["treepkg.a"][3] > kb["treepkg.b"][3]
+
+
+def test_hot_modules_and_save(tmp_path):
+    tree = [["a", 10, 2, 0, 0, [["b", 8, 8, 0, 0, []]]], ["c", 1, 1, 0, 0, []]]
+    assert hot_modules([tree, tree], share=0.7) == [("b", 16)]
+    assert hot_modules([tree, tree], share=0.8) == [("b", 16), ("a", 4)]
+    assert hot_modules([tree], share=1.0) == [("b", 8), ("a", 2), ("c", 1)]
+    path = str(tmp_path / "import_tree.json")
+    save_trees({"flask": {"2.0.0": tree}}, path)
+    with open(path) as f:
+        assert json.load(f) == {"flask": {"2.0.0": tree}}
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import install_import
+import util
+from install_import import install_all, install_order, make_cgroup, run_pinned
+from util import split_cpus
+
+
+def test_split_cpus_gives_disjoint_sets(monkeypatch):
+    monkeypatch.setattr(util.os, "sched_getaffinity", lambda pid: {0, 1, 2, 3, 4, 5, 6, 7})
+    assert split_cpus(3) == [[0, 1], [2, 3], [4, 5]]
+    assert split_cpus(1) == [[0, 1, 2, 3, 4, 5, 6, 7]]
+    assert split_cpus(20) == [[cpu] for cpu in range(8)]
+    assert split_cpus(0) == [[0, 1, 2, 3, 4, 5, 6, 7]]
+
+
+def test_install_order():
+    pkgs_and_deps = {"flask==2.0.0": {"flask==2.0.0,jinja2==3.0.0": 3, "flask==2.0.0,jinja2==2.0.0": 1},
+                     "jinja2==3.0.0": {"jinja2==3.0.0,markupsafe==2.0.0": 1}}
+    assert install_order(pkgs_and_deps) == ["flask==2.0.0", "jinja2==3.0.0", "markupsafe==2.0.0"]
+
+
+# every pkg is installed once, by one worker at a time on that worker's own cpus
+def test_install_all_workers(monkeypatch):
+    monkeypatch.setattr(install_import, "split_cpus", lambda workers: [[0, 1], [2, 3], [4, 5]][:workers])
+    monkeypatch.setattr(install_import, "make_cgroup", lambda worker, cpus: f"cg-{worker}")
+    lock = threading.Lock()
+    installs = []
+    running = set()
+
+    def install_package(pkg, install_dir, worker=0, cpus=None, cgroup=None):
+        with lock:
+            assert worker not in running
+            running.add(worker)
+        time.sleep(0.002)
+        with lock:
+            running.remove(worker)
+            installs.append((pkg, worker, tuple(cpus), cgroup))
+    monkeypatch.setattr(install_import, "install_package", install_package)
+
+    pkgs = [f"pkg{i}==1.0" for i in range(30)]
+    install_all(pkgs, "/packages", workers=3)
+    assert sorted(pkg for pkg, _, _, _ in installs) == sorted(pkgs)
+    for _, worker, cpus, cgroup in installs:
+        assert cpus == ((0, 1), (2, 3), (4, 5))[worker] and cgroup == f"cg-{worker}"
+
+    # one worker installs in order on every cpu, without a cgroup
+    installs.clear()
+    install_all(pkgs[:3], "/packages", workers=1)
+    assert installs == [(pkg, 0, (0, 1), None) for pkg in pkgs[:3]]
+
+
+def test_run_pinned():
+    cpu = min(os.sched_getaffinity(0))
+    out = run_pinned([sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"], [cpu], None)
+    assert out.decode().strip() == str([cpu])
+    with pytest.raises(subprocess.CalledProcessError):
+        run_pinned([sys.executable, "-c", "raise SystemExit(3)"], [cpu], None)
+
+
+def test_make_cgroup(tmp_path, monkeypatch):
+    monkeypatch.setattr(install_import, "cgroup_root", str(tmp_path / "fs" / "reqbench"))
+    path = make_cgroup(2, [4, 5])
+    assert path == str(tmp_path / "fs" / "reqbench" / "install-2")
+    with open(os.path.join(path, "cpuset.cpus")) as f:
+        assert f.read() == "4,5"
+    with open(tmp_path / "fs" / "reqbench" / "cgroup.subtree_control") as f:
+        assert f.read() == "+cpuset"
+    # not writable: only pinned
+    (tmp_path / "file").write_text("")
+    monkeypatch.setattr(install_import, "cgroup_root", str(tmp_path / "file" / "reqbench"))
+    assert make_cgroup(0, [0]) is None
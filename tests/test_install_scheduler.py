@@ -0,0 +1,52 @@
+import os
+
+from install_scheduler import DiskBudget, plan_batches
+
+SIZES = {"numpy==1": 50, "scipy==1": 60, "pandas==1": 40, "six==1": 1, "flask==1": 5}
+
+
+def test_batches_fit_the_budget_and_share_dirs():
+    needs = {"scipy": {"scipy==1", "numpy==1"}, "flask": {"flask==1", "six==1"}, "numpy": {"numpy==1"},
+             "pandas": {"pandas==1", "numpy==1", "six==1"}, "six": {"six==1"}}
+    batches = plan_batches(needs, SIZES.get, 120)
+    assert sorted(pkg for pkgs, _ in batches for pkg in pkgs) == sorted(needs)
+    for pkgs, dirs in batches:
+        assert dirs == set().union(*(needs[pkg] for pkg in pkgs))
+        assert sum(SIZES[d] for d in dirs) <= 120
+    # numpy is measured while scipy's dirs are installed
+    assert batches[0][0][:2] == ["scipy", "numpy"]
+
+    assert plan_batches(needs, SIZES.get, None) == [(list(needs), set(SIZES))]
+    # a pkg too big for the budget still gets a batch of its own
+    assert plan_batches({"scipy": {"scipy==1", "numpy==1"}}, SIZES.get, 10) == [(["scipy"], {"scipy==1", "numpy==1"})]
+
+
+def make_dir(install_dir, pkg, size):
+    os.makedirs(os.path.join(install_dir, pkg))
+    with open(os.path.join(install_dir, pkg, "data"), "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_eviction_order(tmp_path):
+    install_dir = str(tmp_path)
+    disk = DiskBudget(install_dir, 100)
+    for pkg in ["a==1", "b==1", "c==1", "d==1"]:
+        make_dir(install_dir, pkg, 1)
+        disk.add(pkg, 25)
+    disk.touch("a==1")  # b is now the least recently used
+
+    # c is needed later, so b and d go first, a is kept for the batch about to run
+    assert disk.make_room(40, keep={"a==1"}, later={"c==1"}) == ["b==1", "d==1"]
+    assert disk.used == 50 and disk.evictions == 2
+    assert sorted(os.listdir(install_dir)) == ["a==1", "c==1"]
+    # later dirs are evicted when nothing else is left
+    assert disk.make_room(60, keep={"a==1"}, later={"c==1"}) == ["c==1"]
+    assert disk.peak_estimate == 100
+
+
+def test_leftover_dirs_are_counted(tmp_path):
+    make_dir(str(tmp_path), "a==1", 10000)
+    disk = DiskBudget(str(tmp_path), 100000)
+    assert list(disk.installed) == ["a==1"]
+    assert disk.used >= 10000
+    assert DiskBudget(str(tmp_path), None).make_room(10 ** 12, set(), set()) == []
@@ -0,0 +1,42 @@
+import json
+
+from journal import Journal
+
+
+def test_resume_after_a_crash(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path, {"trials": 5})
+    journal.append("flask", "2.0.0", {"ms": 1})
+    journal.append("idna", "3.4", {"ms": 2})
+    journal.append("flask", "2.0.0", {"ms": 3})
+    with open(path, "a") as f:
+        f.write('{"name": "requests", "version": "2.31.0", "con')  # killed while writing
+
+    resumed = Journal(path, {"trials": 5})
+    assert resumed.load() == 2
+    assert resumed.get("flask", "2.0.0") == {"ms": 3}
+    assert resumed.get("requests", "2.31.0") is None
+
+    # the record after the torn line is not lost
+    resumed.append("requests", "2.31.0", {"ms": 4})
+    again = Journal(path, {"trials": 5})
+    assert again.load() == 3
+    assert again.get("requests", "2.31.0") == {"ms": 4}
+
+
+def test_other_config_is_not_reused(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    Journal(path, {"trials": 5}).append("flask", "2.0.0", {"ms": 1})
+    journal = Journal(path, {"trials": 10})
+    assert journal.load() == 0
+    assert journal.get("flask", "2.0.0") is None
+
+
+def test_compact_keeps_the_last_record(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path, {"trials": 5})
+    journal.append("flask", "2.0.0", {"ms": 1})
+    journal.append("flask", "2.0.0", {"ms": 3})
+    assert journal.compact() == {"flask": {"2.0.0": {"ms": 3}}}
+    with open(path) as f:
+        assert [json.loads(line)["record"] for line in f] == [{"ms": 3}]
@@ -0,0 +1,98 @@
+import json
+import os
+import types
+import urllib.error
+import urllib.request
+
+import pytest
+
+import mod_costs
+from ol_stub import start_stub
+from pkg_registry import registry
+from version import Package, versionMeta
+
+
+def register(registry_dir, name, code):
+    os.makedirs(os.path.join(registry_dir, name))
+    with open(os.path.join(registry_dir, name, "f.py"), "w") as f:
+        f.write(code)
+
+
+def test_stub_runs_every_invocation_in_a_new_process(tmp_path):
+    register(str(tmp_path), "pid", "import os\ndef f(event):\n    return [os.getpid(), event]\n")
+    register(str(tmp_path), "silent", "import os\ndef f(event):\n    os._exit(0)\n")
+    server = start_stub(str(tmp_path), 0)
+    url = "http://localhost:%d/run/" % server.server_address[1]
+    try:
+        def run(name):
+            request = urllib.request.Request(url + name, data=json.dumps({"cpus": None}).encode(), method="POST")
+            with urllib.request.urlopen(request) as r:
+                return json.loads(r.read())
+
+        first, second = run("pid"), run("pid")
+        assert first[1] == {"cpus": None}
+        assert first[0] != second[0]
+        with pytest.raises(urllib.error.HTTPError) as e:
+            run("silent")
+        assert e.value.code == 500
+        with pytest.raises(urllib.error.HTTPError) as e:
+            run("missing")
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeServer:
+    def __init__(self):
+        self.stopped = False
+
+    def shutdown(self):
+        self.stopped = True
+
+
+def test_teardown_when_measuring_fails(tmp_path, monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(mod_costs, "registry_dir", str(tmp_path))
+    monkeypatch.setattr(mod_costs, "gen_meta_each_pkg", lambda deps: {})
+    monkeypatch.setattr(mod_costs, "start_stub", lambda *args: server)
+
+    def measure_all(metas, worker_config):
+        register(str(tmp_path), "ms-flask_2.0.0-1", "")
+        raise Exception("worker died")
+
+    monkeypatch.setattr(mod_costs, "measure_all", measure_all)
+    with pytest.raises(Exception, match="worker died"):
+        mod_costs.find_mod_costs({}, stub=True)
+    assert server.stopped
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_failed_package_is_journaled_and_the_rest_measured(tmp_path, monkeypatch):
+    monkeypatch.setattr(mod_costs, "bench_file_dir", str(tmp_path))
+    monkeypatch.setattr(mod_costs, "deploy_measurements", lambda meta: 0)
+    monkeypatch.setattr(Package, "packages_factory", {})
+    metas = {}
+    for name in ["flask", "idna"]:
+        Package.packages_factory[name] = Package(name, {"1.0": versionMeta()}, [])
+        metas[registry.intern(name, "1.0")] = types.SimpleNamespace(name=name, requirements_txt=f"{name}==1.0\n")
+
+    def measure_costs(meta):
+        if meta.name == "flask":
+            raise Exception("import timed out")
+        return {"ms": 1.0}, None
+
+    monkeypatch.setattr(mod_costs, "measure_costs", measure_costs)
+    mod_costs.measure_all(metas, {})
+    assert Package.packages_factory["idna"].available_versions["1.0"].cost == {"ms": 1.0}
+
+    with open(str(tmp_path / "costs.journal.jsonl")) as f:
+        records = {entry["name"]: entry["record"] for entry in map(json.loads, f)}
+    assert records["flask"]["error"] == "Exception: import timed out"
+    assert records["idna"]["cost"] == {"ms": 1.0}
+
+    # the next run measures only the failed package again
+    measured = []
+    monkeypatch.setattr(mod_costs, "measure_costs", lambda meta: measured.append(meta.name) or ({"ms": 2.0}, None))
+    mod_costs.measure_all(metas, {})
+    assert measured == ["flask"]
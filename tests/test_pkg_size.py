@@ -0,0 +1,39 @@
+import pkg_size
+import util
+from pypi_client import PyPIClient
+
+
+def wheel_release(size):
+    return {"urls": [{"packagetype": "bdist_wheel", "filename": "pkg-1.0-py3-none-manylinux1_x86_64.whl",
+                      "size": size}]}
+
+
+def sizes_with(pypi_stub, tmp_path, monkeypatch):
+    client = PyPIClient(base_url=pypi_stub.url, cache_path=str(tmp_path / "pypi.sqlite3"), retries=0)
+    monkeypatch.setattr(pkg_size, "pypi", client)
+    monkeypatch.setattr(util, "pypi", client)
+    return pkg_size.PackageSizes(str(tmp_path / "package_sizes.json"))
+
+
+def test_sizes_and_misses_are_persisted(pypi_stub, tmp_path, monkeypatch):
+    pypi_stub.routes["/flask/2.0.0/json"] = wheel_release(100)
+    sizes = sizes_with(pypi_stub, tmp_path, monkeypatch)
+    assert sizes.get("flask", "2.0.0") == pkg_size.PackageSize(100, 700, "whl", False)
+    assert sizes.get("nosuchpkg", "1.0") is None
+    sizes.save()
+
+    loaded = pkg_size.PackageSizes(sizes.path)
+    loaded.load()
+    assert loaded.cached("flask", "2.0.0") == pkg_size.PackageSize(100, 700, "whl", False)
+    assert loaded.known("nosuchpkg", "1.0")
+
+
+def test_transient_failure_stays_unknown(pypi_stub, tmp_path, monkeypatch):
+    pypi_stub.routes["/flask/2.0.0/json"] = 503
+    sizes = sizes_with(pypi_stub, tmp_path, monkeypatch)
+    assert sizes.get("flask", "2.0.0") is None
+    assert not sizes.known("flask", "2.0.0")
+
+    pypi_stub.routes["/flask/2.0.0/json"] = wheel_release(100)
+    assert sizes.get("flask", "2.0.0").compressed_size == 100
+    assert sizes.known("flask", "2.0.0")
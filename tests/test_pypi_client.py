@@ -0,0 +1,52 @@
+from pypi_client import PyPIClient
+
+
+def client(pypi_stub, tmp_path, **kwargs):
+    return PyPIClient(base_url=pypi_stub.url, cache_path=str(tmp_path / "pypi.sqlite3"), retries=0, **kwargs)
+
+
+def test_answers_are_cached_across_clients(pypi_stub, tmp_path):
+    pypi_stub.routes["/flask/json"] = {"releases": {"2.0.0": []}}
+    pypi = client(pypi_stub, tmp_path)
+    assert pypi.project("flask") == {"releases": {"2.0.0": []}}
+    assert pypi.project("nosuchpkg") is None
+    assert pypi.project("flask") == {"releases": {"2.0.0": []}}
+    assert (pypi.hits, pypi.fetches) == (1, 2)
+
+    again = client(pypi_stub, tmp_path)
+    assert again.project("flask") == {"releases": {"2.0.0": []}}
+    assert again.project("nosuchpkg") is None
+    assert again.fetches == 0
+    assert again.answered("flask/json") and again.answered("nosuchpkg/json")
+    assert pypi_stub.requests == [("/flask/json", 200), ("/nosuchpkg/json", 404)]
+
+
+def test_failures_are_not_cached(pypi_stub, tmp_path):
+    pypi_stub.routes["/flask/2.0.0/json"] = 503
+    pypi = client(pypi_stub, tmp_path)
+    assert pypi.release("flask", "2.0.0") is None
+    assert not pypi.release_answered("flask", "2.0.0")
+    pypi_stub.routes["/flask/2.0.0/json"] = {"urls": []}
+    assert pypi.release("flask", "2.0.0") == {"urls": []}
+    assert pypi.release_answered("flask", "2.0.0")
+
+
+def test_stale_answers_are_revalidated(pypi_stub, tmp_path):
+    pypi_stub.routes["/flask/json"] = {"releases": {"2.0.0": []}}
+    pypi = client(pypi_stub, tmp_path, max_age=0)
+    assert pypi.project("flask") == {"releases": {"2.0.0": []}}
+    assert pypi.project("flask") == {"releases": {"2.0.0": []}}
+    pypi_stub.routes["/flask/json"] = {"releases": {"2.0.0": [], "2.0.1": []}}
+    assert pypi.project("flask") == {"releases": {"2.0.0": [], "2.0.1": []}}
+    assert [status for _, status in pypi_stub.requests] == [200, 304, 200]
+
+    # a stale answer is still used when pypi cannot be reached
+    pypi_stub.routes["/flask/json"] = 503
+    assert pypi.project("flask") == {"releases": {"2.0.0": [], "2.0.1": []}}
+
+
+def test_map_keeps_the_order(pypi_stub, tmp_path):
+    for i in range(20):
+        pypi_stub.routes[f"/pkg{i}/1.0/json"] = {"i": i}
+    pypi = client(pypi_stub, tmp_path, max_workers=4)
+    assert pypi.map(pypi.release, [(f"pkg{i}", "1.0") for i in range(20)]) == [{"i": i} for i in range(20)]
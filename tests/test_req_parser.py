@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from req_parser import ParseCache, cached_parse, end_string, parse_text, pattern
+from util import parse_requirements
+from workload import Meta
+
+EDGE_CASES = [
+    # unsafe packages after the marker are not pinned
+    "flask==2.0.0\n    # via -r -\n\n# " + end_string + ":\n# setuptools\n",
+    # extras, markers, a url and a range
+    "requests[socks]==2.31.0\n    # via -r -\npywin32==306 ; sys_platform == 'win32'\n    # via -r -\n"
+    "mylib @ https://example.com/mylib.tar.gz\n    # via -r -\nidna>=3.4\n    # via requests\n",
+    # a cycle, and a via list
+    "a==1.0\n    # via\n    #   -r -\n    #   b\nb==2.0\n    # via a\n",
+    # requirements.in style, nothing pinned by pip-compile
+    "numpy\nscipy==1.11.2\n",
+    "",
+]
+
+
+# util.parse_requirements as it was before req_parser, the reference for what the parser must return
+def baseline_parse_requirements(line_str, direct=False):
+    lines = line_str.splitlines()
+    requirements = {}
+    dependencies = {}
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if end_string in line:
+            break
+        match = pattern.match(line.split(';', 1)[0])
+        if match and not lines[i].startswith('#'):
+            package, operator, version = match.groups()
+            if version is None:
+                version = "-1"
+            if operator is None:
+                operator = "=="
+            current_package = package.strip().split("[")[0]
+            requirements[current_package] = [operator.strip(), version.strip()]
+            i += 1
+            first_comment = True
+            while i < len(lines) and lines[i].strip().startswith("#"):
+                line = lines[i].strip()
+                if first_comment:
+                    first_comment = False
+                    dependency = line.removeprefix("# via").strip()
+                else:
+                    dependency = line.removeprefix("#").strip()
+                if '-r' in dependency:
+                    dependency = "direct_req"
+                if dependency:
+                    dependencies.setdefault(current_package, []).append(dependency)
+                i += 1
+        else:
+            i += 1
+
+    versioned_dependencies = {}
+    for pkg, deps in dependencies.items():
+        pkg_key = f"{pkg}=={requirements[pkg][1]}"
+        versioned_dependencies[pkg_key] = [pkg_key]
+        for dep in deps:
+            versioned_dependencies[pkg_key].append(f"{dep}=={requirements[dep][1]}" if dep in requirements else dep)
+    if direct:
+        requirements = {}
+        for pkg in versioned_dependencies:
+            if "direct_req" in versioned_dependencies[pkg]:
+                requirements[pkg.split("==")[0]] = ['==', pkg.split("==")[1]]
+    return requirements, versioned_dependencies
+
+
+# pip-compile style texts over a small set of packages, with random "# via" edges (cycles included)
+def random_txts(n, seed=0):
+    rnd = random.Random(seed)
+    pkgs = [f"pkg{i}" for i in range(40)]
+    txts = []
+    for _ in range(n):
+        chosen = sorted(rnd.sample(pkgs, rnd.randint(1, 8)))
+        lines = ["#", "# autogenerated", "#"]
+        for p in chosen:
+            lines.append(f"{p}=={rnd.choice(['1.0', '2.0'])}")
+            vias = [q for q in chosen if q != p and rnd.random() < 0.3]
+            if rnd.random() < 0.6 or not vias:
+                vias.append("-r -")
+            if len(vias) == 1:
+                lines.append(f"    # via {vias[0]}")
+            else:
+                lines.append("    # via")
+                lines += [f"    #   {v}" for v in vias]
+        txts.append("\n".join(lines) + "\n")
+    return txts
+
+
+@pytest.mark.parametrize("txt", EDGE_CASES + random_txts(200))
+def test_same_as_baseline(txt):
+    assert parse_requirements(txt) == baseline_parse_requirements(txt)
+    assert parse_requirements(txt, direct=True) == baseline_parse_requirements(txt, direct=True)
+
+
+def test_unsafe_packages_are_listed():
+    parsed = parse_text(EDGE_CASES[0])
+    assert parsed.requirements == {"flask": ["==", "2.0.0"]}
+    assert parsed.unsafe == ["setuptools"]
+
+
+def test_none_is_an_error():
+    with pytest.raises(Exception):
+        parse_text(None)
+
+
+def test_parse_cache_hits_and_evicts():
+    cache = ParseCache(maxsize=2)
+    a, b, c = "a==1.0\n", "b==1.0\n", "c==1.0\n"
+    assert cache.get(a) is cache.get(a)
+    cache.get(b)
+    cache.get(a)  # a is now the most recently used
+    cache.get(c)  # evicts b
+    assert cache.stats() == {"hits": 2, "misses": 3, "size": 2}
+    cache.get(b)
+    assert cache.stats()["misses"] == 4
+
+
+def test_parse_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache" / "parse_cache.pkl")
+    cache = ParseCache(path=path)
+    txt = random_txts(1)[0]
+    cache.get(txt)
+    cache.save()
+
+    loaded = ParseCache(path=path)
+    assert loaded.load() == 1
+    assert loaded.get(txt).requirements == parse_text(txt).requirements
+    assert loaded.stats()["hits"] == 1
+
+
+def test_metas_do_not_share_the_cached_requirements():
+    txt = "flask==2.0.0\n    # via -r -\n"
+    meta = Meta.from_dict({"requirements_in": txt, "requirements_txt": txt,
+                           "direct_import_mods": [], "import_mods": []})
+    meta.direct_pkg_with_version["flask"][1] = ""
+    meta.pkg_with_version["flask"][1] = ""
+    assert cached_parse(txt).requirements == {"flask": ["==", "2.0.0"]}
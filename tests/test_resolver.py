@@ -0,0 +1,109 @@
+import json
+import threading
+
+import resolver
+import workload
+from pkg_registry import registry
+from resolver import LocalIndex
+from version import Package, versionMeta
+
+REQUESTS_TXT = """requests==2.31.0
+    # via -r -
+certifi==2023.7.22
+    # via requests
+idna==3.4
+    # via requests
+"""
+
+
+# compiles "a==1\\nb==2\\n" into itself, every pin required directly
+def fake_pip_compile(calls):
+    def pip_compile(requirements_in, print_err=False, use_cache=True):
+        calls.append(requirements_in)
+        return "".join(f"{line}\n    # via -r -\n" for line in requirements_in.splitlines())
+    return pip_compile
+
+
+def local_index(tmp_path):
+    deps_dict, _, _ = workload.deps_from_txts({}, [(REQUESTS_TXT, 1)])
+    path = tmp_path / "deps.json"
+    path.write_text(json.dumps(deps_dict))
+    return LocalIndex.from_json(str(path))
+
+
+def test_local_index_resolves_observed_closures(tmp_path):
+    index = local_index(tmp_path)
+    txt = index.resolve("requests>=2.0\n")
+    assert workload.cached_parse(txt).copy_requirements() == workload.cached_parse(REQUESTS_TXT).copy_requirements()
+    assert index.resolve("requests<2.0\n") is None
+    assert index.resolve("flask\n") is None
+    assert (index.hits, index.misses) == (1, 2)
+
+
+def test_local_index_counts_every_thread(tmp_path):
+    index = local_index(tmp_path)
+
+    def resolve_many():
+        for _ in range(200):
+            index.resolve("requests\n")
+            index.resolve("flask\n")
+
+    threads = [threading.Thread(target=resolve_many) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert (index.hits, index.misses) == (1600, 1600)
+
+
+def test_resolve_all_compiles_each_input_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resolver, "pip_compile", fake_pip_compile(calls))
+    monkeypatch.setattr(resolver, "local_index", None)
+    txts = resolver.resolve_all(["idna==3.4\n", "certifi==2023.7.22\n", "idna==3.4\n"], workers=4)
+    assert txts == ["idna==3.4\n    # via -r -\n", "certifi==2023.7.22\n    # via -r -\n",
+                    "idna==3.4\n    # via -r -\n"]
+    assert sorted(calls) == ["certifi==2023.7.22\n", "idna==3.4\n"]
+
+
+def test_workload_from_packages_resolves_in_one_batch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resolver, "pip_compile", fake_pip_compile(calls))
+    monkeypatch.setattr(resolver, "local_index", None)
+    monkeypatch.setattr(workload, "resolve_all", lambda ins, workers: (calls.append("batch"),
+                                                                        resolver.resolve_all(ins, workers))[1])
+    monkeypatch.setattr(Package, "packages_factory", {
+        "idna": Package("idna", {"3.4": versionMeta({"idna"})}, []),
+        "six": Package("six", {"1.16.0": versionMeta({"six"})}, []),
+    })
+    wl = workload.generate_workload_from_packages(20, 2)
+    assert len(wl.funcs) == len(wl.calls) == 20
+    assert calls[0] == "batch" and calls.count("batch") == 1
+    assert len(calls) == 2  # the one distinct requirements.in, compiled once
+    for f in wl.funcs:
+        assert f.meta.pkg_with_version == {"idna": ["==", "3.4"], "six": ["==", "1.16.0"]}
+        assert f.meta.direct_import_mods == {"idna", "six"}
+
+
+def test_local_index_backtracks_on_conflicts():
+    deps = {"a": {"1.0": {frozenset(["a==1.0", "c==2.0"]): 5, frozenset(["a==1.0", "c==1.0"]): 1}},
+            "b": {"1.0": {frozenset(["b==1.0", "c==1.0"]): 3}},
+            "c": {"1.0": {frozenset(["c==1.0"]): 4}, "2.0": {frozenset(["c==2.0"]): 5}}}
+    index = LocalIndex({name: {version: {frozenset(registry.intern_key(dep) for dep in dep_set): count
+                                         for dep_set, count in dep_sets.items()}
+                               for version, dep_sets in versions.items()}
+                        for name, versions in deps.items()})
+    txt = index.resolve("a\nb\n")
+    assert workload.cached_parse(txt).requirements == {"a": ["==", "1.0"], "b": ["==", "1.0"], "c": ["==", "1.0"]}
+    assert workload.cached_parse(txt).via == {"a": ["direct_req"], "b": ["direct_req"], "c": ["a", "b"]}
+    assert index.resolve("a\nb\nc==2.0\n") is None
+
+
+def test_resolve_falls_back_to_pip_compile(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(resolver, "pip_compile", fake_pip_compile(calls))
+    monkeypatch.setattr(resolver, "local_index", None)
+    resolver.use_local_index(local_index(tmp_path))
+    assert "certifi==2023.7.22" in resolver.resolve("requests\n")
+    assert resolver.resolve("six==1.16.0\n") == "six==1.16.0\n    # via -r -\n"
+    assert calls == ["six==1.16.0\n"]
@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from cost_stats import SMAPS_METRICS
+from import_harness import ImportHarness
+from util import get_pss, read_smaps_rollup
+from workload import gen_measure_code
+
+pytestmark = pytest.mark.skipif(not read_smaps_rollup(), reason="no /proc/self/smaps_rollup")
+
+
+def test_read_smaps_rollup():
+    smaps = read_smaps_rollup()
+    assert set(smaps) == {"rss", "pss", "uss"}
+    assert 0 < smaps["uss"] <= smaps["rss"] and smaps["pss"] <= smaps["rss"]
+    assert read_smaps_rollup(2 ** 30) == {}
+
+
+# the Pss field alone, not the sum of Pss, Pss_Anon, Pss_File, ... like before
+def test_get_pss_is_the_pss_field():
+    process = subprocess.Popen(["sleep", "10"])
+    try:
+        with open(f"/proc/{process.pid}/smaps_rollup") as f:
+            pss = [int(line.split()[1]) for line in f if line.startswith("Pss:")]
+        assert get_pss(process.pid) == pss[0]
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_measure_code_reports_smaps_growth():
+    code = "".join(gen_measure_code(["decimal"], measure_latency=True, measure_mem=True))
+    out = subprocess.run([sys.executable, "-c", code + "print(json.dumps(f({})))"], capture_output=True,
+                         text=True, check=True).stdout
+    event = json.loads(out)
+    assert event["failed"] == []
+    assert event["memory_usage_mb"] > 0
+    assert {"rss_mb", "pss_mb", "uss_mb"} <= set(event)
+    assert event["rss_mb"] >= event["uss_mb"] > 0
+
+
+def test_harness_measures_smaps():
+    harness = ImportHarness(warmup=0, min_trials=2, max_trials=3, timeout=30, tree=False)
+    try:
+        measurement = harness.measure([], [], ["decimal"])
+    finally:
+        harness.close()
+    for metric in SMAPS_METRICS:
+        assert 2 <= measurement.metrics[metric]["n"] <= 3
+    assert measurement.value("i-rss") >= measurement.value("i-uss") > 0
+    assert measurement.tree is None
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from trace_gen import TraceGenerator, alias_table, empirical, mixture, popularity
+
+
+@pytest.mark.parametrize("dist, params", [("uniform", {}), ("zipf", {"s": 1.2}), ("pareto", {"alpha": 0.8})])
+def test_pmfs(dist, params):
+    pmf = popularity(dist, 50, **params)
+    assert len(pmf) == 50
+    assert np.isclose(pmf.sum(), 1.0)
+    assert (np.diff(pmf) <= 1e-15).all()  # rank 1 is the most popular
+
+
+def test_alias_table_reproduces_the_pmf():
+    pmf = mixture([popularity("zipf", 20), empirical([0, 5, 1] + [0] * 17)], [0.5, 0.5])
+    prob, alias = alias_table(pmf)
+    exact = prob / len(pmf)
+    np.add.at(exact, alias, (1.0 - prob) / len(pmf))
+    assert np.allclose(exact, pmf)
+
+
+def test_traces_follow_the_pmf_and_the_seed():
+    pmf = empirical([6, 3, 1, 0])
+    trace = TraceGenerator(pmf, seed=3).sample(200000)
+    assert trace.dtype == np.int32
+    assert np.allclose(np.bincount(trace, minlength=4) / len(trace), pmf, atol=0.01)
+    assert (trace == TraceGenerator(pmf, seed=3).sample(200000)).all()
+    assert (np.concatenate(list(TraceGenerator(pmf, seed=3).chunks(200000))) == trace).all()
+    chunks = TraceGenerator(pmf, seed=3).chunks(200000, chunk_size=65536)
+    assert [len(chunk) for chunk in chunks] == [65536, 65536, 65536, 3392]
+
+
+def test_errors():
+    with pytest.raises(Exception):
+        popularity("lognormal", 10)
+    with pytest.raises(Exception):
+        empirical([0, 0])
+    with pytest.raises(Exception):
+        TraceGenerator([])
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from wheel_cache import WheelCache, parse_dist_filename
+
+
+@pytest.mark.parametrize("filename, key", [
+    ("numpy-1.25.2-cp310-cp310-manylinux_2_17_x86_64.manylinux2014_x86_64.whl", ("numpy", "1.25.2")),
+    ("zope.event-5.0-py3-none-any.whl", ("zope-event", "5.0")),
+    ("Zope_Event-5.0-1-py3-none-any.whl", ("zope-event", "5.0")),
+    ("python-dateutil-2.8.2.tar.gz", ("python-dateutil", "2.8.2")),
+    ("PyYAML-6.0.1.zip", ("pyyaml", "6.0.1")),
+    ("not-a-wheel.whl", None),
+    ("README.txt", None),
+])
+def test_parse_dist_filename(filename, key):
+    assert parse_dist_filename(filename) == key
+
+
+def touch(dir_path, name):
+    with open(os.path.join(dir_path, name), "w"):
+        pass
+
+
+def test_find_picks_up_new_downloads(tmp_path):
+    cache = WheelCache(str(tmp_path))
+    assert not cache.contains("zope.event", "5.0")
+    touch(str(tmp_path), "zope.event-5.0-py3-none-any.whl")
+    touch(str(tmp_path), "zope.event-5.0.tar.gz")
+    # a new file changes the directory mtime, unless the clock is too coarse to tell
+    cache.refresh(force=True)
+    assert sorted(os.path.basename(p) for p in cache.find("Zope_Event", "5.0")) == \
+        ["zope.event-5.0-py3-none-any.whl", "zope.event-5.0.tar.gz"]
+    assert cache.find("zope.event", "5.1") == []
+    assert WheelCache(str(tmp_path / "missing")).find("zope.event", "5.0") == []
@@ -0,0 +1,169 @@
+import csv
+import json
+
+import pytest
+
+import workload
+
+# pip-compile output for "flask==2.0.0", werkzeug and the rest are only pinned as flask's dependencies
+FLASK_TXT = """#
+# This file is autogenerated by pip-compile with Python 3.10
+# by the following command:
+#
+#    pip-compile --output-file=- -
+#
+click==8.1.7
+    # via flask
+flask==2.0.0
+    # via -r -
+itsdangerous==2.1.2
+    # via flask
+jinja2==3.1.2
+    # via flask
+markupsafe==2.1.3
+    # via
+    #   jinja2
+    #   werkzeug
+werkzeug==2.0.1
+    # via flask
+"""
+
+REQUESTS_TXT = """requests==2.31.0
+    # via -r -
+certifi==2023.7.22
+    # via requests
+charset-normalizer==3.2.0
+    # via requests
+idna==3.4
+    # via requests
+urllib3==2.0.4
+    # via requests
+"""
+
+
+def write_csv(path, txts):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["compiled"])
+        for txt in txts:
+            writer.writerow([txt])
+
+
+def test_csv_frequencies_counts_funcs_with_transitive_deps(tmp_path):
+    path = str(tmp_path / "requirements.csv")
+    write_csv(path, [FLASK_TXT, FLASK_TXT, REQUESTS_TXT, FLASK_TXT, ""])
+    wl = workload.generate_workloads_from_txts([REQUESTS_TXT, FLASK_TXT])
+    assert list(wl.csv_frequencies(path)) == [1, 3]
+
+
+def test_csv_frequencies_of_streamed_workload(tmp_path):
+    path = str(tmp_path / "requirements.csv")
+    write_csv(path, [FLASK_TXT, REQUESTS_TXT, FLASK_TXT])
+    out = str(tmp_path / "workload.json")
+    workload.stream_workload_from_csv(path, out)
+    wl = workload.Workload(workload_path=out)
+    frequencies = wl.csv_frequencies(path)
+    assert list(frequencies) == [2, 1]
+    wl.gen_trace(100, weights=frequencies, seed=1)
+    assert len(wl.calls) == 100
+
+
+def test_streamed_deps_count_every_row(tmp_path):
+    rows = [FLASK_TXT, REQUESTS_TXT, FLASK_TXT, FLASK_TXT]
+    path = str(tmp_path / "requirements.csv")
+    write_csv(path, rows)
+    out = str(tmp_path / "workload.json")
+    workload.stream_workload_from_csv(path, out)
+    wl = workload.Workload(workload_path=out)
+    assert len(wl.funcs) == 2
+
+    per_row, _, _ = workload.generate_workloads_from_txts(rows).parse_deps({})
+    weighted, _, _ = wl.parse_deps({}, weighted=True)
+    streamed, _, _ = workload.deps_from_txts({}, ((txt, 1) for txt in workload.iter_compiled(path)))
+    assert weighted == per_row == streamed
+    assert per_row["werkzeug"]["2.0.1"] == {"markupsafe==2.1.3,werkzeug==2.0.1": 3}
+
+
+def test_pkg_with_version_follows_added_funcs():
+    wl = workload.generate_workloads_from_txts([FLASK_TXT])
+    assert wl.pkg_with_version["werkzeug"] == {"2.0.1"}
+    assert "requests" not in wl.pkg_with_version
+    wl.add(workload.generate_workloads_from_txts([REQUESTS_TXT]))
+    assert wl.pkg_with_version["requests"] == {"2.31.0"}
+    assert wl.pkg_with_version["werkzeug"] == {"2.0.1"}
+
+
+def test_deps_keep_name_version_strings(tmp_path):
+    wl = workload.generate_workloads_from_txts([FLASK_TXT, FLASK_TXT])
+    deps_dict, deps_set, _ = wl.parse_deps({"idna": {"3.4": {"idna": "3.4"}}})
+    assert deps_set["werkzeug"]["2.0.1"] == [{"markupsafe==2.1.3", "werkzeug==2.0.1"}]
+    assert deps_set["idna"]["3.4"] == [{"idna==3.4"}]
+    assert deps_dict["flask"]["2.0.0"] == {
+        "click==8.1.7,flask==2.0.0,itsdangerous==2.1.2,jinja2==3.1.2,markupsafe==2.1.3,werkzeug==2.0.1": 2}
+
+    path = tmp_path / "deps.json"
+    path.write_text(json.dumps(deps_dict))
+    deps = workload.load_all_deps(str(path))
+    assert deps["werkzeug"]["2.0.1"] == {frozenset({"markupsafe==2.1.3", "werkzeug==2.0.1"}): 2}
+
+
+def test_gen_trace_is_reproducible_with_arrivals():
+    wl = workload.generate_workloads_from_txts([FLASK_TXT, REQUESTS_TXT])
+    wl.gen_trace(50, seed=7)
+    names = [call["name"] for call in wl.calls]
+    wl.gen_trace(50, seed=7, arrival={"process": "poisson", "rate": 10})
+    assert [call["name"] for call in wl.calls] == names
+    times = [call["t"] for call in wl.calls]
+    wl.gen_trace(50, seed=7, arrival={"process": "poisson", "rate": 10})
+    assert [call["t"] for call in wl.calls] == times
+    assert wl.arrival == {"process": "poisson", "rate": 10}
+
+
+def test_dep_matrices():
+    txt = "flask==2.0.0\n    # via -r -\nwerkzeug==2.0.1\n    # via flask\n"
+    wl = workload.generate_workloads_from_txts([txt])
+    factory = {"flask": workload.Package("flask", {"2.0.0": workload.versionMeta(
+                   set(), {"werkzeug": ["==", "2.0.1"], "click": ["==", "8.1.7"]})}, []),
+               "werkzeug": workload.Package("werkzeug", {"2.0.1": workload.versionMeta()}, [])}
+    df = wl.dep_matrix(factory)
+    assert list(df.columns) == ["flask==2.0.0", "werkzeug==2.0.1"]
+    assert df.loc["werkzeug==2.0.1", "flask==2.0.0"] == 1
+    assert df.loc["click==8.1.7", "flask==2.0.0"] == 1
+    assert df.loc["flask==2.0.0", "werkzeug==2.0.1"] == 0
+    assert (wl.sparse_dep_matrix(factory).to_dense() == df).all().all()
+
+    del factory["werkzeug"]
+    with pytest.raises(Exception, match="werkzeug"):
+        wl.dep_matrix(factory)
+
+
+def test_package_dep_matrix_is_a_dataframe(monkeypatch):
+    monkeypatch.setattr(workload.Package, "packages_factory", {
+        "flask": workload.Package("flask", {"2.0.0": workload.versionMeta(set(), {"werkzeug": ["==", "2.0.1"]})}, []),
+        "werkzeug": workload.Package("werkzeug", {"2.0.1": workload.versionMeta()}, [])})
+    df = workload.Package.dep_matrix()
+    assert df.loc["werkzeug==2.0.1", "flask==2.0.0"] == 1
+    assert df.loc["flask==2.0.0", "werkzeug==2.0.1"] == 0
+    assert workload.Package.sparse_dep_matrix().shape == df.shape
+
+
+def test_func_lookup_index(tmp_path):
+    wl = workload.generate_workloads_from_txts([FLASK_TXT, REQUESTS_TXT, FLASK_TXT])
+    other = workload.generate_workloads_from_txts([REQUESTS_TXT])
+    wl.add(other)
+    assert wl.find_func("fn4") is wl.funcs[3]
+    assert other.find_func("fn4") is other.funcs[0]
+    assert wl.find_func("fn5") is None
+    # funcs made from a txt have all of its pins as direct requirements
+    requests_pkgs = workload.cached_parse(REQUESTS_TXT).copy_requirements()
+    assert [f.name for f in wl.find_funcs_by_pkg(requests_pkgs)] == ["fn2", "fn4"]
+    flask_pkgs = {name.capitalize(): tuple(op_version)
+                  for name, op_version in workload.cached_parse(FLASK_TXT).requirements.items()}
+    assert [f.name for f in wl.find_funcs_by_pkg(flask_pkgs)] == ["fn1", "fn3"]
+    assert wl.find_funcs_by_pkg({"requests": ["==", "2.31.0"]}) == []
+
+    for path in [str(tmp_path / "workload.json"), str(tmp_path / "workload.rbw")]:
+        wl.save(path)
+        loaded = workload.Workload(workload_path=path)
+        assert loaded.find_func("fn3").meta.requirements_txt == FLASK_TXT
+        assert [f.name for f in loaded.find_funcs_by_pkg(requests_pkgs)] == ["fn2", "fn4"]
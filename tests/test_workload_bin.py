@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+
+import workload
+from workload_bin import BinaryWorkload, decode_code, dict_to_binary, encode_code, is_binary, save_binary_chunks
+
+TXTS = ["flask==2.0.0\n    # via -r -\n", "requests==2.31.0\n    # via -r -\n", ""]
+
+
+def workload_dict():
+    wl = workload.generate_workloads_from_txts(TXTS)
+    wl.funcs[0].meta.import_mods = {"flask"}
+    wl.gen_trace(40, seed=1, arrival={"process": "poisson", "rate": 5})
+    return wl.to_dict()
+
+
+def test_json_round_trip(tmp_path):
+    wl_dict = json.loads(json.dumps(workload_dict()))
+    path = str(tmp_path / "workload.rbw")
+    dict_to_binary(wl_dict, path)
+    assert is_binary(path)
+    store = BinaryWorkload(path)
+    assert len(store) == 3
+    assert store.to_dict() == wl_dict
+
+    wl = workload.Workload(workload_path=path)
+    assert wl.funcs[1].meta.requirements_txt == TXTS[1]
+    assert wl.calls == wl_dict["calls"]
+    assert wl.arrival == {"process": "poisson", "rate": 5}
+
+
+def test_code_templates_are_lossless():
+    lines = ["import time\n", "    for mod in ['flask', 'jinja2']:\n", "    return 'fn12'\n"]
+    template, modules = encode_code(lines, "fn12")
+    assert modules == "['flask', 'jinja2']"
+    assert decode_code(template, "fn12", modules) == lines
+    assert decode_code(template, "fn3", "[]")[1:] == ["    for mod in []:\n", "    return 'fn3'\n"]
+
+
+def test_calls_streamed_in_chunks(tmp_path):
+    wl_dict = workload_dict()
+    path = str(tmp_path / "streamed.rbw")
+    chunks = [(np.array([0, 2, 1]), np.array([0.5, 1.0, 1.5])), (np.array([1]), np.array([2.0]))]
+    assert save_binary_chunks(path, wl_dict["funcs"], chunks, {"empty_pkgs_funcs": ["fn3"]}) == 4
+    store = BinaryWorkload(path)
+    assert store.call_funcs.tolist() == [0, 2, 1, 1]
+    assert [call["t"] for call in store.calls()] == [0.5, 1.0, 1.5, 2.0]
+    assert store.extras == {"empty_pkgs_funcs": ["fn3"]}
+
+    with pytest.raises(Exception):
+        save_binary_chunks(path, wl_dict["funcs"], [(np.array([0]), None), (np.array([1]), np.array([1.0]))])
+    # the file written before is left as it was
+    assert BinaryWorkload(path).call_funcs.tolist() == [0, 2, 1, 1]
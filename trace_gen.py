@@ -0,0 +1,117 @@
+import numpy as np
+
+# calls drawn per step: the temporaries of one step are a few bytes per call, whatever the trace length
+CHUNK_SIZE = 1 << 20
+
+
+# popularity of n functions, the i-th function has rank i + 1. every builder returns a pmf (float64, sums to 1)
+
+def uniform(n):
+    return np.full(n, 1.0 / n)
+
+
+# zipf truncated to n ranks: p(k) ~ 1 / k^s, k = 1..n. unlike np.random.zipf + mod, the tail is not folded back
+def bounded_zipf(n, s=1.5):
+    pmf = np.arange(1, n + 1, dtype=np.float64) ** -s
+    return pmf / pmf.sum()
+
+
+# pareto(alpha) with x_m = 1, rank k gets the mass of [k, k + 1) and the mass beyond n + 1 is cut off
+def pareto(n, alpha=1.0):
+    edges = np.arange(1, n + 2, dtype=np.float64) ** -alpha
+    pmf = edges[:-1] - edges[1:]
+    return pmf / pmf.sum()
+
+
+# p(i) ~ counts[i] + smoothing, e.g. how often the i-th function's requirements occur in requirements.csv
+# (Workload.csv_frequencies). smoothing > 0 keeps functions never seen in the csv callable
+def empirical(counts, smoothing=0.0):
+    pmf = np.asarray(counts, dtype=np.float64) + smoothing
+    if pmf.sum() <= 0:
+        raise Exception("empirical popularity needs at least one positive count")
+    return pmf / pmf.sum()
+
+
+# weighted sum of pmfs over the same n functions, e.g. mixture([bounded_zipf(n), uniform(n)], [0.9, 0.1])
+def mixture(pmfs, weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    return sum(w * np.asarray(pmf, dtype=np.float64) for w, pmf in zip(weights, pmfs))
+
+
+DISTRIBUTIONS = {
+    "uniform": uniform,
+    "zipf": bounded_zipf,
+    "pareto": pareto,
+}
+
+
+# the pmf of one of DISTRIBUTIONS by name, params are passed to its builder, e.g. popularity("zipf", n, s=1.2)
+def popularity(dist, n, **params):
+    if dist not in DISTRIBUTIONS:
+        raise Exception(f"unknown popularity distribution {dist}, expected one of {list(DISTRIBUTIONS)}")
+    return DISTRIBUTIONS[dist](n, **params)
+
+
+# Vose's alias table: draw i uniformly, keep it with probability prob[i], otherwise take alias[i]
+def alias_table(pmf):
+    n = len(pmf)
+    scaled = np.asarray(pmf, dtype=np.float64) * n
+    prob = np.ones(n)
+    alias = np.arange(n, dtype=np.int32)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # what is left is 1 up to rounding errors
+    return prob, alias
+
+
+class TraceGenerator:
+    """
+    Draws function indices (int32) from a popularity pmf with numpy's Generator and an alias table,
+    O(1) per call and CHUNK_SIZE calls at a time.
+
+    The same pmf, seed and trace length always give the same trace. sample() returns the whole trace as
+    one int32 array, chunks() yields it piece by piece for traces that should not be held in memory at once.
+    """
+
+    def __init__(self, pmf, seed=None):
+        if len(pmf) == 0:
+            raise Exception("cannot generate a trace without functions")
+        if len(pmf) > np.iinfo(np.int32).max:
+            raise Exception(f"{len(pmf)} functions do not fit int32 indices")
+        self.prob, self.alias = alias_table(pmf)
+        self.rng = np.random.default_rng(seed)
+
+    def draw(self, size):
+        idx = self.rng.integers(0, len(self.prob), size, dtype=np.int32)
+        keep = self.rng.random(size) < self.prob[idx]
+        return np.where(keep, idx, self.alias[idx])
+
+    def chunks(self, total, chunk_size=CHUNK_SIZE):
+        for start in range(0, total, chunk_size):
+            yield self.draw(min(chunk_size, total - start))
+
+    def sample(self, total):
+        trace = np.empty(total, dtype=np.int32)
+        start = 0
+        for chunk in self.chunks(total):
+            trace[start:start + len(chunk)] = chunk
+            start += len(chunk)
+        return trace
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    n, total = int(sys.argv[1]), int(sys.argv[2])
+    t0 = time.time()
+    trace = TraceGenerator(bounded_zipf(n), seed=0).sample(total)
+    t1 = time.time()
+    print(f"{total} calls over {n} functions in {t1 - t0:.2f}s, "
+          f"top function share {np.bincount(trace, minlength=n)[0] / total:.3f}")
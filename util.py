@@ -1,4 +1,3 @@
-import fnmatch
 import glob
 import json
 import os
@@ -8,26 +7,16 @@ import shutil
 import signal
 import subprocess
 import time
-from collections import deque
+from collections.abc import Mapping
 
 import pandas as pd
-import requests
 
 from config import *
+from pypi_client import pypi
+from req_parser import pattern, end_string, parse_text
 
 dep_pattern = re.compile(r'#\s+via\s+(.+)')
 
-pattern = re.compile(
-    r'([^<>=!;]+)'              # pkg name or url
-    r'([<>!=]=?)?'              # version operator
-    r'([^<>=!;]+)?'             # version
-)
-
-
-end_string = "The following packages are considered to be unsafe in a requirements file"
-
-def normalize_pkg(pkg: str) -> str:
-    return pkg.lower().replace("_", "-")
 
 def parse_requirements(line_str, direct=False):
     """
@@ -45,108 +34,21 @@ def parse_requirements(line_str, direct=False):
 
     Notes:
         dependencies(A)=[B, C] means B,C depends on A
+        hot paths that only need one of the two results should call req_parser.parse_text directly
     """
-
-    if line_str is None:
-        raise Exception("requirement.in or txt is None")
-    lines = line_str.splitlines()
-
-    requirements = {}
-    dependencies = {}
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if end_string in line:
-            break
-        # match = pattern.match(line)
-
-        parts = line.split(';', 1)
-        package_part = parts[0]
-        condition_part = parts[1].strip() if len(parts) > 1 else None
-        match = pattern.match(package_part)
-
-        if match and not lines[i].startswith('#'):
-            # todo: handle condition operator and value
-            package, operator, version = match.groups()
-            if version is None:
-                version = "-1"
-            if operator is None:
-                operator = "=="
-            current_package = package.strip().split("[")[0]
-            requirements[current_package] = [operator.strip(), version.strip()] if version else None
-
-            i += 1
-            isFirstComment = True
-            # there could be a few comments followed <pkg>==<ver>, specifying who requires this pkg
-            while i < len(lines) and lines[i].strip().startswith("#"):
-                line = lines[i].strip()
-                if isFirstComment:
-                    isFirstComment = False
-                    dependency = line.removeprefix("# via").strip()  # get rid of the '# via', the rest is the package name
-                else:
-                    dependency = line.removeprefix("#").strip()
-
-                if '-r' in dependency:  # Replace with shorthand
-                    dependency = "direct_req"
-
-                if dependency is None or dependency == "":
-                    pass
-                elif current_package in dependencies:
-                    dependencies[current_package].append(dependency)
-                else:
-                    dependencies[current_package] = [dependency]
-                i += 1
-        else:
-            i += 1
-
-    # add the keys and values of the dependencies dict with version
-    versioned_dependencies = {}
-    for pkg, deps in dependencies.items():
-        pkg_key = f"{pkg}=={requirements[pkg][1]}"
-        versioned_dependencies[pkg_key] = [pkg_key]
-        for dep in deps:
-            if dep in requirements:
-                if dep is None or requirements.get(dep) is None:
-                    print(dep)
-                dep_key = f"{dep}=={requirements[dep][1]}"
-                versioned_dependencies[pkg_key].append(dep_key)
-            else:
-                versioned_dependencies[pkg_key].append(dep)
+    parsed = parse_text(line_str)
     if direct:
-        requirements = {}
-        for pkg in versioned_dependencies.keys():
-            if "direct_req" in versioned_dependencies[pkg]:
-                requirements[pkg.split("==")[0]] = ['==', pkg.split("==")[1]]
-    return requirements, versioned_dependencies
-
-def find_compressed_files(dir_path, pattern):
-    case_insensitive_pattern = pattern.lower()
-    matched_files = []
-
-    with os.scandir(dir_path) as it:
-        for entry in it:
-            if entry.is_file():
-                file = entry.name
-                parts = file.split('-', 1)
-                if len(parts) > 1:
-                    normalized_file = parts[0].lower().replace('.', '_') + '-' + parts[1].lower()
-                else:
-                    normalized_file = file.lower()
-
-                if fnmatch.fnmatch(normalized_file, case_insensitive_pattern):
-                    matched_files.append(os.path.join(dir_path, file))
-
-    return matched_files
+        return parsed.direct_requirements(), parsed.versioned_dependencies()
+    return parsed.requirements, parsed.versioned_dependencies()
 
 def normalize_pkg(pkg: str) -> str:
     return pkg.lower().replace("-", "_")
 
 
 def handle_sets(obj):
-    if isinstance(obj, set):
+    if isinstance(obj, (set, frozenset)):
         return list(obj)
-    elif isinstance(obj, dict):
+    elif isinstance(obj, Mapping):
         return {k: handle_sets(v) for k, v in obj.items()}
     return obj
 
@@ -196,20 +98,40 @@ def kill_worker(pid, options={}):
         subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
 
+# split the cpus this process may run on into `workers` disjoint sets, one per worker
+def split_cpus(workers):
+    cpus = sorted(os.sched_getaffinity(0))
+    workers = max(1, min(workers, len(cpus)))
+    per_worker = len(cpus) // workers
+    return [cpus[i * per_worker:(i + 1) * per_worker] for i in range(workers)]
+
+
 # it is an implementation of interface on OL platform
 def get_memory_usage():
     get_total_pss("/sys/fs/cgroup/default-ol-sandboxes")
 
-def get_pss(pid):
-    pss = 0
-    smaps_file = f"/proc/{pid}/smaps_rollup"
-    if os.path.exists(smaps_file):
-        with open(smaps_file, "r") as f:
+# memory of a process in kB from /proc/<pid>/smaps_rollup: {"rss", "pss", "uss"}, uss = private clean + dirty,
+# empty if it cannot be read. it uses no imports: the generated measuring code and import_harness' zygote
+# carry a copy of it
+def read_smaps_rollup(pid="self"):
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
             for line in f:
-                if "Pss:" in line:
-                    pss_value = int(line.split()[1])
-                    pss += pss_value
-    return pss
+                parts = line.split()
+                # skip the first line, the address range of the rollup
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return {}
+    if "Rss" not in fields:
+        return {}
+    return {"rss": fields["Rss"], "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+def get_pss(pid):
+    return read_smaps_rollup(pid).get("pss", 0)
 
 def get_total_pss(base):
     total_pss = 0
@@ -245,58 +167,9 @@ def clean_registry():
             shutil.rmtree(item_path)
 
 
-def construct_dependency_matrix(dependencies):
-    all_packages = list(set(dependencies.keys()).union(*dependencies.values()))
-
-    matrix = pd.DataFrame(0, index=all_packages, columns=all_packages)
-    for pkg, deps in dependencies.items():
-        for dep in deps:
-            matrix.loc[pkg, dep] = 1
-
-    return matrix
-
-
-def get_package_dependencies(matrix):
-    """Get dependencies for each package based on the matrix."""
-    package_deps = {}
-    for pkg in matrix.columns:
-        package_deps[pkg] = get_recursive_dependencies(pkg, matrix)
-    return package_deps
-
-def get_recursive_dependencies(pkg, matrix):
-    visited = set()
-    all_deps = []
-    queue = deque([pkg])
-
-    while queue:
-        current_pkg = queue.popleft()
-
-        if current_pkg in visited:
-            continue
-
-        visited.add(current_pkg)
-
-        immediate_deps = matrix.index[matrix[current_pkg] == 1].tolist()
-        all_deps.extend(immediate_deps)
-
-        for dep in immediate_deps:
-            if dep not in visited:
-                queue.append(dep)
-
-    return list(set(all_deps))  # Removing duplicates
-
-
-
 def compressed_size(pkg_name, version):
-    url = f"https://pypi.org/pypi/{pkg_name}/{version}/json"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return None
-    try:
-        data = response.json()
-    except json.JSONDecodeError:
-        print("Invalid JSON received.")
-        print(url)
+    data = pypi.release(pkg_name, version)
+    if data is None:
         return None
 
     whl_size = None
@@ -4,8 +4,9 @@ import random
 from typing import Dict, Optional
 
 
-import requests
 from config import *
+from pypi_client import pypi
+from sparse_matrix import SparseMatrix
 from util import *
 
 from packaging.version import Version
@@ -82,8 +83,9 @@ class Package:
     # compatible_only: only include versions that are compatible with python 3.10 and ubuntu 22.04
     # this function fetches versions from pypi.org
     def get_versions(self, stable_only=True, compatible_only=True):
-        response = requests.get(f"https://pypi.org/pypi/{self.name}/json")
-        data = response.json()
+        data = pypi.project(self.name)
+        if data is None:
+            return []
         versions = list(data["releases"].keys())
 
         ban_list = ["b", "beta", "c", "rc"]
@@ -187,21 +189,35 @@ class Package:
             return top_mods
 
     # before calling this function, make sure every package you desired is in the factory
+    # [B, A] = 1 means A requires B, requirements missing from the factory are appended as extra rows
     # todo: temporarily assume self-contained
     @classmethod
-    def dep_matrix(cls):
+    def sparse_dep_matrix(cls):
         names_with_version = []
         for name, pkg in cls.packages_factory.items():
             for version in pkg.available_versions:
                 names_with_version.append(name + "==" + version)
         names_with_version = sorted(names_with_version)
-        df = pd.DataFrame(columns=names_with_version, index=names_with_version).fillna(0)
+        rows = list(names_with_version)
+        row_idx = {name: i for i, name in enumerate(rows)}
+        col_idx = dict(row_idx)
+
+        entries = []
         for name, pkg in cls.packages_factory.items():
             for version, version_meta in pkg.available_versions.items():
                 assert version_meta is not None
                 for req, op_version in version_meta.requirements_dict.items():
                     req_str = req + op_version[0] + op_version[1]
-                    df.loc[req_str, name + "==" + version] = 1
+                    if req_str not in row_idx:
+                        row_idx[req_str] = len(rows)
+                        rows.append(req_str)
+                    entries.append((row_idx[req_str], col_idx[name + "==" + version]))
+        return SparseMatrix.from_entries(entries, rows, names_with_version)
+
+    # return a df, like Workload.dep_matrix
+    @classmethod
+    def dep_matrix(cls):
+        return cls.sparse_dep_matrix().to_dense()
 
     @classmethod
     def cost_dict(cls):
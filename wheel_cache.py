@@ -0,0 +1,75 @@
+import os
+import re
+import threading
+
+# sdist extensions pip download may write, wheels end with .whl
+SDIST_EXTS = [".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".zip"]
+
+
+# PEP 503 name, so zope.event, zope-event and Zope_Event are the same package
+def canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+# (canonical name, version) of a wheel or sdist file name, None if it is neither.
+# wheels (PEP 427) are {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl, the name has no '-'.
+# sdists are {name}-{version}.tar.gz and friends, older ones keep '-' and '.' in the name, never in the version
+def parse_dist_filename(filename):
+    if filename.endswith(".whl"):
+        parts = filename[:-len(".whl")].split("-")
+        if len(parts) not in (5, 6):
+            return None
+        return canonical_name(parts[0]), parts[1].lower()
+    for ext in SDIST_EXTS:
+        if filename.endswith(ext):
+            name, sep, version = filename[:-len(ext)].rpartition("-")
+            if not sep or not name:
+                return None
+            return canonical_name(name), version.lower()
+    return None
+
+
+class WheelCache:
+    """
+    An index of the wheels and sdists in a pip download directory: (canonical name, version) -> [paths].
+
+    The directory is listed again only when its mtime changed (pip download added a file), and only the
+    file names not seen before are parsed, so a lookup no longer lists and matches the whole cache.
+    """
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self.index = {}  # (name, version) -> [paths]
+        self.seen = set()  # file names already indexed
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    # pick up the files added since the last refresh, force: even if the directory mtime did not change
+    def refresh(self, force=False):
+        with self.lock:
+            try:
+                mtime = os.stat(self.dir_path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self.mtime and not force:
+                return
+            self.mtime = mtime
+            with os.scandir(self.dir_path) as it:
+                for entry in it:
+                    if entry.name in self.seen or not entry.is_file():
+                        continue
+                    self.seen.add(entry.name)
+                    key = parse_dist_filename(entry.name)
+                    if key is not None:
+                        self.index.setdefault(key, []).append(entry.path)
+
+    def find(self, name, version):
+        self.refresh()
+        with self.lock:
+            return list(self.index.get((canonical_name(name), version.lower()), []))
+
+    def contains(self, name, version):
+        return len(self.find(name, version)) > 0
+
+
+wheel_cache = WheelCache("/tmp/.cache")
@@ -1,25 +1,33 @@
+import inspect
 import json
 import random
-import threading
 import time
 import traceback
+from functools import lru_cache
 from subprocess import check_output
-from typing import List
+from types import MappingProxyType
+from typing import Dict, List
 
 import pandas as pd
 import numpy as np
-import requests
 import send_req
-import concurrent.futures
-import json
 from platform_adapter.interface import PlatformAdapter
 
+import azure_trace
+from arrivals import arrival_times
 from config import *
+from dep_graph import transitive_closure
+from pkg_registry import registry
+from pkg_size import package_sizes
+from pypi_client import pypi
+from req_parser import cached_parse, parse_cache
+from resolver import resolve, resolve_all
+from sparse_matrix import SparseMatrix
+from trace_gen import TraceGenerator, empirical, popularity
 from util import *
 from version import *
-
-packages_size = {}
-packages_lock = threading.Lock()
+from workload_bin import BinaryWorkload, dict_to_binary, is_binary, save_binary, save_binary_chunks
+from workload_stream import JsonArrayWriter, WorkloadWriter, iter_compiled, text_key
 
 def generate_non_measure_code_lines(modules, return_val):
     return [
@@ -40,8 +48,11 @@ def gen_measure_code(modules, measure_latency=False, measure_mem=False):
         "os.environ['OPENBLAS_NUM_THREADS'] = '2'\n"
     ]
     if measure_mem:
+        # smaps_rollup (rss/pss/uss) also sees native allocations and mapped .so files, tracemalloc does not
         code_lines += ["import tracemalloc, gc, sys, json\n",
-                       "gc.collect()\n",
+                       "gc.collect()\n"]
+        code_lines += inspect.getsource(read_smaps_rollup).splitlines(keepends=True)
+        code_lines += ["smaps_start = read_smaps_rollup()\n",
                        "tracemalloc.start()\n"]
     if measure_latency:
         code_lines += ["t_StartImport = time.time()*1000\n"]
@@ -56,6 +67,9 @@ def gen_measure_code(modules, measure_latency=False, measure_mem=False):
     ]
     if measure_latency:
         code_lines += [ "t_EndImport = time.time()*1000\n"]
+    if measure_mem:
+        code_lines += ["smaps_end = read_smaps_rollup()\n",
+                       "tracer_kb = tracemalloc.get_tracemalloc_memory() / 1024\n"]
 
     code_lines.append("def f(event):\n")
     if measure_latency:
@@ -69,91 +83,31 @@ def gen_measure_code(modules, measure_latency=False, measure_mem=False):
     if measure_mem:
         code_lines += ["    mb = (tracemalloc.get_traced_memory()[0] - tracemalloc.get_tracemalloc_memory()) / 1024 / 1024\n"]
         code_lines += ["    event['memory_usage_mb'] = mb\n"]
+        # e.g. event['uss_mb'], without the memory tracemalloc itself uses
+        code_lines += ["    for key in smaps_end:\n",
+                       "        event[key + '_mb'] = (smaps_end[key] - smaps_start.get(key, 0) - tracer_kb) / 1024\n"]
     code_lines.append("    return event\n")
     return code_lines
 
 
-def fetch_package_size(pkg_name, version):
-    if "github.com" in pkg_name:
-        return None
-    with packages_lock:
-        if packages_size.get(pkg_name) is not None and packages_size.get(pkg_name).get(version) is not None:
-            return pkg_name, version, packages_size[pkg_name][version]
-
-    size = get_whl_size(pkg_name, version)
-    if size is None:
-        print(f"cannot find size for {pkg_name} {version} in pypi")
-        return None
-    with packages_lock:
-        if pkg_name not in packages_size:
-            packages_size[pkg_name] = {}
-        packages_size[pkg_name][version] = size
-    return pkg_name, version, size
-
-
-def get_whl_size(pkg_name, version):
-    url = f"https://pypi.org/pypi/{pkg_name}/{version}/json"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return None
-
-    try:
-        data = response.json()
-    except json.JSONDecodeError:
-        print("Invalid JSON received.")
-        print(url)
-        return None
-
-    whl_size = None
-    linux_whl_size = None
-    tar_gz_size = None
-    for release in data["urls"]:
-        if release["packagetype"] == "bdist_wheel":
-            if "linux" in release["filename"]:
-                linux_whl_size = release["size"]
-            else:
-                whl_size = release["size"]
-        elif release["packagetype"] == "sdist":
-            tar_gz_size = release["size"]
-
-    if linux_whl_size is not None:
-        return linux_whl_size * 7
-    elif whl_size is not None:
-        return whl_size * 7
-    elif tar_gz_size is not None:
-        return tar_gz_size * 10
-
-
 # use this function to get all the pkgs size and store them in json.
 def get_whl(pkgs):
-    tasks = []
-    finished = 0
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-            for pkg in pkgs:
-                pkg_name = pkg.split("==")[0]
-                version = pkg.split("==")[1]
-                tasks.append((pkg_name, version))
-            print("need to find", len(tasks), "in total")
-            futures = [executor.submit(fetch_package_size, pkg_name, version) for pkg_name, version in tasks]
-
-            for future in concurrent.futures.as_completed(futures):
-                future.result()
-                finished += 1
-                if finished % 100 == 0:
-                    print("find", finished, "pkg size")
+        package_sizes.fetch_all(pkgs)
     except Exception as e:
         print(e)
     # Save to JSON file anyway
+    package_sizes.save()
     with open('packages_disk_size.json', 'w') as f:
-        json.dump(packages_size, f, indent=2)
+        json.dump(package_sizes.disk_sizes(), f, indent=2)
 
 
-def get_top_n_packages(filtered_df , n=500):
+# texts: compiled requirements.txt texts, e.g. workload_stream.iter_compiled(requirements_csv)
+def get_top_n_packages(texts, n=500):
     packages_appear_times = {}
 
-    for col in filtered_df["compiled"]:
-        requirements, _ = parse_requirements(col)
+    for col in texts:
+        requirements = cached_parse(col).requirements
         if any([x in requirements.keys() for x in blacklist]):
             continue
         for pkg_name, op_version in requirements.items():
@@ -163,11 +117,11 @@ def get_top_n_packages(filtered_df , n=500):
             packages_appear_times[key] = packages_appear_times.get(key, 0) + 1
 
     print(f"there are {len(packages_appear_times)} unique packages in total")
+    # if n=-1, return all pkgs
     if n == -1:
-        return _, packages_appear_times
+        return dict(packages_appear_times), packages_appear_times
 
     sorted_packages = sorted(packages_appear_times.items(), key=lambda x: x[1], reverse=True)
-    # if n=-1, return all pkgs
     top_n_packages = sorted_packages[:n]
     return dict(top_n_packages), packages_appear_times
 
@@ -187,6 +141,72 @@ def generate_workloads_from_txts(txts):
     return wl
 
 
+# n funcs, each requiring k random packages of Package.packages_factory at the version choose_version picks,
+# and importing their top-level modules. all requirements.in are resolved at once (Workload.addFuncs)
+def generate_workload_from_packages(n, k=1):
+    names = list(Package.packages_factory)
+    packages_with_versions, imports = [], []
+    for _ in range(n):
+        pkgs, mods = {}, set()
+        for name in sorted(random.sample(names, min(k, len(names)))):  # sorted, so equal sets compile once
+            version, version_meta = Package.packages_factory[name].choose_version()
+            pkgs[name] = ["==", version]
+            if version_meta is not None:
+                mods |= set(version_meta.top_level)
+        packages_with_versions.append(pkgs)
+        imports.append(mods)
+    wl = Workload()
+    for name in wl.addFuncs(packages_with_versions, imports):
+        wl.addCall(name)
+    return wl
+
+
+# pkgs: {pkg_name: {versions}}, true if every versioned pkg of requirements is in it
+def requirements_in_pkgs(requirements, pkgs):
+    for pkg_name, op_version in requirements.items():
+        pkg_name = pkg_name.split("[")[0]
+        if pkg_name not in pkgs or op_version[1] not in pkgs[pkg_name]:
+            return False
+    return True
+
+
+# the workload of generate_workloads_from_txts, streamed from requirements.csv to out_path (see workload_stream.py).
+# pkgs: {pkg_name: {versions}}, rows needing a pkg outside it are left out, None keeps every row.
+# a row with the same compiled text as an earlier one adds a call of that row's func instead of a new func,
+# so per-row counts (e.g. parse_deps(..., weighted=True)) are counts of calls, not of funcs.
+# txts_path: also write the compiled texts of the funcs there, as a json list
+def stream_workload_from_csv(csv_path, out_path, pkgs=None, txts_path=None, chunksize=CSV_CHUNK_ROWS):
+    writer = WorkloadWriter(out_path)
+    txts_file = open(txts_path, 'w') if txts_path else None
+    txts = JsonArrayWriter(txts_file, indent=2) if txts_file else None
+    seen = {}  # {text_key: func index, -1 if the row is left out}
+    rows = 0
+    for txt in iter_compiled(csv_path, chunksize):
+        rows += 1
+        key = text_key(txt)
+        idx = seen.get(key)
+        if idx is None:
+            requirements = cached_parse(txt).requirements
+            if pkgs is not None and not requirements_in_pkgs(requirements, pkgs):
+                idx = -1
+            else:
+                name = writer.next_name()
+                meta = {"requirements_in": txt, "requirements_txt": txt, "direct_import_mods": [], "import_mods": []}
+                func = {"name": name, "meta": meta, "code": generate_non_measure_code_lines("[]", name)}
+                idx = writer.add_func(func, requirements)
+                if txts is not None:
+                    txts.append(txt)
+            seen[key] = idx
+        if idx >= 0:
+            writer.add_call(idx)
+    writer.close()
+    if txts is not None:
+        txts.close()
+        txts_file.close()
+    print(f"{rows} rows: {len(writer)} funcs, {len(writer.call_funcs)} calls written to {out_path}")
+    return len(writer), len(writer.call_funcs)
+
+
 # we dump requirements.txt and requirements.in to json file, and reparse them to get the versioned packages
 # direct_pkg_with_version: {pkg_name: (operator, version)}
 # first step is to generate requirements.in and txt. unless these 2 args are provided
@@ -197,6 +217,7 @@ class Meta:
                  requirements_in=None, requirements_txt=None,
                  direct_import_mods=None, import_mods=None):
         self.direct_pkg_with_version = {} if direct_pkg_with_version is None else direct_pkg_with_version
+        self._pkg_ids = None
         self.direct_import_mods = set() if direct_import_mods is None else set(direct_import_mods)
 
         if requirements_in is None:
@@ -216,12 +237,12 @@ class Meta:
         if direct_pkg_with_version is not None:
             self.direct_pkg_with_version = direct_pkg_with_version
         else:
-            self.direct_pkg_with_version, _ = parse_requirements(self.requirements_in)
+            self.direct_pkg_with_version = cached_parse(self.requirements_in).copy_requirements()
 
         if pkg_with_version is not None:
             self.pkg_with_version = pkg_with_version
         else:
-            self.pkg_with_version, _ = parse_requirements(self.requirements_txt)
+            self.pkg_with_version = cached_parse(self.requirements_txt).copy_requirements()
 
         self.import_mods = set() if import_mods is None else set(import_mods)
 
@@ -242,9 +263,14 @@ class Meta:
         return True
 
     def gen_requirements_in(self):
+        return Meta.requirements_in_of(self.direct_pkg_with_version)
+
+    # {pkg_name: (operator, version)} -> requirements.in
+    @staticmethod
+    def requirements_in_of(direct_pkg_with_version):
         requirements_in_str = ""
-        for pkg in self.direct_pkg_with_version:
-            op, version = self.direct_pkg_with_version[pkg][0], self.direct_pkg_with_version[pkg][1]
+        for pkg in direct_pkg_with_version:
+            op, version = direct_pkg_with_version[pkg][0], direct_pkg_with_version[pkg][1]
             if op is None:
                 requirements_in_str += f"{pkg}\n"
             else:
@@ -253,22 +279,28 @@ class Meta:
 
     # return None means we cannot generate requirements.txt from current requirements.in
     def gen_requirements_txt(self, print_err=False):
-        process = subprocess.Popen(
-            ["pip-compile", "--output-file=-", "-"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = process.communicate(input=self.requirements_in)
-        # todo: you should probably delete this line, as it print a lot of annoyed message to console
-        if process.returncode != 0:
-            if print_err:
-                print("err requirements in: \n", self.requirements_in)
-                print("err in pip compile: \n", stderr)
-            return None
-            # raise Exception(f"pip-compile failed with error: {stderr}")
-        return stdout
+        return resolve(self.requirements_in, print_err)
+
+    # build a Meta for each requirements.in, pip-compile runs on a bounded pool instead of one by one
+    # and identical requirements.in are only compiled once
+    @staticmethod
+    def resolve_all(requirements_ins, workers=COMPILE_THREADS):
+        txts = resolve_all(requirements_ins, workers)
+        metas = []
+        for requirements_in, requirements_txt in zip(requirements_ins, txts):
+            # copied, as try_gen_requirements_txt loosens the versions in place when pip-compile failed
+            direct_pkg_with_version = cached_parse(requirements_in).copy_requirements()
+            metas.append(Meta(direct_pkg_with_version, requirements_in=requirements_in,
+                              requirements_txt=requirements_txt))
+        return metas
+
+    # registry ids of every versioned pkg in requirements.txt
+    @property
+    def pkg_ids(self):
+        if self._pkg_ids is None:
+            self._pkg_ids = frozenset(registry.intern(pkg, op_version[1])
+                                      for pkg, op_version in self.pkg_with_version.items())
+        return self._pkg_ids
 
     def to_dict(self):
         return {
@@ -287,8 +319,9 @@ class Meta:
         requirement_txt = meta_dict['requirements_txt']
         requirement_in = meta_dict['requirements_in']
 
-        direct_pkg_with_version, _ = parse_requirements(requirement_in)
-        pkg_with_version, _ = parse_requirements(requirement_txt)
+        # copied, the parse cache is shared and try_gen_requirements_txt changes versions in place
+        direct_pkg_with_version = cached_parse(requirement_in).copy_requirements()
+        pkg_with_version = cached_parse(requirement_txt).copy_requirements()
         return Meta(direct_pkg_with_version, pkg_with_version,
                     requirements_in=requirement_in, requirements_txt=requirement_txt,
                     direct_import_mods=meta_dict["direct_import_mods"],
@@ -339,100 +372,218 @@ class Func:
             idx += 1
 
 
+# a func of a binary workload (workload_bin.BinaryWorkload): only its name is decoded when loading,
+# meta and code when they are first used. to_dict() of a func never used is copied from the file as it is
+class LazyFunc(Func):
+    def __init__(self, store, idx):
+        self.store = store
+        self.idx = idx
+        self.name = store.func_name(idx)
+        self._meta = None
+        self._code = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = Meta.from_dict(self.store.func_meta_dict(self.idx))
+        return self._meta
+
+    @meta.setter
+    def meta(self, meta):
+        self._meta = meta
+
+    @property
+    def code(self):
+        if self._code is None:
+            self._code = self.store.func_code(self.idx)
+        return self._code
+
+    @code.setter
+    def code(self, code):
+        self._code = code
+
+    def to_dict(self):
+        if self._meta is None and self._code is None and self.name == self.store.func_name(self.idx):
+            return self.store.func_dict(self.idx)
+        return super().to_dict()
+
+
+# hashable, case-insensitive key of a {pkg_name: [op, version]} dict, used to index funcs by their direct pkgs
+# PEP 426: All comparisons of distribution names MUST be case insensitive
+def direct_pkgs_key(pkgs):
+    return frozenset((name.lower(), tuple(op_version) if isinstance(op_version, list) else op_version)
+                     for name, op_version in pkgs.items())
+
+
+# the closure of every versioned pkg of a requirements.txt: [(pkg_id, its deps, frozenset of their ids)].
+# bounded like the parse cache, texts repeat a lot in a workload or requirements.csv
+@lru_cache(maxsize=65536)
+def requirements_closure(txt):
+    full_deps = transitive_closure(cached_parse(txt).versioned_dependencies())
+    return [(registry.intern_key(pkg_name), dependencies, frozenset(registry.intern_key(dep) for dep in dependencies))
+            for pkg_name, dependencies in full_deps.items()
+            if pkg_name != 'direct_req' and '==' in pkg_name]
+
+
+# deps: the deps_dict to start from ({} for none), txts: (requirements_txt, weight) pairs, e.g. a func and its
+# number of calls, or every row of requirements.csv with weight 1 (workload_stream.iter_compiled).
+# only one txt is held at a time, so txts can be a stream
+def deps_from_txts(deps, txts):
+    # deps_dict = {name: {v1:{deps_str: #used, deps_str: #used, ...}, v2: ...}
+    # deps_set = {name: {v1: [dep_set, dep_set, ...], v2: ...}, a dep_set is a set of "name==version"
+    # '#used' is the number of times this deps_set is used, summed over the weights of the txts
+    deps_count = {}  # {pkg_id: {frozenset of registry ids: #used}}, turned into deps_dict's keys at the end
+    deps_set = {} # deps_set shows the deps as a set
+    dep_matrix_dict = {}
+
+    # add info from original deps dict
+    for pkg_name, versions in deps.items():
+        for version, deps_set_list in versions.items():
+            if deps_set_list is None or len(deps_set_list) == 0:
+                continue
+            dep_set = set("%s==%s" % (name, ver) for name, ver in deps_set_list.items())
+            dep_ids = frozenset(registry.intern_key(dep) for dep in dep_set)
+            counts = deps_count.setdefault(registry.intern(pkg_name, version), {})
+            counts[dep_ids] = counts.get(dep_ids, 0) + 1  # Increment the number of uses
+
+            if pkg_name not in deps_set:
+                deps_set[pkg_name] = {}
+            if version not in deps_set[pkg_name]:
+                deps_set[pkg_name][version] = []
+            deps_set[pkg_name][version].append(dep_set)
+
+    # learn from the requirements.txt, each counts weight times
+    for txt, weight in txts:
+        if weight == 0:
+            continue
+        for pkg_id, dependencies, dep_set in requirements_closure(txt):
+            name, version = registry.name(pkg_id), registry.version(pkg_id)
+
+            # update deps_count, a dep_set not counted yet is not in deps_set either
+            counts = deps_count.setdefault(pkg_id, {})
+            seen = dep_set in counts
+            counts[dep_set] = counts.get(dep_set, 0) + weight
+
+            if name not in deps_set:
+                deps_set[name] = {}
+            if version not in deps_set[name]:
+                deps_set[name][version] = []
+            if not seen:
+                deps_set[name][version].append(set(dependencies))
+
+            pkg_name = registry.key(pkg_id)
+            for dep in dependencies:
+                if dep not in dep_matrix_dict:
+                    dep_matrix_dict[dep] = {}
+                if pkg_name not in dep_matrix_dict[dep]:
+                    dep_matrix_dict[dep][pkg_name] = 0
+                dep_matrix_dict[dep][pkg_name] += weight
+
+    deps_dict = {}  # deps_dict shows frequency
+    for pkg_id, counts in deps_count.items():
+        versions = deps_dict.setdefault(registry.name(pkg_id), {})
+        versions[registry.version(pkg_id)] = {registry.set_key(dep_set): used for dep_set, used in counts.items()}
+
+    dep_matrix = pd.DataFrame.from_dict(dep_matrix_dict, orient='index')
+    dep_matrix = dep_matrix.sort_index(axis=0).sort_index(axis=1).fillna(0).astype(int)
+    return deps_dict, deps_set, dep_matrix
+
+
 class Workload:
     def __init__(self, platform: PlatformAdapter = None, workload_path=None):
         self.funcs = []
-        self.calls = []
-        self.pkg_with_version = {}  # {pkg_name: (v1, v2, ...), ...}
+        self.func_index = {}  # {func_name: Func}
+        self._pkg_index = {}  # {direct_pkgs_key: [Func, ...]}, None until first used for a binary workload
+        self._calls = []  # None until first used for a binary workload
+        self._store = None  # the workload_bin.BinaryWorkload it was loaded from
+        self.pkg_ids = set()  # registry ids of all versioned pkgs used by the funcs
+        self._pkg_with_version = None  # built by pkg_with_version, dropped by add_pkg_ids
         self.name = 1
         self.empty_pkgs_funcs = []
-        if workload_path:
+        self.arrival = None  # the arrival process the calls' "t" come from, None if they have none
+        if workload_path and is_binary(workload_path):
+            self.load_binary(workload_path)
+        elif workload_path:
             with open(workload_path) as f:
                 j = json.load(f)
                 self.funcs = [Func.from_dict(d) for d in j['funcs']]
+                for f in self.funcs:
+                    self.index_func(f)
                 self.calls = j['calls']
                 self.name = max([int(f.name[2:]) for f in self.funcs]) + 1
-                self.pkg_with_version = j['pkg_with_version']
-                for pkg, versions in self.pkg_with_version.items():
-                    self.pkg_with_version[pkg] = set(versions)
+                for pkg, versions in j['pkg_with_version'].items():
+                    self.add_pkg_ids(registry.intern(pkg, version) for version in versions)
                 self.empty_pkgs_funcs = j['empty_pkgs_funcs'] if 'empty_pkgs_funcs' in j else []
+                self.arrival = j.get('arrival')
         self.platform = platform
 
+    # the funcs are LazyFuncs, calls and pkg_index are built when first used, so loading only maps the file
+    def load_binary(self, path):
+        self._store = BinaryWorkload(path)
+        self.funcs = [LazyFunc(self._store, i) for i in range(len(self._store))]
+        self.func_index = {f.name: f for f in self.funcs}
+        self._pkg_index = None
+        self._calls = None
+        self.name = max([int(f.name[2:]) for f in self.funcs]) + 1
+        extras = self._store.extras
+        for pkg, versions in extras['pkg_with_version'].items():
+            self.add_pkg_ids(registry.intern(pkg, version) for version in versions)
+        self.empty_pkgs_funcs = extras.get('empty_pkgs_funcs', [])
+        self.arrival = extras.get('arrival')
+
+    # [{"name": ...(, "t": ...)}, ...]
+    @property
+    def calls(self):
+        if self._calls is None:
+            self._calls = self._store.calls()
+        return self._calls
+
+    @calls.setter
+    def calls(self, calls):
+        self._calls = calls
+
+    # the index in self.funcs of every call, as int32, without building the calls of a binary workload
+    def call_func_indices(self):
+        if self._calls is None and self._store is not None and len(self.funcs) == len(self._store):
+            return np.asarray(self._store.call_funcs)
+        func_idx = {f.name: i for i, f in enumerate(self.funcs)}
+        return np.fromiter((func_idx[call['name']] for call in self.calls), dtype=np.int32, count=len(self.calls))
+
+    @property
+    def pkg_index(self):
+        if self._pkg_index is None:
+            self._pkg_index = {}
+            for f in self.funcs:
+                self._pkg_index.setdefault(direct_pkgs_key(f.meta.direct_pkg_with_version), []).append(f)
+        return self._pkg_index
+
+    # pkg_ids must only be changed through here, so pkg_with_version is rebuilt
+    def add_pkg_ids(self, pkg_ids):
+        self.pkg_ids.update(pkg_ids)
+        self._pkg_with_version = None
+
+    # {pkg_name: frozenset({v1, v2, ...}), ...}, read-only, use add_pkg_ids instead.
+    # built on first access after pkg_ids changed, not on every access
+    @property
+    def pkg_with_version(self):
+        if self._pkg_with_version is None:
+            pkg_with_version = {}
+            for pkg_id in self.pkg_ids:
+                pkg_with_version.setdefault(registry.name(pkg_id), set()).add(registry.version(pkg_id))
+            self._pkg_with_version = MappingProxyType({name: frozenset(versions)
+                                                       for name, versions in pkg_with_version.items()})
+        return self._pkg_with_version
+
     # if deps' name exist in one txt, then they can serve a compatible deps
     # deps= {pkg_name: {v1: {dep:ver, dep:ver, ...}, v2: {dep:ver, dep:ver, ...}}, ...}
-    def parse_deps(self, deps):
-        # deps_dict = {name: {v1:{deps_str: #used, deps_str: #used, ...}, v2: ...}
-        # deps_set = {name: {v1: [dep_set, dep_set, ...], v2: ...}
-        # '#used' is the number of times this deps_set is used
-        deps_dict = {} # deps_dict shows frequency
-        deps_set = {} # deps_set shows the deps as a set
-        dep_matrix_dict = {}
-
-        # add info from original deps dict
-        for pkg_name, versions in deps.items():
-            for version, deps_set_list in versions.items():
-                if deps_set_list is None or len(deps_set_list) == 0:
-                    continue
-                dep_set = set()
-                for name, ver in deps_set_list.items():
-                    dep_set.add("%s==%s" % (name, ver))
-                if pkg_name not in deps_dict:
-                    deps_dict[pkg_name] = {}
-                if version not in deps_dict[pkg_name]:
-                    deps_dict[pkg_name][version] = {}
-                deps_key = ",".join(sorted(dep_set))  # Using frozenset as a key for a dict
-                if deps_key not in deps_dict[pkg_name][version]:
-                    deps_dict[pkg_name][version][deps_key] = 0  # Initialize with 0 uses
-                deps_dict[pkg_name][version][deps_key] += 1  # Increment the number of uses
-
-                if pkg_name not in deps_set:
-                    deps_set[pkg_name] = {}
-                if version not in deps_set[pkg_name]:
-                    deps_set[pkg_name][version] = []
-                deps_set[pkg_name][version].append(dep_set)
-
-        # learn from workload
-        for func in self.funcs:
-            _, deps_from_func = parse_requirements(func.meta.requirements_txt)
-            matrix = construct_dependency_matrix(deps_from_func)
-            full_deps = get_package_dependencies(matrix)
-
-            for pkg_name, dependencies in full_deps.items():
-                if pkg_name == 'direct_req':
-                    continue
-                if '==' in pkg_name:
-                    name, version = pkg_name.split('==')
-                    dependencies_str = ",".join(sorted(dependencies))
-                    deps_key = dependencies_str
-
-                    # update deps_dict
-                    if name not in deps_dict:
-                        deps_dict[name] = {}
-                    if version not in deps_dict[name]:
-                        deps_dict[name][version] = {}
-                    if name in deps_dict and version in deps_dict[name]:
-                        if deps_key in deps_dict[name][version]:
-                            deps_dict[name][version][deps_key] += 1  # Increment the number of uses
-                        else:
-                            deps_dict[name][version][deps_key] = 1
-
-                    if name not in deps_set:
-                        deps_set[name] = {}
-                    if version not in deps_set[name]:
-                        deps_set[name][version] = []
-                    if set(dependencies) not in deps_set[name][version]:
-                        deps_set[name][version].append(set(dependencies))
-
-                    for dep in dependencies:
-                        if dep not in dep_matrix_dict:
-                            dep_matrix_dict[dep] = {}
-                        if pkg_name not in dep_matrix_dict[dep]:
-                            dep_matrix_dict[dep][pkg_name] = 0
-                        dep_matrix_dict[dep][pkg_name] += 1
-
-        dep_matrix = pd.DataFrame.from_dict(dep_matrix_dict, orient='index')
-        dep_matrix = dep_matrix.sort_index(axis=0).sort_index(axis=1).fillna(0).astype(int)
-        return deps_dict, deps_set, dep_matrix
+    # see deps_from_txts, every func counts once, or (weighted) as many times as it is called: a func of
+    # stream_workload_from_csv stands for all the rows with its compiled text, one call each
+    def parse_deps(self, deps, weighted=False):
+        if weighted:
+            weights = np.bincount(self.call_func_indices(), minlength=len(self.funcs)).tolist()
+        else:
+            weights = [1] * len(self.funcs)
+        return deps_from_txts(deps, ((f.meta.requirements_txt, weight) for f, weight in zip(self.funcs, weights)))
 
     # packages_with_version is {pkg1: (v1, v2, ...), ...}
     # import should be a set of strings, also accept list, but will convert to set
@@ -459,34 +610,64 @@ class Workload:
                  direct_pkg_with_version=packages_with_version,
                  direct_import_mods=imports, meta=meta)
 
-        # add all deps versioned pkgs' to the workload's pkgs dict
-        for pkg, op_version in f.meta.pkg_with_version.items():
-            if pkg not in self.pkg_with_version:
-                self.pkg_with_version[pkg] = set()
-            self.pkg_with_version[pkg].add(op_version[1])  # only add version instead of operator
+        # add all deps versioned pkgs' to the workload's pkgs set
+        self.add_pkg_ids(f.meta.pkg_ids)
 
         if len(f.meta.pkg_with_version)==0:
             self.empty_pkgs_funcs.append(f.name)
         self.funcs.append(f)
+        self.index_func(f)
         return name
 
+    # addFunc for many funcs at once, packages_with_versions: [{pkg1: (op, v1), ...}, ...], imports: a set of
+    # imports per func (or None). their requirements.in are resolved together, see Meta.resolve_all
+    def addFuncs(self, packages_with_versions, imports=None):
+        if imports is None:
+            imports = [None] * len(packages_with_versions)
+        metas = Meta.resolve_all([Meta.requirements_in_of(pkgs) for pkgs in packages_with_versions])
+        names = []
+        for mods, meta in zip(imports, metas):
+            meta.direct_import_mods = set() if mods is None else set(mods)
+            names.append(self.addFunc(None, mods, meta))
+        return names
+
+    # every func added to self.funcs must go through here, otherwise find_func and find_funcs_by_pkg miss it
+    def index_func(self, f):
+        self.func_index[f.name] = f
+        if self._pkg_index is None:
+            return  # built with every func on first use
+        key = direct_pkgs_key(f.meta.direct_pkg_with_version)
+        if key not in self._pkg_index:
+            self._pkg_index[key] = []
+        self._pkg_index[key].append(f)
+
     def addCall(self, name):
         self.calls.append({"name": name})
 
-    # return a df
+    # calls x "pkg==version" matrix, [i, j] = 1 means the i-th call installs pkg j
+    # every distinct func is expanded once, then its row is gathered for each of its calls
+    def sparse_call_matrix(self):
+        funcs, call_funcs = np.unique(self.call_func_indices(), return_inverse=True)
+        all_names = np.array([f.name for f in self.funcs], dtype=str)
+        func_names, names = all_names[funcs], all_names[funcs][call_funcs]
+
+        func_cols = []
+        for i in funcs:
+            func = self.funcs[i]
+            func_cols.append([pkg + op_version[0] + op_version[1]
+                              for pkg, op_version in func.meta.pkg_with_version.items()])
+        cols = sorted(set().union(*func_cols))
+        col_idx = {col: j for j, col in enumerate(cols)}
+
+        entries = ((i, col_idx[col]) for i, func_col in enumerate(func_cols) for col in func_col)
+        func_matrix = SparseMatrix.from_entries(entries, func_names, cols)
+        return SparseMatrix(func_matrix.matrix[call_funcs], names, cols)
+
+    # return a df, one row per call
     def call_matrix(self):
-        df_rows = []
-        for call in self.calls:
-            func = self.find_func(call['name'])
-            assert func is not None
-            df_row = {}
-            for pkg, op_version in func.meta.pkg_with_version.items():
-                df_row[pkg + op_version[0] + op_version[1]] = 1
-            df_rows.append(df_row)
-        df = pd.DataFrame(df_rows).fillna(0).astype(int)
-        return df[sorted(df.columns)]
-
-    # get all versioned packages used in workload, return a df
+        return self.sparse_call_matrix().to_dense().reset_index(drop=True).astype(int)
+
+    # get all versioned packages used in workload
     # in previous experiments, we use "deps" in trace, jus name but no version is provided
     # however, since now we came up with pip-compile, such info can be easily obtained
     """
@@ -497,33 +678,43 @@ class Workload:
     C 1 1 1 0
     D 1 1 1 1
     [B,A] = 1 means A requires B
+    deps missing from the workload are appended as extra rows
     """
 
-    def dep_matrix(self, pkg_factory: List[Package]):
-        pnames = []
-        for pkg in self.pkg_with_version:
-            for v in self.pkg_with_version[pkg]:
-                pnames.append(pkg + "==" + v)
-        pnames = sorted(pnames)
-        df = pd.DataFrame(index=pnames, columns=pnames).fillna(0)
+    def sparse_dep_matrix(self, pkg_factory: Dict[str, Package]):
+        pkg_ids = sorted(self.pkg_ids, key=registry.key)
+        pnames = [registry.key(pkg_id) for pkg_id in pkg_ids]
+        rows = list(pnames)
+        row_idx = {name: i for i, name in enumerate(rows)}
 
         # get deps info from our pkg_factory
-        for name_op_version in df.columns:
-            name = name_op_version.split("==")[0]
-            version = name_op_version.split("==")[1]
-            df.loc[name_op_version, name + "==" + version] = 1
+        entries = []
+        for j, pkg_id in enumerate(pkg_ids):
+            name, version = registry.name(pkg_id), registry.version(pkg_id)
+            entries.append((j, j))
+            if name not in pkg_factory:
+                raise Exception(f"{name} is not in the package factory")
             pkg = pkg_factory[name]
             # todo: this should not happen, and if it happens, we should pip-compile it
             if pkg is None:
                 continue
             if version not in pkg.available_versions:
-                print("Warning: %s not in %s's version" % (version, pkg))
+                raise Exception(f"{version} not in {name}'s versions {list(pkg.available_versions)}")
             version_meta = pkg.available_versions[version]
-            deps = version_meta.requirements_dict
-            for dep_name, op_version in deps.items():
-                df.loc[dep_name + "==" + op_version[1], name_op_version] = 1
+            if version_meta is None:
+                raise Exception(f"{name}=={version} has no requirements, add its versionMeta first")
+            for dep_name, op_version in version_meta.requirements_dict.items():
+                dep = dep_name + "==" + op_version[1]
+                if dep not in row_idx:
+                    row_idx[dep] = len(rows)
+                    rows.append(dep)
+                entries.append((row_idx[dep], j))
 
-        return df
+        return SparseMatrix.from_entries(entries, rows, pnames)
+
+    # return a df
+    def dep_matrix(self, pkg_factory: Dict[str, Package]):
+        return self.sparse_dep_matrix(pkg_factory).to_dense()
 
     def add_metrics(self, metrics=[]):
         for func in self.funcs:
@@ -534,8 +725,13 @@ class Workload:
                                         )
             func.code = new_code
 
+    # the arrival times stay where they are, only the names are shuffled
     def shuffleCalls(self):
+        times = [call["t"] for call in self.calls] if self.calls and "t" in self.calls[0] else None
         random.shuffle(self.calls)
+        if times is not None:
+            for call, t in zip(self.calls, times):
+                call["t"] = t
 
     # return 2 workloads, one for training, one for testing
     def random_split(self, ratio):
@@ -560,11 +756,21 @@ class Workload:
         return wl_train, wl_test
 
     def to_dict(self):
+        wl_dict = self.to_dict_without_calls()
+        return {'funcs': wl_dict.pop('funcs'), 'calls': self.calls, **wl_dict}
+
+    def to_dict_without_calls(self):
         funcs_dict = [f.to_dict() for f in self.funcs]
-        return {'funcs': funcs_dict, 'calls': self.calls,
-                'pkg_with_version': handle_sets(self.pkg_with_version), 'empty_pkgs_funcs': self.empty_pkgs_funcs}
+        wl_dict = {'funcs': funcs_dict,
+                   'pkg_with_version': handle_sets(self.pkg_with_version), 'empty_pkgs_funcs': self.empty_pkgs_funcs}
+        if self.arrival is not None:
+            wl_dict['arrival'] = self.arrival
+        return wl_dict
 
+    # path ending with .rbw: the binary format (workload_bin.py), otherwise json
     def save(self, path, workload_dict=None):
+        if path.endswith(".rbw"):
+            return self.save_binary(path, workload_dict)
         with open(path, 'w') as f:
             if workload_dict is not None:
                 json.dump(workload_dict, f, indent=2)
@@ -572,6 +778,20 @@ class Workload:
                 json.dump(self.to_dict(), f, indent=2)
         return
 
+    def save_binary(self, path, workload_dict=None):
+        if workload_dict is not None:
+            return dict_to_binary(workload_dict, path)
+        wl_dict = self.to_dict_without_calls()
+        if self._calls is None and len(self.funcs) == len(self._store):
+            # calls never used, copy them from the file they were loaded from
+            call_funcs, call_times = self._store.call_funcs, self._store.call_times
+        else:
+            call_funcs = self.call_func_indices()
+            timed = len(self.calls) > 0 and all("t" in call for call in self.calls)
+            call_times = np.array([call["t"] for call in self.calls], dtype=np.float64) if timed else None
+        funcs = wl_dict.pop("funcs")
+        save_binary(path, funcs, call_funcs, call_times, wl_dict)
+
     def play(self, options={}, tasks=TASKS):
         start_options = options.get("start_options", {})
         self.platform.start_worker(start_options)
@@ -589,23 +809,12 @@ class Workload:
         return stat_dict
 
     def find_func(self, name):
-        for f in self.funcs:  # todo: use a dict could be faster
-            if f.name == name:
-                return f
-        return None
+        return self.func_index.get(name)
 
-    # traverse all the meta.direct_pkg_with_version to find the matching func
+    # find the funcs whose meta.direct_pkg_with_version matches
     # pkg should be {pkg_name: versioned_package}
     def find_funcs_by_pkg(self, pkg):
-        pkg = {key.lower(): value for key, value in pkg.items()}
-        funcs = []
-        for f in self.funcs:
-            meta = f.meta
-            # PEP 426: All comparisons of distribution names MUST be case insensitive
-            f_dir_pkgs = {key.lower(): value for key, value in meta.direct_pkg_with_version.items()}
-            if meta and pkg == f_dir_pkgs:
-                funcs.append(f)
-        return funcs
+        return list(self.pkg_index.get(direct_pkgs_key(pkg), []))
 
     # assume the name is like fn1, fn2, fn3 ...
     # and the call is in the same order (no repeated call)
@@ -617,18 +826,18 @@ class Workload:
             f.code[-1] = "    return '%s'\n" % f.name
             func_name_map[old_name] = f.name
             self.funcs.append(f)
+            self.index_func(f)
             self.name += 1
+        # the funcs are renamed in place, keep the other workload's index in sync
+        workload.func_index = {f.name: f for f in workload.funcs}
 
         for c in workload.calls:
             # rename calls
             c['name'] = func_name_map[c['name']]
             self.calls.append(c)
 
-        # add pkg_with_version
-        for pkg, versions_set in workload.pkg_with_version.items():
-            if pkg not in self.pkg_with_version:
-                self.pkg_with_version[pkg] = set()
-            self.pkg_with_version[pkg] = self.pkg_with_version[pkg].union(versions_set)
+        # add versioned pkgs
+        self.add_pkg_ids(workload.pkg_ids)
 
     # randomly select some functions, add them to the workload with new name
     def expand(self, target):
@@ -641,8 +850,15 @@ class Workload:
 
 
     # repeat the calls in the workload
-    def gen_trace(self, target, skew=True, weights=None):
+    # skew: calls drawn from a popularity distribution over self.funcs (trace_gen), weights (e.g.
+    # csv_frequencies, or a trace_gen.mixture) give an empirical one, otherwise dist ("zipf", "pareto",
+    # "uniform") with params, e.g. gen_trace(n, dist="zipf", s=1.2). the same seed gives the same trace.
+    # arrival (e.g. {"process": "poisson", "rate": 50}, see arrivals.py) also gives every call its arrival time
+    def gen_trace(self, target, skew=True, weights=None, dist="zipf", seed=None, arrival=None, **params):
         self.calls = []
+        self.arrival = None
+        # independent streams for which funcs are called and when, both reproducible from seed
+        trace_seed, arrival_seed = np.random.SeedSequence(seed).spawn(2)
 
         function_names = [f.name for f in self.funcs]
 
@@ -653,20 +869,82 @@ class Workload:
                 self.calls = [{"name": name} for name in names]
             else:
                 self.calls = [{"name": name} for name in function_names]
-            return
-
-        if weights is not None:
-            weights /= np.sum(weights)
-            weighted_calls = random.choices(function_names, weights=weights, k=target)
-            self.calls = [{"name": name} for name in weighted_calls]
         else:
-            a = 1.5
-            num_funcs = len(function_names)
-            zipf_samples = np.random.zipf(a, target)-1
-            zipf_samples = np.mod(zipf_samples, num_funcs)
-            self.calls = [{"name": function_names[idx]} for idx in zipf_samples]
-
-# load the deps from deps.json, parse the deps_str to a frozenset of deps
+            if weights is not None:
+                pmf = empirical(weights)
+            else:
+                pmf = popularity(dist, len(function_names), **params)
+            names = np.array(function_names, dtype=object)[TraceGenerator(pmf, trace_seed).sample(target)]
+            self.calls = [{"name": name} for name in names]
+        if arrival is not None:
+            self.set_arrivals(arrival, arrival_seed)
+
+    # "t" of every call: its arrival time in seconds since the start, from arrivals.arrival_times.
+    # the runner sends the calls open-loop at these times
+    def set_arrivals(self, arrival, seed=None):
+        times = arrival_times(arrival, len(self.calls), seed)
+        for call, t in zip(self.calls, times.tolist()):
+            call["t"] = round(t, 6)
+        self.arrival = arrival
+
+    # calls from Azure Functions invocation files (azure_trace.py, one file per day), "t" is the time in the trace.
+    # by "rank" the most called trace functions get self.funcs in order (fold: the ones beyond the last func
+    # start over at the first), by "memory" / "duration" trace functions are mapped within classes of func_values
+    # (one per func, e.g. MB or ms) and of their app memory (memory_path) or average duration (durations_path).
+    # scale samples the calls, e.g. 0.01 keeps about 1% of them.
+    # out_path (.rbw): the calls are streamed into that binary workload a minute at a time and the workload is
+    # loaded back from it, needed for full days. without it every call is kept as a dict, only for samples
+    def import_azure_trace(self, paths, by="rank", func_values=None, memory_path=None, durations_path=None,
+                           classes=4, start_minute=0, minutes=None, scale=1.0, seed=None, fold=False, out_path=None):
+        if out_path is not None and not out_path.endswith(".rbw"):
+            raise Exception(f"calls of a trace are streamed to a binary workload (.rbw), got {out_path}")
+        if by in ("memory", "duration"):
+            if func_values is None or len(func_values) != len(self.funcs):
+                raise Exception(f"mapping by {by} needs func_values, one value per func ({len(self.funcs)})")
+            if (memory_path if by == "memory" else durations_path) is None:
+                raise Exception(f"mapping by {by} needs {'memory_path' if by == 'memory' else 'durations_path'}")
+
+        totals = azure_trace.invocation_totals(paths)
+        if by == "rank":
+            mapping = azure_trace.map_by_rank(totals, len(self.funcs), fold)
+        elif by == "memory":
+            trace_values = azure_trace.function_memory(totals, azure_trace.load_app_memory(memory_path))
+            mapping = azure_trace.map_by_class(totals, trace_values, func_values, classes)
+        elif by == "duration":
+            mapping = azure_trace.map_by_class(totals, azure_trace.load_durations(durations_path), func_values, classes)
+        else:
+            raise Exception(f"unknown mapping {by}, expected rank, memory or duration")
+        kept = sum(totals[key] for key in mapping)
+        print(f"{len(mapping)} of {len(totals)} trace functions mapped, "
+              f"{kept / max(sum(totals.values()), 1):.1%} of the calls")
+
+        self.arrival = {"process": "azure", "files": [os.path.basename(path) for path in paths], "by": by,
+                        "start_minute": start_minute, "minutes": minutes, "scale": scale, "seed": seed}
+        chunks = ((funcs, np.round(times, 6))
+                  for times, funcs in azure_trace.iter_calls(paths, mapping, len(self.funcs), start_minute, minutes,
+                                                             scale, seed))
+        if out_path is not None:
+            wl_dict = self.to_dict_without_calls()
+            save_binary_chunks(out_path, wl_dict.pop("funcs"), chunks, wl_dict)
+            self.load_binary(out_path)
+            return
+        names = np.array([f.name for f in self.funcs], dtype=object)
+        self.calls = []
+        for funcs, times in chunks:
+            self.calls += [{"name": name, "t": t} for name, t in zip(names[funcs], times.tolist())]
+
+    # how many rows of requirements.csv have the same direct requirements as each func, in self.funcs order.
+    # both sides are keyed by the "# via -r" pins of the compiled text: a func built from the csv has every pin
+    # of its txt in direct_pkg_with_version, and a func from requirements.in may have other operators there
+    def csv_frequencies(self, path):
+        counts = {}
+        for txt in iter_compiled(path):
+            key = direct_pkgs_key(cached_parse(txt).direct_requirements())
+            counts[key] = counts.get(key, 0) + 1
+        return np.array([counts.get(direct_pkgs_key(cached_parse(f.meta.requirements_txt).direct_requirements()), 0)
+                         for f in self.funcs], dtype=np.int64)
+
+# load the deps from deps.json, parse the deps_str to a frozenset of "name==version"
 # now it looks like: {name: {version: {deps_set: count}}}, count is the number of times this deps_set appears
 def load_all_deps(path):
     with open(path, 'r') as f:
@@ -687,10 +965,14 @@ def load_all_deps(path):
 blacklist = ["https://", "http://"]
 
 def main():
+    # the same compiled texts are parsed again by every Meta and by parse_deps, reuse previous runs' results
+    parse_cache.load()
     requirements_csv = os.path.join(bench_dir, "files/requirements.csv")
-    df = pd.read_csv(requirements_csv)
-    filtered_df = df[(df['compiled'] != "") & (df['compiled'].notnull())]
-    pkgs,_ = get_top_n_packages(filtered_df, 500)
+    # the csv is streamed twice, to count the packages and to write the workload, it is never loaded whole
+    pkgs,_ = get_top_n_packages(iter_compiled(requirements_csv), 500)
+    # sizes measured by install_import need no network, the rest come from pypi (or a previous run's cache)
+    package_sizes.load()
+    package_sizes.preload_install_import(os.path.join(bench_file_dir, "install_import.json"))
     # wl = generate_workloads_from_txts(filtered_df["compiled"].tolist())
     # deps_dict, _, _ = wl.parse_deps({})
     # # the top-n packages might have dependencies that are not in them,
@@ -703,25 +985,17 @@ def main():
 
     get_whl(pkgs)
 
-    valid_cols = []
     # rule out the packages that are too big, not in the top 500, in the blacklist
-    pkgs = packages_size
-    for col in filtered_df["compiled"]:
-        valid = 1
-        requirements, _ = parse_requirements(col)
-        for pkg_name, op_version in requirements.items():
-            pkg_name = pkg_name.split("[")[0]
-            version = op_version[1]
-            if pkg_name not in pkgs or version not in pkgs[pkg_name]:
-                valid = 0
-        if valid:
-            valid_cols.append(col)
-    print(len(valid_cols))
-    with open(os.path.join(bench_file_dir, "valid_txt.json"), 'w') as f:
-        json.dump(valid_cols, f, indent=2)
-
-    wl = generate_workloads_from_txts(valid_cols)
-    wl.save(os.path.join(bench_file_dir, "workload.json"))
+    sized_pkgs = {}
+    for pkg in pkgs:
+        name, version = registry.split(pkg)
+        if package_sizes.cached(name, version) is not None:
+            sized_pkgs.setdefault(name, set()).add(version)
+    workload_path = os.path.join(bench_file_dir, "workload.json")
+    stream_workload_from_csv(requirements_csv, workload_path, sized_pkgs,
+                             txts_path=os.path.join(bench_file_dir, "valid_txt.json"))
+
+    wl = Workload(workload_path=workload_path)
     wl.play({
             "import_cache_tree": os.path.join(bench_file_dir, "valid_txt.json"),
             "limits.mem_mb": 900,
@@ -743,19 +1017,24 @@ def main():
     Package.save(os.path.join(bench_file_dir, "packages.json"))
 
     with open(os.path.join(bench_file_dir, "deps.json"), 'w') as file:
-        deps_dict, _, _ = wl.parse_deps(Package.deps_dict())
+        # weighted, a func stands for every row of the csv with its compiled text
+        deps_dict, _, _ = wl.parse_deps(Package.deps_dict(), weighted=True)
         json.dump(deps_dict, file, indent=2)
 
     wl_with_top_mods = Workload()
     # add top mods to workload and save
+    names = {}  # {name in wl: name in wl_with_top_mods}
     for f in wl.funcs:
         for pkg in f.meta.pkg_with_version:
             version = f.meta.direct_pkg_with_version[pkg][1]
             if Package.packages_factory[pkg].available_versions[version] is not None:
                 f.meta.import_mods.update(Package.packages_factory[pkg].available_versions[version].top_level)
-        name = wl_with_top_mods.addFunc(None, f.meta.import_mods, f.meta)
-        wl_with_top_mods.addCall(name)
+        names[f.name] = wl_with_top_mods.addFunc(None, f.meta.import_mods, f.meta)
+    # a func stands for every row with its compiled text, keep its calls (one per row)
+    wl_with_top_mods.calls = [dict(call, name=names[call["name"]]) for call in wl.calls if call["name"] in names]
     wl_with_top_mods.save(os.path.join(bench_file_dir, "workloads.json"))
+    parse_cache.save()
+    print(f"parse cache: {parse_cache.stats()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# binary workload format (.rbw), lossless to and from the workload json, read by Workload(workload_path=...)
+# and the Go util.ReadWorkload. all numbers are little endian:
+#   "RBWL", uint32 version, uint64 header length, header json, then the 8-byte aligned sections of the header
+#   header: {"sections": {name: [offset, count]}, "func_columns": [...], "extras": {other top-level json keys}}
+#   str_offsets int64[n_strings + 1], str_data uint8[]: the string table, every distinct string once
+#   funcs int32[n_funcs * len(FUNC_COLUMNS)]: string ids, -1 for none
+#   call_funcs int32[n_calls]: the func index of every call, call_t float64[n_calls]: their "t", if they have one
+# a func's code is stored as a template shared by the funcs with the same code: its `for mod in [...]` literal
+# and quoted name are replaced by MODS / NAME and kept in the "modules" / "name" columns
+import json
+import mmap
+import os
+import re
+import sys
+
+import numpy as np
+
+MAGIC = b"RBWL"
+FORMAT_VERSION = 1
+FUNC_COLUMNS = ["name", "requirements_in", "requirements_txt", "direct_import_mods", "import_mods", "code", "modules"]
+WRITE_BLOCK = 1 << 24  # elements of a section written at a time
+MODS = "\x00M"
+NAME = "\x00N"
+mods_pattern = re.compile(r"for mod in (\[.*?\]):")
+
+
+def decode_code(template, name, modules):
+    lines = json.loads(template)
+    return [line.replace(MODS, modules).replace(NAME, name) if modules is not None else line.replace(NAME, name)
+            for line in lines]
+
+
+# (template, modules literal or None), the code lines come back from decode_code exactly as they were
+def encode_code(lines, name):
+    modules = None
+    template = []
+    for line in lines:
+        match = mods_pattern.search(line) if modules is None else None
+        if match is not None:
+            modules = match.group(1)
+            line = line[:match.start(1)] + MODS + line[match.end(1):]
+        template.append(line.replace(f'"{name}"', f'"{NAME}"').replace(f"'{name}'", f"'{NAME}'"))
+    template = json.dumps(template)
+    if decode_code(template, name, modules) != lines:
+        return json.dumps(lines), None
+    return template, modules
+
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, s):
+        if s is None:
+            return -1
+        if s not in self.ids:
+            self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return self.ids[s]
+
+    def arrays(self):
+        data = [s.encode() for s in self.strings]
+        offsets = np.zeros(len(data) + 1, dtype="<i8")
+        np.cumsum([len(d) for d in data], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(data), dtype=np.uint8)
+
+
+# funcs: the json func dicts, call_funcs: func index of every call, call_times: their "t" or None,
+# extras: the other top-level keys of the workload json (pkg_with_version, empty_pkgs_funcs, arrival, ...)
+def save_binary(path, funcs, call_funcs, call_times=None, extras=None):
+    table = StringTable()
+    rows = np.empty((len(funcs), len(FUNC_COLUMNS)), dtype="<i4")
+    for i, func in enumerate(funcs):
+        if set(func) != {"name", "meta", "code"} or \
+                set(func["meta"]) != {"requirements_in", "requirements_txt", "direct_import_mods", "import_mods"}:
+            raise Exception(f"func {func.get('name')} has fields the binary format does not keep")
+        template, modules = encode_code(func["code"], func["name"])
+        meta = func["meta"]
+        rows[i] = [table.intern(func["name"]), table.intern(meta["requirements_in"]),
+                   table.intern(meta["requirements_txt"]), table.intern(json.dumps(meta["direct_import_mods"])),
+                   table.intern(json.dumps(meta["import_mods"])), table.intern(template), table.intern(modules)]
+    offsets, data = table.arrays()
+
+    sections = [("str_offsets", offsets), ("str_data", data), ("funcs", rows.ravel()),
+                ("call_funcs", np.asarray(call_funcs, dtype="<i4"))]
+    if call_times is not None:
+        sections.append(("call_t", np.asarray(call_times, dtype="<f8")))
+
+    # the header holds the section offsets, which depend on the header length: fix the length first
+    def header_bytes(offsets_by_name):
+        header = {"sections": offsets_by_name, "func_columns": FUNC_COLUMNS, "extras": extras or {}}
+        return json.dumps(header).encode()
+
+    placeholder = {name: [0, len(array)] for name, array in sections}
+    start = 16 + len(header_bytes({name: [2 ** 62, count] for name, (_, count) in placeholder.items()}))
+    layout, offset = {}, start + (-start) % 8
+    for name, array in sections:
+        layout[name] = [offset, len(array)]
+        offset += array.nbytes + (-array.nbytes) % 8
+    header = header_bytes(layout)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + np.array([FORMAT_VERSION], dtype="<u4").tobytes() +
+                np.array([len(header)], dtype="<u8").tobytes() + header)
+        for name, array in sections:
+            f.write(b"\0" * (layout[name][0] - f.tell()))
+            # in blocks, an array may be a np.memmap larger than memory (save_binary_chunks)
+            for start in range(0, len(array), WRITE_BLOCK):
+                f.write(array[start:start + WRITE_BLOCK].tobytes())
+
+
+# save_binary with the calls coming from call_chunks, an iterable of (func indices, times or None) arrays.
+# the chunks are spooled to temporary files next to path and mapped, so only one chunk is in memory at a time.
+# path is replaced once it is complete, it may be the file funcs were loaded from
+def save_binary_chunks(path, funcs, call_chunks, extras=None):
+    funcs_path, times_path = f"{path}.funcs.tmp", f"{path}.t.tmp"
+    n, timed = 0, None
+    try:
+        with open(funcs_path, "wb") as funcs_file, open(times_path, "wb") as times_file:
+            for call_funcs, call_times in call_chunks:
+                if timed is None:
+                    timed = call_times is not None
+                if (call_times is not None) != timed:
+                    raise Exception("either every call or no call must have a \"t\"")
+                np.asarray(call_funcs, dtype="<i4").tofile(funcs_file)
+                if timed:
+                    np.asarray(call_times, dtype="<f8").tofile(times_file)
+                n += len(call_funcs)
+
+        def mapped(tmp_path, dtype):
+            return np.memmap(tmp_path, dtype=dtype, mode="r") if n > 0 else np.zeros(0, dtype=dtype)
+
+        call_times = mapped(times_path, "<f8") if timed else None
+        save_binary(f"{path}.tmp", funcs, mapped(funcs_path, "<i4"), call_times, extras)
+        os.replace(f"{path}.tmp", path)
+    finally:
+        for tmp_path in [funcs_path, times_path, f"{path}.tmp"]:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return n
+
+
+# the workload json dict -> .rbw
+def dict_to_binary(wl_dict, path):
+    funcs = wl_dict["funcs"]
+    index = {func["name"]: i for i, func in enumerate(funcs)}
+    calls = wl_dict["calls"]
+    timed = sum("t" in call for call in calls)
+    if timed not in (0, len(calls)):
+        raise Exception("either every call or no call must have a \"t\"")
+    if any(set(call) - {"name", "t"} for call in calls):
+        raise Exception("calls have fields the binary format does not keep")
+    call_funcs = np.fromiter((index[call["name"]] for call in calls), dtype="<i4", count=len(calls))
+    call_times = np.fromiter((call["t"] for call in calls), dtype="<f8", count=len(calls)) if timed else None
+    extras = {key: value for key, value in wl_dict.items() if key not in ("funcs", "calls")}
+    save_binary(path, funcs, call_funcs, call_times, extras)
+
+
+def is_binary(path):
+    with open(path, "rb") as f:
+        return f.read(4) == MAGIC
+
+
+class BinaryWorkload:
+    """
+    A memory mapped .rbw file. Nothing is decoded up front: func_name(i) and func_dict(i) decode one func
+    from the string table, call_funcs / call_times are numpy views of the mapped file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buf[:4] != MAGIC:
+            raise Exception(f"{path} is not a binary workload")
+        version = int(np.frombuffer(self.buf, dtype="<u4", count=1, offset=4)[0])
+        if version != FORMAT_VERSION:
+            raise Exception(f"{path} has binary workload version {version}, expected {FORMAT_VERSION}")
+        length = int(np.frombuffer(self.buf, dtype="<u8", count=1, offset=8)[0])
+        header = json.loads(self.buf[16:16 + length])
+        if header["func_columns"] != FUNC_COLUMNS:
+            raise Exception(f"{path} has func columns {header['func_columns']}, expected {FUNC_COLUMNS}")
+        self.extras = header["extras"]
+        sections = header["sections"]
+        self.str_offsets = self.section(sections, "str_offsets", "<i8")
+        self.str_data = sections["str_data"][0]
+        self.funcs = self.section(sections, "funcs", "<i4").reshape(-1, len(FUNC_COLUMNS))
+        self.call_funcs = self.section(sections, "call_funcs", "<i4")
+        self.call_times = self.section(sections, "call_t", "<f8") if "call_t" in sections else None
+
+    def section(self, sections, name, dtype):
+        offset, count = sections[name]
+        return np.frombuffer(self.buf, dtype=dtype, count=count, offset=offset)
+
+    def string(self, i):
+        if i < 0:
+            return None
+        start, end = self.str_offsets[i], self.str_offsets[i + 1]
+        return self.buf[self.str_data + start:self.str_data + end].decode()
+
+    def __len__(self):
+        return len(self.funcs)
+
+    def func_name(self, i):
+        return self.string(self.funcs[i][0])
+
+    def func_meta_dict(self, i):
+        _, req_in, req_txt, direct_mods, mods, _, _ = self.funcs[i]
+        return {"requirements_in": self.string(req_in), "requirements_txt": self.string(req_txt),
+                "direct_import_mods": json.loads(self.string(direct_mods)),
+                "import_mods": json.loads(self.string(mods))}
+
+    def func_code(self, i):
+        return decode_code(self.string(self.funcs[i][5]), self.func_name(i), self.string(self.funcs[i][6]))
+
+    def func_dict(self, i):
+        return {"name": self.func_name(i), "meta": self.func_meta_dict(i), "code": self.func_code(i)}
+
+    # [{"name": ...(, "t": ...)}] of every call
+    def calls(self):
+        names = np.array([self.func_name(i) for i in range(len(self))], dtype=object)[self.call_funcs]
+        if self.call_times is None:
+            return [{"name": name} for name in names]
+        return [{"name": name, "t": t} for name, t in zip(names, self.call_times.tolist())]
+
+    # the workload json dict
+    def to_dict(self):
+        wl_dict = {"funcs": [self.func_dict(i) for i in range(len(self))], "calls": self.calls()}
+        wl_dict.update(self.extras)
+        return wl_dict
+
+
+# Usage: python3 workload_bin.py <in.json|in.rbw> <out.rbw|out.json>
+# converts between the json and the binary format without building a Workload
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 workload_bin.py <in.json|in.rbw> <out.rbw|out.json>")
+        sys.exit()
+    src, dst = sys.argv[1], sys.argv[2]
+    if is_binary(src):
+        with open(dst, "w") as f:
+            json.dump(BinaryWorkload(src).to_dict(), f, indent=2)
+    else:
+        with open(src) as f:
+            dict_to_binary(json.load(f), dst)
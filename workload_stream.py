@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# build a workload from requirements.csv in bounded memory (workload.stream_workload_from_csv):
+# the csv is read CSV_CHUNK_ROWS rows at a time, identical compiled texts are recognized by a 128-bit hash
+# instead of by keeping the texts, and every func is written to the output json as soon as it is made.
+# what stays in memory is a hash per distinct text, an int32 per call and the {pkg: {versions}} of the funcs
+import hashlib
+import json
+import sys
+from array import array
+
+import pandas as pd
+
+from config import CSV_CHUNK_ROWS
+
+
+# the non-empty compiled texts of requirements.csv, in row order, rows whose pip-compile failed are skipped
+def iter_compiled(path, chunksize=CSV_CHUNK_ROWS, column="compiled"):
+    for chunk in pd.read_csv(path, usecols=[column], dtype=str, chunksize=chunksize):
+        for txt in chunk[column].dropna():
+            if txt != "":
+                yield txt
+
+
+# texts with the same key are taken to be the same, without comparing them (that would mean keeping them).
+# with 128 bits, the chance of any collision among 10^9 distinct texts is below 10^-20
+def text_key(txt):
+    return int.from_bytes(hashlib.blake2b(txt.encode(), digest_size=16).digest(), "little")
+
+
+# writes a json array one element at a time
+class JsonArrayWriter:
+    def __init__(self, f, indent=None):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+        f.write("[")
+
+    def append(self, obj):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(obj, indent=self.indent))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]" if self.count else "]")
+
+
+class WorkloadWriter:
+    """
+    Writes the workload json of Workload.save incrementally: funcs are written by add_func as they come,
+    the calls (func indices, kept as int32) and pkg_with_version / empty_pkgs_funcs are written by close().
+    Funcs are named fn1, fn2, ... like Workload.addFunc names them.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, "w")
+        self.f.write('{"funcs": ')
+        self.funcs = JsonArrayWriter(self.f, indent=2)
+        self.call_funcs = array("i")
+        self.pkg_with_version = {}  # {pkg_name: {v1, v2, ...}}
+        self.empty_pkgs_funcs = []
+
+    def __len__(self):
+        return self.funcs.count
+
+    @staticmethod
+    def func_name(idx):
+        return 'fn%d' % (idx + 1)
+
+    # the name the next add_func has to use
+    def next_name(self):
+        return self.func_name(len(self))
+
+    # func_dict: {"name": next_name(), "meta": ..., "code": ...}, requirements: {pkg: [op, version]} of its
+    # requirements.txt. returns the index of the func, for add_call
+    def add_func(self, func_dict, requirements):
+        if func_dict["name"] != self.next_name():
+            raise Exception(f"expected func {self.next_name()}, got {func_dict['name']}")
+        self.funcs.append(func_dict)
+        for pkg, op_version in requirements.items():
+            self.pkg_with_version.setdefault(pkg, set()).add(op_version[1])
+        if len(requirements) == 0:
+            self.empty_pkgs_funcs.append(func_dict["name"])
+        return len(self) - 1
+
+    def add_call(self, idx):
+        self.call_funcs.append(idx)
+
+    def close(self, extras=None):
+        self.funcs.close()
+        self.f.write(',\n"calls": ')
+        calls = JsonArrayWriter(self.f)
+        for idx in self.call_funcs:
+            calls.append({"name": self.func_name(idx)})
+        calls.close()
+        tail = {"pkg_with_version": {pkg: sorted(versions) for pkg, versions in self.pkg_with_version.items()},
+                "empty_pkgs_funcs": self.empty_pkgs_funcs}
+        tail.update(extras or {})
+        for key, value in tail.items():
+            self.f.write(f',\n{json.dumps(key)}: {json.dumps(value)}')
+        self.f.write("}\n")
+        self.f.close()
+
+
+# Usage: python3 workload_stream.py <requirements.csv>
+# counts the rows and distinct compiled texts without loading the csv
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 workload_stream.py <requirements.csv>")
+        sys.exit()
+    rows, keys = 0, set()
+    for txt in iter_compiled(sys.argv[1]):
+        rows += 1
+        keys.add(text_key(txt))
+    print(f"{rows} rows, {len(keys)} distinct compiled texts")